@@ -1,11 +1,16 @@
 import os
 import json
-import requests
 import datetime
 from dotenv import load_dotenv
 from minio import Minio
 import re
 import random
+import hashlib
+from llm_client import call_gemini, stream_gemini, API_URL
+from dedup_index import argument_index
+from result_codec import encode_result
+from llm_scheduler import LLMScheduler
+from profiling import timed
 
 from dotenv import load_dotenv
 import os
@@ -18,11 +23,6 @@ load_dotenv()
 MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY")
 
-# Load API Key from .env
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-
 # MinIO Configuration
 MINIO_ENDPOINT = "localhost:9000"
 
@@ -54,14 +54,58 @@ def print_full_response(response, label="API Response"):
     print("-------------------\n")
 
 
-def generate_debate_topics_by_genre(genre: str) -> dict:
-    """
-    Generate 3 debate topics for a specific genre using Gemini API
-    """
-    headers = {
-        "Content-Type": "application/json"
-    }
+# Fallback topics based on genres
+FALLBACK_TOPICS = {
+    "sports": [
+        "Should esports be included in the Olympics?",
+        "Should college athletes be paid?",
+        "Is VAR improving or ruining football?"
+    ],
+    "cinema": [
+        "Are superhero movies ruining cinema?",
+        "Should streaming platforms release all episodes at once?",
+        "Are remakes necessary in modern cinema?"
+    ],
+    "philosophy": [
+        "Does free will exist?",
+        "Is morality objective or subjective?",
+        "Can artificial intelligence be conscious?"
+    ],
+    "music": [
+        "Is streaming helping or hurting musicians?",
+        "Has auto-tune ruined modern music?",
+        "Should music education be mandatory in schools?"
+    ],
+    "geopolitics": [
+        "Should the UN Security Council be reformed?",
+        "Is economic globalization beneficial for all countries?",
+        "Should nuclear weapons be globally banned?"
+    ],
+    "brainrot": [
+        "Is cereal a soup?",
+        "Do hot dogs qualify as sandwiches?",
+        "Should pineapple be allowed on pizza?"
+    ]
+}
+
+
+# Every Gemini call from this module waits for a slot here: live scoring first,
+# then topic refills, then batch jobs (see llm_scheduler.py)
+llm_scheduler = LLMScheduler()
+
+
+def _call_llm(payload: dict, endpoint: str, work_class: str = None):
+    with llm_scheduler.slot(work_class):
+        return call_gemini(payload, endpoint=endpoint)
 
+
+def _stream_llm(payload: dict, endpoint: str, work_class: str = None):
+    # The slot is held until the stream is exhausted or closed
+    with llm_scheduler.slot(work_class):
+        yield from stream_gemini(payload, endpoint=endpoint)
+
+
+def _topics_payload(genre: str) -> dict:
     prompt = f"""
     Generate exactly 3 interesting and controversial debate topics related to {genre}.
     The topics should be thought-provoking and suitable for a structured debate.
@@ -69,7 +113,7 @@ def generate_debate_topics_by_genre(genre: str) -> dict:
     Provide only the 3 topics without any additional text or numbering.
     """
 
-    payload = {
+    return {
         "contents": [{
             "parts": [{
                 "text": prompt
@@ -77,12 +121,19 @@ def generate_debate_topics_by_genre(genre: str) -> dict:
         }]
     }
 
+
+def _fallback_topics(genre: str) -> list:
+    return FALLBACK_TOPICS.get(genre.lower(), FALLBACK_TOPICS["brainrot"])
+
+
+def generate_debate_topics_by_genre(genre: str) -> dict:
+    """
+    Generate 3 debate topics for a specific genre using Gemini API
+    """
+    payload = _topics_payload(genre)
+
     try:
-        response = requests.post(
-            f"{API_URL}?key={GEMINI_API_KEY}",
-            headers=headers,
-            json=payload
-        )
+        response = _call_llm(payload, "topics", work_class="topics")
 
         if response.status_code == 200:
             content = response.json(
@@ -94,48 +145,10 @@ def generate_debate_topics_by_genre(genre: str) -> dict:
     except Exception as e:
         print(f"Error generating topics: {e}")
 
-    # Fallback topics based on genres
-    fallback_topics = {
-        "sports": [
-            "Should esports be included in the Olympics?",
-            "Should college athletes be paid?",
-            "Is VAR improving or ruining football?"
-        ],
-        "cinema": [
-            "Are superhero movies ruining cinema?",
-            "Should streaming platforms release all episodes at once?",
-            "Are remakes necessary in modern cinema?"
-        ],
-        "philosophy": [
-            "Does free will exist?",
-            "Is morality objective or subjective?",
-            "Can artificial intelligence be conscious?"
-        ],
-        "music": [
-            "Is streaming helping or hurting musicians?",
-            "Has auto-tune ruined modern music?",
-            "Should music education be mandatory in schools?"
-        ],
-        "geopolitics": [
-            "Should the UN Security Council be reformed?",
-            "Is economic globalization beneficial for all countries?",
-            "Should nuclear weapons be globally banned?"
-        ],
-        "brainrot": [
-            "Is cereal a soup?",
-            "Do hot dogs qualify as sandwiches?",
-            "Should pineapple be allowed on pizza?"
-        ]
-    }
-
-    return {"topics": fallback_topics.get(genre.lower(), fallback_topics["brainrot"])}
+    return {"topics": _fallback_topics(genre)}
 
 
 def generate_debate_topic():
-    headers = {
-        "Content-Type": "application/json"
-    }
-
     payload = {
         "contents": [{
             "parts": [{
@@ -145,9 +158,7 @@ def generate_debate_topic():
     }
 
     try:
-        response = requests.post(f"{API_URL}?key={GEMINI_API_KEY}",
-                                 headers=headers,
-                                 json=payload)
+        response = _call_llm(payload, "topics", work_class="topics")
         if response.status_code == 200:
             topic = response.json()[
                 "candidates"][0]["content"]["parts"][0]["text"].strip()
@@ -165,11 +176,15 @@ def generate_debate_topic():
     ]
     return random.choice(fallback_topics)
 
-def score_argument_turn(argument, topic, turn_number):
-    headers = {
-        "Content-Type": "application/json"
-    }
+SCORE_CRITERIA = {
+    "logic": r"Logic.*?(\d+(?:\.\d+)?)",
+    "relevance": r"Relevance.*?(\d+(?:\.\d+)?)",
+    "persuasiveness": r"Persuasiveness.*?(\d+(?:\.\d+)?)"
+}
+DEFAULT_SCORE = 5.0
 
+
+def _score_payload(argument, topic, turn_number) -> dict:
     prompt = f"""
     Score this debate argument (Turn {turn_number}/5) on:
     - Logic (0-10)
@@ -185,7 +200,7 @@ def score_argument_turn(argument, topic, turn_number):
     Persuasiveness: [score]
     """
 
-    payload = {
+    return {
         "contents": [{
             "parts": [{
                 "text": prompt
@@ -193,60 +208,169 @@ def score_argument_turn(argument, topic, turn_number):
         }]
     }
 
+
+def score_cache_key(argument, topic, turn_number) -> str:
+    """Stable key for a scoring request; changes whenever the prompt or model changes"""
+    payload = json.dumps(_score_payload(argument, topic, turn_number), sort_keys=True)
+    return hashlib.sha1(f"{API_URL}\n{payload}".encode('utf-8')).hexdigest()
+
+
+def _default_scores() -> dict:
+    return {name: DEFAULT_SCORE for name in SCORE_CRITERIA}
+
+
+class ScoringError(Exception):
+    """Raised by score_argument_turn(raise_on_error=True) instead of falling back to default scores"""
+
+
+@timed("score_argument_turn")
+def score_argument_turn(argument, topic, turn_number, raise_on_error=False):
+    """
+    Score one argument with Gemini. Near-identical arguments already scored
+    on the same topic reuse those scores (dedup_index).
+    When Gemini fails, live play gets default scores; with raise_on_error
+    (batch jobs that store what they get) a ScoringError is raised instead.
+    """
+    scores = argument_index.find_scores(argument, topic)
+    if scores is not None:
+        return dict(scores)
+
+    payload = _score_payload(argument, topic, turn_number)
+
     try:
-        response = requests.post(f"{API_URL}?key={GEMINI_API_KEY}",
-                                 headers=headers,
-                                 json=payload)
+        response = _call_llm(payload, "score")
         if response.status_code == 200:
             content = response.json(
             )["candidates"][0]["content"]["parts"][0]["text"]
             scores = {
-                "logic": float(re.search(r"Logic.*?(\d+(?:\.\d+)?)", content).group(1)),
-                "relevance": float(re.search(r"Relevance.*?(\d+(?:\.\d+)?)", content).group(1)),
-                "persuasiveness": float(re.search(r"Persuasiveness.*?(\d+(?:\.\d+)?)", content).group(1))
+                name: float(re.search(pattern, content).group(1))
+                for name, pattern in SCORE_CRITERIA.items()
             }
+            argument_index.remember_scores(argument, topic, dict(scores))
             return scores
+        error = f"Gemini returned HTTP {response.status_code}"
     except Exception as e:
+        if raise_on_error:
+            raise ScoringError(f"Scoring failed: {e!r}") from e
         print(f"Error scoring argument: {e}")
+        error = None
+
+    if raise_on_error:
+        raise ScoringError(error)
 
     # Return default scores if API fails
-    return {"logic": 5.0, "relevance": 5.0, "persuasiveness": 5.0}
+    return _default_scores()
 
 
-def score_debate(player1_arguments, player2_arguments, topic):
+def stream_argument_scores(argument, topic, turn_number):
+    """
+    Streaming variant of score_argument_turn: yields (criterion, score) pairs
+    as each "Name: value" line completes. Criteria the stream never delivered
+    are yielded with the default score at the end.
+    """
+    found = {}
+
+    def finish(name, value):
+        found[name] = value
+        return name, value
+
+    cached = argument_index.find_scores(argument, topic)
+    if cached is not None:
+        for name in SCORE_CRITERIA:
+            yield finish(name, cached[name])
+        return
+
+    content = ""
+    try:
+        for text in _stream_llm(_score_payload(argument, topic, turn_number), "score"):
+            content += text
+            # Only trust a number once its line is finished, "Logic: 1" may still become "Logic: 10"
+            complete = content[:content.rfind('\n') + 1]
+            for name, pattern in SCORE_CRITERIA.items():
+                if name not in found:
+                    match = re.search(pattern, complete)
+                    if match:
+                        yield finish(name, float(match.group(1)))
+        for name, pattern in SCORE_CRITERIA.items():
+            if name not in found:
+                match = re.search(pattern, content)
+                if match:
+                    yield finish(name, float(match.group(1)))
+        if len(found) == len(SCORE_CRITERIA):
+            argument_index.remember_scores(argument, topic, dict(found))
+    except Exception as e:
+        print(f"Error streaming argument score: {e}")
+
+    defaults = _default_scores()
+    for name in SCORE_CRITERIA:
+        if name not in found:
+            yield name, defaults[name]
+
+
+def round_outcome(round_number, p1_score, p2_score) -> dict:
+    """Build a round entry (same shape as the entries in score_debate's "rounds")"""
+    p1_total = sum(p1_score.values())
+    p2_total = sum(p2_score.values())
+
+    if p1_total > p2_total:
+        round_winner = "Player 1"
+    elif p2_total > p1_total:
+        round_winner = "Player 2"
+    else:
+        round_winner = "Tie"
+
+    return {
+        "round": round_number,
+        "player1_score": p1_score,
+        "player2_score": p2_score,
+        "round_winner": round_winner
+    }
+
+
+def score_round(topic, round_number, player1_argument, player2_argument) -> dict:
+    """Score a single live round"""
+    p1_score = score_argument_turn(player1_argument, topic, round_number)
+    p2_score = score_argument_turn(player2_argument, topic, round_number)
+    return round_outcome(round_number, p1_score, p2_score)
+
+
+def stream_round(topic, round_number, player1_argument, player2_argument):
+    """
+    Streaming variant of score_round. Yields ("score", {...}) events for each
+    criterion as it arrives and finishes with ("round_result", round_entry).
+    """
+    scores = {"player1": {}, "player2": {}}
+    for player, argument in (("player1", player1_argument), ("player2", player2_argument)):
+        for name, value in stream_argument_scores(argument, topic, round_number):
+            scores[player][name] = value
+            yield "score", {"round": round_number, "player": player, "criterion": name, "score": value}
+
+    yield "round_result", round_outcome(round_number, scores["player1"], scores["player2"])
+
+
+def score_debate(player1_arguments, player2_arguments, topic, scored_rounds=None):
+    """
+    Score all 5 rounds. Rounds already present in scored_rounds (round number ->
+    round entry, as produced by score_round) are reused instead of rescored.
+    """
+    scored_rounds = scored_rounds or {}
     rounds = []
     player1_rounds_won = 0
     player2_rounds_won = 0
 
     for round_num in range(5):
-        print(f"\nScoring Round {round_num + 1}...")
-
-        # Score both arguments for this round
-        p1_score = score_argument_turn(
-            player1_arguments[round_num], topic, round_num + 1)
-        p2_score = score_argument_turn(
-            player2_arguments[round_num], topic, round_num + 1)
+        round_entry = scored_rounds.get(round_num + 1)
+        if round_entry is None:
+            print(f"\nScoring Round {round_num + 1}...")
+            round_entry = score_round(
+                topic, round_num + 1, player1_arguments[round_num], player2_arguments[round_num])
 
-        # Calculate total scores for this round
-        p1_total = sum(p1_score.values())
-        p2_total = sum(p2_score.values())
-
-        # Determine round winner
-        if p1_total > p2_total:
-            round_winner = "Player 1"
+        if round_entry["round_winner"] == "Player 1":
             player1_rounds_won += 1
-        elif p2_total > p1_total:
-            round_winner = "Player 2"
+        elif round_entry["round_winner"] == "Player 2":
             player2_rounds_won += 1
-        else:
-            round_winner = "Tie"
 
-        rounds.append({
-            "round": round_num + 1,
-            "player1_score": p1_score,
-            "player2_score": p2_score,
-            "round_winner": round_winner
-        })
+        rounds.append(round_entry)
 
     return {
         "rounds": rounds,
@@ -256,20 +380,10 @@ def score_debate(player1_arguments, player2_arguments, topic):
     }
 
 
-def run_debate(topic=None, player1_name="Player 1", player1_arguments=None,
-               player2_name="Player 2", player2_arguments=None, game_id=None):
-
-    if topic is None:
-        topic = generate_debate_topic()
-
-    if not all([len(player1_arguments) == 5, len(player2_arguments) == 5]):
-        raise ValueError("Both players must complete all 5 arguments")
-
-    # Score the debate
-    scoring_results = score_debate(player1_arguments, player2_arguments, topic)
-
-    # Prepare debate data
-    debate_data = {
+def build_debate_data(topic, player1_name, player1_arguments, player2_name, player2_arguments,
+                      game_id, scoring_results) -> dict:
+    """Debate result document, as stored in MinIO"""
+    return {
         "game_id": game_id or int(datetime.datetime.now().timestamp()),
         "topic": topic,
         "players": {
@@ -290,11 +404,28 @@ def run_debate(topic=None, player1_name="Player 1", player1_arguments=None,
         "timestamp": str(datetime.datetime.utcnow())
     }
 
-    # Store results
-    store_debate_result(debate_data)
+
+def run_debate(topic=None, player1_name="Player 1", player1_arguments=None,
+               player2_name="Player 2", player2_arguments=None, game_id=None, scored_rounds=None, store=True):
+
+    if topic is None:
+        topic = generate_debate_topic()
+
+    if not all([len(player1_arguments) == 5, len(player2_arguments) == 5]):
+        raise ValueError("Both players must complete all 5 arguments")
+
+    # Score the debate
+    scoring_results = score_debate(player1_arguments, player2_arguments, topic, scored_rounds)
+    debate_data = build_debate_data(topic, player1_name, player1_arguments,
+                                    player2_name, player2_arguments, game_id, scoring_results)
+
+    # Store results (callers with their own MinIO client pass store=False)
+    if store:
+        store_debate_result(debate_data)
     return debate_data
 
 
+@timed("store_debate_result")
 def store_debate_result(debate_data):
     filename = f"debate_{debate_data['game_id']}.json"
 
@@ -303,8 +434,8 @@ def store_debate_result(debate_data):
 
     # Save to temporary file
     temp_file = f"tmp/{filename}"
-    with open(temp_file, "w") as file:
-        json.dump(debate_data, file, indent=4)
+    with open(temp_file, "wb") as file:
+        file.write(encode_result(debate_data))
 
     try:
         MINIO_CLIENT.fput_object(BUCKET_NAME, filename, temp_file)
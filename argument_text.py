@@ -0,0 +1,86 @@
+import os
+import re
+import unicodedata
+from typing import Tuple
+
+# Limits applied to every submitted argument before it is stored or scored
+ARGUMENT_MAX_CHARS = int(os.getenv("ARGUMENT_MAX_CHARS", "3000"))
+ARGUMENT_MAX_TOKENS = int(os.getenv("ARGUMENT_MAX_TOKENS", "600"))
+# "truncate" cuts over-long arguments at a word boundary, "reject" refuses them
+ARGUMENT_OVERFLOW = os.getenv("ARGUMENT_OVERFLOW", "truncate").lower()
+# Raw request bodies above this are refused before any processing
+ARGUMENT_MAX_RAW_CHARS = ARGUMENT_MAX_CHARS * 4
+
+# Control/format characters (zero-width spaces, bidi overrides, ...), newlines and tabs excepted
+CONTROL_RE = re.compile(r"[\x00-\x08\x0b-\x1f\x7f-\x9f\u200b-\u200f\u202a-\u202e\u2060-\u2064\ufeff]")
+SPACES_RE = re.compile(r"[^\S\n]+")
+BLANK_LINES_RE = re.compile(r"\n\s*\n\s*(?:\n\s*)+")
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class ArgumentTooLong(ValueError):
+    pass
+
+
+def normalize_argument(text: str) -> str:
+    """NFKC form, no control characters, single spaces, at most one blank line in a row"""
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = CONTROL_RE.sub("", text)
+    text = SPACES_RE.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def _token_cost(token: str) -> int:
+    # Sub-word tokenizers split long words: roughly one token per 4 characters
+    return 1 + (len(token) - 1) // 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count: words and punctuation, long words counting several"""
+    return sum(_token_cost(match.group()) for match in TOKEN_RE.finditer(text))
+
+
+def truncate_tokens(text: str, max_tokens: int, max_chars: int) -> str:
+    """
+    Longest prefix ending on a word/punctuation boundary within both limits.
+    A first word that alone is over a limit is cut inside the word instead.
+    """
+    used = 0
+    end = 0
+    for match in TOKEN_RE.finditer(text):
+        cost = _token_cost(match.group())
+        if used + cost > max_tokens or match.end() > max_chars:
+            if end == 0:
+                # k characters of a word cost 1 + (k - 1) // 4 tokens
+                end = match.start() + max(min(max_chars - match.start(), 4 * (max_tokens - used)), 0)
+            break
+        used += cost
+        end = match.end()
+    return text[:end].rstrip()
+
+
+def prepare_argument(text: str) -> Tuple[str, dict]:
+    """
+    Normalize a submitted argument and enforce the length limits.
+    Returns the text to store and score, plus {"tokens", "truncated"}.
+    Raises ArgumentTooLong when the overflow policy is "reject", ValueError when nothing is left.
+    """
+    text = normalize_argument(text)
+    if not text:
+        raise ValueError("Argument is empty")
+
+    tokens = estimate_tokens(text)
+    truncated = False
+    if tokens > ARGUMENT_MAX_TOKENS or len(text) > ARGUMENT_MAX_CHARS:
+        if ARGUMENT_OVERFLOW == "reject":
+            raise ArgumentTooLong(
+                f"Argument is too long ({len(text)} characters, ~{tokens} tokens; "
+                f"limit {ARGUMENT_MAX_CHARS} characters, {ARGUMENT_MAX_TOKENS} tokens)")
+        text = truncate_tokens(text, ARGUMENT_MAX_TOKENS, ARGUMENT_MAX_CHARS)
+        if not text:
+            raise ValueError("Argument is empty after truncation")
+        tokens = estimate_tokens(text)
+        truncated = True
+
+    return text, {"tokens": tokens, "truncated": truncated}
@@ -0,0 +1,50 @@
+import json
+import timeit
+from datetime import datetime
+
+from models import Player
+from player_codec import encode_player, decode_player
+
+# Compare per-record decode cost of the old dict format against the compact record
+N = 50000
+
+player = Player(
+    username="benchmark_user",
+    total_score=1234,
+    games_played=87,
+    wins=50,
+    losses=37,
+    created_at=datetime.now()
+)
+
+legacy_bytes = player.model_dump_json().encode('utf-8')
+compact_bytes = encode_player(player)
+
+
+def decode_legacy():
+    return Player(**json.loads(legacy_bytes.decode('utf-8')))
+
+
+def decode_compact():
+    return decode_player(compact_bytes)
+
+
+def encode_legacy():
+    return player.model_dump_json().encode('utf-8')
+
+
+def encode_compact():
+    return encode_player(player)
+
+
+if __name__ == "__main__":
+    assert decode_compact() == decode_legacy()
+
+    print(f"{'format':<10}{'bytes':>8}{'decode us':>12}{'encode us':>12}")
+    for label, size, decode, encode in (
+        ("legacy", len(legacy_bytes), decode_legacy, encode_legacy),
+        ("compact", len(compact_bytes), decode_compact, encode_compact),
+    ):
+        decode_us = min(timeit.repeat(decode, number=N, repeat=3)) / N * 1e6
+        encode_us = min(timeit.repeat(encode, number=N, repeat=3)) / N * 1e6
+        print(f"{label:<10}{size:>8}{decode_us:>12.2f}{encode_us:>12.2f}")
@@ -0,0 +1,70 @@
+import json
+import timeit
+
+from result_codec import encode_result, decode_result, _zstd_module
+
+# Bytes stored and per-result decode cost of each debate result format
+N = 5000
+
+result = {
+    "game_id": "K3Q9ZD",
+    "topic": "Should artificial intelligence be given legal rights?",
+    "players": {
+        "player1": {
+            "name": "benchmark_user_1",
+            "arguments": [
+                f"Argument {i}: AI systems deserve legal protection as they become more sophisticated, "
+                f"and a legal framework is needed for accountability when their decisions affect human lives."
+                for i in range(5)
+            ],
+            "rounds_won": 3
+        },
+        "player2": {
+            "name": "benchmark_user_2",
+            "arguments": [
+                f"Argument {i}: AI lacks consciousness and moral agency, so rights would be meaningless "
+                f"and would blur the responsibility of the humans who build and deploy these systems."
+                for i in range(5)
+            ],
+            "rounds_won": 2
+        }
+    },
+    "rounds": [
+        {
+            "round": i + 1,
+            "player1_score": {"logic": 7.0, "relevance": 8.2, "persuasiveness": 6.0},
+            "player2_score": {"logic": 6.0, "relevance": 7.9, "persuasiveness": 7.0},
+            "round_winner": "Player 1" if i % 2 == 0 else "Player 2"
+        }
+        for i in range(5)
+    ],
+    "winner": "benchmark_user_1",
+    "reason": "Won 3 rounds out of 5",
+    "timestamp": "2024-05-01 12:00:00.000000"
+}
+
+FORMATS = [("legacy (indent=4)", None), ("json", "none"), ("json+gzip", "gzip")]
+if _zstd_module() is not None:
+    FORMATS += [("json+zstd", "zstd")]
+
+
+def encoder(compression):
+    if compression is None:
+        return lambda: json.dumps(result, indent=4).encode('utf-8')
+    return lambda: encode_result(result, compression)
+
+
+if __name__ == "__main__":
+    print(f"{'format':<20}{'bytes':>8}{'decode us':>12}{'encode us':>12}")
+    for label, compression in FORMATS:
+        encode = encoder(compression)
+        data = encode()
+        if compression is None:
+            decode = lambda: json.loads(data.decode('utf-8'))
+        else:
+            decode = lambda: decode_result(data)
+        assert decode() == result, label
+
+        decode_us = min(timeit.repeat(decode, number=N, repeat=3)) / N * 1e6
+        encode_us = min(timeit.repeat(encode, number=N, repeat=3)) / N * 1e6
+        print(f"{label:<20}{len(data):>8}{decode_us:>12.2f}{encode_us:>12.2f}")
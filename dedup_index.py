@@ -0,0 +1,161 @@
+import os
+import re
+import zlib
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# Estimated Jaccard similarity above which an argument counts as a repeat,
+# and the stricter one above which a prior score is reused as-is
+REPEAT_THRESHOLD = float(os.getenv("DEDUP_REPEAT_THRESHOLD", "0.8"))
+REUSE_THRESHOLD = float(os.getenv("DEDUP_REUSE_THRESHOLD", "0.9"))
+# Arguments kept in the index; beyond this the oldest ones are dropped
+MAX_DOCUMENTS = int(os.getenv("DEDUP_MAX_DOCUMENTS", "100000"))
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def shingles(text: str) -> List[str]:
+    words = WORD_RE.findall(text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+class ArgumentIndex:
+    """
+    Near-duplicate index over argument text: MinHash signatures of word
+    3-gram shingles, bucketed by LSH bands. A lookup only compares the
+    signatures that share a band with the query, so its cost depends on the
+    number of near matches rather than on the corpus size.
+
+    Each document carries a metadata dict (room, player, topic and, once the
+    argument has been scored, its raw LLM scores).
+
+    The index is best-effort and per process: it lives in memory, holds the
+    last max_documents arguments (a ring of slots, oldest overwritten first)
+    and is not shared between workers. Losing it only costs repeat flags and
+    reused scores; main.py re-indexes the rooms recovered at startup.
+    """
+
+    def __init__(self, seed: int = 1, max_documents: int = MAX_DOCUMENTS):
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing on 64-bit words: h(x) = (a*x + b) >> 32, with odd a
+        self._a = rng.integers(1, 2 ** 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)
+        self.max_documents = max_documents
+        # Document doc_id lives in slot doc_id % max_documents
+        self._signatures = np.zeros((min(1024, max_documents), NUM_PERM), dtype=np.uint32)
+        self._meta: List[dict] = []
+        # Band key -> doc ids, oldest first
+        self._buckets: Dict[tuple, deque] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._next_id, self.max_documents)
+
+    def signature(self, text: str) -> np.ndarray:
+        values = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles(text)], dtype=np.uint64)
+        hashed = (values[:, None] * self._a + self._b) >> np.uint64(32)
+        return hashed.min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def _band_keys(signature: np.ndarray):
+        bands = signature.reshape(BANDS, ROWS)
+        return [(band, bands[band].tobytes()) for band in range(BANDS)]
+
+    def add(self, text: str, meta: dict, signature: Optional[np.ndarray] = None) -> int:
+        """Index an argument and return its document id"""
+        if signature is None:
+            signature = self.signature(text)
+        with self._lock:
+            doc_id = self._next_id
+            slot = doc_id % self.max_documents
+            if doc_id >= self.max_documents:
+                self._evict(slot)
+                self._meta[slot] = meta
+            else:
+                if slot == len(self._signatures):
+                    rows = min(2 * len(self._signatures), self.max_documents) - len(self._signatures)
+                    self._signatures = np.concatenate([self._signatures, np.zeros((rows, NUM_PERM), np.uint32)])
+                self._meta.append(meta)
+            self._signatures[slot] = signature
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, deque()).append(doc_id)
+            self._next_id += 1
+        return doc_id
+
+    def _evict(self, slot: int):
+        """Drop the document in a slot; being the oldest left, it is first in each of its buckets"""
+        for key in self._band_keys(self._signatures[slot]):
+            bucket = self._buckets[key]
+            bucket.popleft()
+            if not bucket:
+                del self._buckets[key]
+
+    def query(self, text: str, threshold: float = REPEAT_THRESHOLD,
+              signature: Optional[np.ndarray] = None) -> List[Tuple[int, float, dict]]:
+        """(doc_id, estimated similarity, meta) of indexed arguments at or above threshold, best first"""
+        if signature is None:
+            signature = self.signature(text)
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            if not candidates:
+                return []
+            ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            slots = ids % self.max_documents
+            similarity = (self._signatures[slots] == signature).mean(axis=1)
+            meta = [self._meta[slot] for slot in slots]
+
+        matches = [(int(i), float(s), m) for i, s, m in zip(ids, similarity, meta) if s >= threshold]
+        matches.sort(key=lambda match: -match[1])
+        return matches
+
+    def add_submission(self, text: str, room_key: str, player_name: str, round_number: int, topic: str) -> List[int]:
+        """
+        Index an argument submitted in a room. Returns the earlier rounds in which
+        this player already made (nearly) the same argument in this room.
+        """
+        signature = self.signature(text)
+        repeats = sorted(
+            meta["round"] for _, _, meta in self.query(text, REPEAT_THRESHOLD, signature)
+            if meta.get("room") == room_key and meta.get("player") == player_name
+        )
+        self.add(text, {
+            "room": room_key,
+            "player": player_name,
+            "round": round_number,
+            "topic": topic.strip().lower()
+        }, signature)
+        return repeats
+
+    def find_scores(self, text: str, topic: str) -> Optional[dict]:
+        """Raw LLM scores of a near-identical argument already scored on the same topic"""
+        topic = topic.strip().lower()
+        for _, _, meta in self.query(text, REUSE_THRESHOLD):
+            if meta.get("scores") and meta.get("topic") == topic:
+                return meta["scores"]
+        return None
+
+    def remember_scores(self, text: str, topic: str, scores: dict):
+        """Attach raw LLM scores to the indexed copy of this argument (indexing it if needed)"""
+        topic = topic.strip().lower()
+        signature = self.signature(text)
+        for _, _, meta in self.query(text, 1.0, signature):
+            if meta.get("topic") == topic and not meta.get("scores"):
+                meta["scores"] = scores
+                return
+        self.add(text, {"topic": topic, "scores": scores}, signature)
+
+
+argument_index = ArgumentIndex()
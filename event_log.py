@@ -0,0 +1,233 @@
+import os
+import sys
+import glob
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, Tuple
+
+import orjson
+
+from room_state import RoomState
+
+EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "tmp/events")
+SEGMENT_MAX_BYTES = int(os.getenv("EVENT_LOG_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+SNAPSHOT_EVERY = int(os.getenv("EVENT_LOG_SNAPSHOT_EVERY", "1000"))
+FSYNC = os.getenv("EVENT_LOG_FSYNC", "false").lower() == "true"
+SNAPSHOTS_KEPT = 2
+# Segments older than this, and already covered by every kept snapshot, are deleted when a snapshot is written
+RETENTION_SECONDS = float(os.getenv("EVENT_LOG_RETENTION_DAYS", "7")) * 86400
+
+
+class EventLog:
+    """
+    Append-only log of room transitions.
+
+    Each event is one compact JSON line `[seq, ts, room_key, type, data]` in a
+    segment file named after its first sequence number. Every SNAPSHOT_EVERY
+    events the rooms still in play are snapshotted, so recovery only replays
+    the tail of the log. Segments are never rewritten; they double as the source
+    for offline re-scoring until they are older than the retention period and
+    no kept snapshot needs them.
+    """
+
+    def __init__(self, directory: str = EVENT_LOG_DIR, segment_max_bytes: int = SEGMENT_MAX_BYTES,
+                 snapshot_every: int = SNAPSHOT_EVERY, retention_seconds: float = RETENTION_SECONDS):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.snapshot_every = snapshot_every
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._file = None
+        os.makedirs(directory, exist_ok=True)
+
+        self.seq = self._last_seq()
+        self.last_snapshot_seq = self._latest_snapshot_seq()
+
+    # Files
+
+    def _segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, "segment_*.log")))
+
+    def _snapshots(self):
+        return sorted(glob.glob(os.path.join(self.directory, "snapshot_*.json")))
+
+    @staticmethod
+    def _file_seq(path: str) -> int:
+        """Sequence number in a segment_/snapshot_ file name"""
+        return int(os.path.basename(path).split("_", 1)[1].split(".", 1)[0])
+
+    def _latest_snapshot_seq(self) -> int:
+        snapshots = self._snapshots()
+        return self._file_seq(snapshots[-1]) if snapshots else 0
+
+    def _last_seq(self) -> int:
+        seq = self._latest_snapshot_seq()
+        segments = self._segments()
+        if segments:
+            for event in self._read_segment(segments[-1]):
+                seq = max(seq, event[0])
+        return seq
+
+    @staticmethod
+    def _read_segment(path: str) -> Iterator[list]:
+        with open(path, "rb") as file:
+            for line in file:
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Torn write at the end of the segment from a crash; nothing after it was acknowledged
+                    return
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"segment_{self.seq + 1:012d}.log")
+        self._file = open(path, "ab")
+
+    # Writing
+
+    def append(self, room_key: str, event_type: str, data: dict) -> int:
+        """Append one event and return its sequence number"""
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.segment_max_bytes:
+                self._open_segment()
+            self.seq += 1
+            self._file.write(orjson.dumps([self.seq, time.time(), room_key, event_type, data]) + b"\n")
+            self._file.flush()
+            if FSYNC:
+                os.fsync(self._file.fileno())
+            return self.seq
+
+    @property
+    def snapshot_due(self) -> bool:
+        return self.seq - self.last_snapshot_seq >= self.snapshot_every
+
+    def capture(self, rooms: Dict[str, RoomState]) -> Tuple[int, bytes]:
+        """
+        (seq, serialized state of every unfinished room) as of now. Must run
+        where the rooms are changed (the event loop); write_snapshot can then
+        run on another thread.
+        """
+        with self._lock:
+            seq = self.seq
+            # Completed and aborted rooms get no further events; their results are stored elsewhere
+            states = [room.to_state() for room in rooms.values() if not room.finished]
+            self.last_snapshot_seq = seq
+        return seq, orjson.dumps({"seq": seq, "rooms": states})
+
+    def write_snapshot(self, seq: int, data: bytes):
+        """Store a captured snapshot, then drop old snapshots and segments past retention"""
+        with self._snapshot_lock:
+            path = os.path.join(self.directory, f"snapshot_{seq:012d}.json")
+            with open(path + ".tmp", "wb") as file:
+                file.write(data)
+                if FSYNC:
+                    os.fsync(file.fileno())
+            os.replace(path + ".tmp", path)
+
+            for old in self._snapshots()[:-SNAPSHOTS_KEPT]:
+                os.remove(old)
+            self._prune_segments(self._file_seq(self._snapshots()[0]))
+
+    def snapshot(self, rooms: Dict[str, RoomState]):
+        """Capture and write a snapshot on the calling thread"""
+        self.write_snapshot(*self.capture(rooms))
+
+    def _prune_segments(self, covered_seq: int):
+        """Delete segments whose events are all at or before covered_seq and older than the retention period"""
+        cutoff = time.time() - self.retention_seconds
+        segments = self._segments()
+        # The last segment is the one being written to
+        for path, next_path in zip(segments, segments[1:]):
+            if self._file_seq(next_path) - 1 > covered_seq:
+                break
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # Reading
+
+    def iter_events(self, after_seq: int = 0) -> Iterator[list]:
+        """Yield [seq, ts, room_key, type, data] for every event after after_seq"""
+        segments = self._segments()
+        for index, path in enumerate(segments):
+            # Skip segments that end before after_seq (the next segment starts at or below it)
+            if index + 1 < len(segments):
+                if self._file_seq(segments[index + 1]) <= after_seq + 1:
+                    continue
+            for event in self._read_segment(path):
+                if event[0] > after_seq:
+                    yield event
+
+    def replay(self) -> Dict[str, RoomState]:
+        """Rebuild the room table from the latest snapshot plus the events after it"""
+        rooms: Dict[str, RoomState] = {}
+        after_seq = 0
+        snapshots = self._snapshots()
+        if snapshots:
+            with open(snapshots[-1], "rb") as file:
+                snapshot = orjson.loads(file.read())
+            after_seq = snapshot["seq"]
+            for state in snapshot["rooms"]:
+                room = RoomState.from_state(state)
+                rooms[room.room_key] = room
+
+        for _, _, room_key, event_type, data in self.iter_events(after_seq):
+            apply_event(rooms, room_key, event_type, data)
+        return rooms
+
+
+def apply_event(rooms: Dict[str, RoomState], room_key: str, event_type: str, data: dict):
+    """Apply one logged event to a room table"""
+    if event_type == "created":
+        rooms[room_key] = RoomState(
+            room_key, data["topic"], data["player"], created_at=datetime.fromisoformat(data["created_at"])
+        )
+    elif room_key in rooms:
+        rooms[room_key].apply(event_type, data)
+
+
+def finished_debates(log: EventLog) -> Iterator[dict]:
+    """Every completed debate in the log, with its arguments, for offline re-scoring"""
+    rooms: Dict[str, RoomState] = {}
+    for _, _, room_key, event_type, data in log.iter_events():
+        apply_event(rooms, room_key, event_type, data)
+        if event_type == "completed":
+            room = rooms.pop(room_key)
+            yield {
+                "game_id": room.room_key,
+                "topic": room.topic,
+                "player1": {"name": room.player1_name, "arguments": room.arguments[room.player1_name]},
+                "player2": {"name": room.player2_name, "arguments": room.arguments[room.player2_name]},
+            }
+        elif event_type == "aborted":
+            rooms.pop(room_key, None)
+
+
+if __name__ == "__main__":
+    # python event_log.py replay [dir]   - rebuild rooms and print a summary
+    # python event_log.py debates [dir]  - dump completed debates as JSON lines
+    command = sys.argv[1] if len(sys.argv) > 1 else "replay"
+    log = EventLog(sys.argv[2] if len(sys.argv) > 2 else EVENT_LOG_DIR)
+
+    if command == "replay":
+        started = time.perf_counter()
+        rooms = log.replay()
+        elapsed = (time.perf_counter() - started) * 1000
+        statuses: Dict[str, int] = {}
+        for room in rooms.values():
+            statuses[room.status] = statuses.get(room.status, 0) + 1
+        print(f"Replayed {len(rooms)} rooms up to event {log.seq} in {elapsed:.1f} ms: {statuses}")
+    elif command == "debates":
+        for debate in finished_debates(log):
+            sys.stdout.write(orjson.dumps(debate).decode("utf-8") + "\n")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
@@ -0,0 +1,68 @@
+import os
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+# Scoring jobs (one LLM-bound round or final verdict each) allowed to run at once
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", "16"))
+
+
+class FairScheduler:
+    """
+    Concurrency limit shared fairly between keys (rooms). When every slot is
+    busy, waiters queue per key and a freed slot goes to the next key in
+    round-robin order, so a room with a backlog can't starve the others.
+    """
+
+    def __init__(self, limit: int = SCORING_CONCURRENCY):
+        self.limit = limit
+        self.running = 0
+        self._waiting: "OrderedDict[str, deque]" = OrderedDict()
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiting.values())
+
+    async def _acquire(self, key: str):
+        if self.running < self.limit and not self._waiting:
+            self.running += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(key, deque()).append(future)
+        try:
+            # The slot is handed over by _release, running is already counted
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            else:
+                self._discard(key, future)
+            raise
+
+    def _discard(self, key: str, future: asyncio.Future):
+        waiters = self._waiting.get(key)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            if not waiters:
+                del self._waiting[key]
+
+    def _release(self):
+        while self._waiting:
+            key, waiters = next(iter(self._waiting.items()))
+            future = waiters.popleft()
+            # Move the key to the back of the rotation (or drop it when empty)
+            del self._waiting[key]
+            if waiters:
+                self._waiting[key] = waiters
+            if not future.done():
+                future.set_result(None)
+                return
+        self.running -= 1
+
+    @asynccontextmanager
+    async def slot(self, key: str):
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release()
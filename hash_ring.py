@@ -0,0 +1,40 @@
+import os
+import bisect
+import hashlib
+from typing import List
+
+# Base URLs of every API worker, in worker index order, e.g.
+# WORKERS=http://127.0.0.1:8001,http://127.0.0.1:8002 (unset: single worker)
+WORKER_URLS: List[str] = [url.strip() for url in os.getenv("WORKERS", "").split(",") if url.strip()]
+WORKER_INDEX = int(os.getenv("WORKER_INDEX", "0"))
+VIRTUAL_NODES = 64
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of keys onto worker indexes. Each worker gets
+    VIRTUAL_NODES points on the ring, so keys spread evenly and changing the
+    worker count only moves the keys of the added/removed worker.
+    """
+
+    def __init__(self, workers: int, virtual_nodes: int = VIRTUAL_NODES):
+        points = sorted((_hash(f"worker-{worker}#{v}"), worker)
+                        for worker in range(workers) for v in range(virtual_nodes))
+        self._hashes = [h for h, _ in points]
+        self._workers = [w for _, w in points]
+
+    def worker_for(self, key: str) -> int:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._workers[index]
+
+
+ring = HashRing(max(len(WORKER_URLS), 1))
+
+
+def owns(key: str) -> bool:
+    """Whether this worker is the one rooms/tournaments with this key are routed to"""
+    return ring.worker_for(key) == WORKER_INDEX
@@ -0,0 +1,338 @@
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import threading
+from io import BytesIO
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from minio import Minio
+
+from result_codec import decode_result
+from metadata_index import MetadataIndex
+
+HOT_GAMES_PER_PLAYER = int(os.getenv("HISTORY_HOT_GAMES", "50"))
+# Players whose recent games are kept in memory; the least recently used ones are dropped first
+HOT_PLAYERS = int(os.getenv("HISTORY_HOT_PLAYERS", "10000"))
+# Parallel GETs when a history has to fetch games that are not in memory
+FETCH_WORKERS = int(os.getenv("HISTORY_FETCH_WORKERS", "8"))
+# Seconds between automatic compactions by the API (0 disables them) and the age of the debates they archive
+COMPACT_INTERVAL = float(os.getenv("HISTORY_COMPACT_INTERVAL", "86400"))
+COMPACT_DAYS = float(os.getenv("HISTORY_COMPACT_DAYS", "30"))
+ARCHIVE_PREFIX = "archive/"
+ARCHIVE_INDEX_OBJECT = f"{ARCHIVE_PREFIX}index.json"
+SEGMENT_CACHE_SIZE = 8
+# Seconds before archive/index.json is read again, to pick up compactions run by other processes
+ARCHIVE_INDEX_TTL = float(os.getenv("ARCHIVE_INDEX_TTL", "60"))
+
+
+def debate_players(debate: dict) -> List[str]:
+    players = debate.get("players", {})
+    return [players.get(side, {}).get("name") for side in ("player1", "player2") if players.get(side, {}).get("name")]
+
+
+class HistoryStore:
+    """
+    Debate history in two tiers.
+
+    Hot: the most recent games of up to hot_players players, kept in memory
+    and fed as debates complete and as histories are read (without a metadata
+    index, from a warm-up scan of the not-yet-archived debate_* objects).
+    Cold: older debates compacted into gzip JSON-lines segments under
+    archive/, described by a range index (time range and players of each
+    segment), so only the segments a player appears in are ever read.
+
+    Queries with a limit the hot tier can satisfy never touch MinIO. With a
+    metadata index, the index decides which games make up the history (so
+    games finished by other workers are included) and the hot tier only saves
+    fetches; games outside it are looked up by id (their debate_* object or
+    archive segment) instead of scanning the bucket.
+    """
+
+    def __init__(self, minio_client: Minio, bucket_name: str, hot_games: int = HOT_GAMES_PER_PLAYER,
+                 metadata: Optional[MetadataIndex] = None, hot_players: int = HOT_PLAYERS,
+                 fetch_workers: int = FETCH_WORKERS):
+        self.minio_client = minio_client
+        self.bucket_name = bucket_name
+        self.hot_games = hot_games
+        self.hot_players = hot_players
+        self.fetch_workers = fetch_workers
+        self.metadata = metadata
+        self.recent: Dict[str, deque] = OrderedDict()
+        self._segments = OrderedDict()
+        self._index: Optional[List[dict]] = None
+        self._index_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    # Hot tier
+
+    def record(self, debate: dict):
+        """Add a finished debate to the hot tier of both players"""
+        with self._lock:
+            for username in debate_players(debate):
+                self._add_hot(username, debate)
+
+    def _add_hot(self, username: str, debate: dict):
+        games = self.recent.get(username)
+        if games is None:
+            games = self.recent[username] = deque(maxlen=self.hot_games)
+            if len(self.recent) > self.hot_players:
+                self.recent.popitem(last=False)
+        else:
+            self.recent.move_to_end(username)
+        if any(game["game_id"] == debate["game_id"] for game in games):
+            return
+        games.append(debate)
+        # Keep newest last; completions normally arrive in order, warm-up and reads may not
+        if len(games) > 1 and games[-2].get("timestamp", "") > debate.get("timestamp", ""):
+            ordered = sorted(games, key=lambda game: game.get("timestamp", ""))
+            games.clear()
+            games.extend(ordered)
+
+    def warm(self):
+        """
+        Load every debate that hasn't been archived yet into the hot tier. Only
+        needed without a metadata index: with one, the hot tier fills lazily.
+        """
+        count = 0
+        for debate in self._live_debates():
+            self.record(debate)
+            count += 1
+        print(f"[INFO] History hot tier warmed with {count} debates")
+
+    # Reading
+
+    def _live_debates(self):
+        """Debates still stored as individual debate_* objects"""
+        try:
+            for obj in self.minio_client.list_objects(self.bucket_name, prefix="debate_", recursive=True):
+                try:
+                    response = self.minio_client.get_object(self.bucket_name, obj.object_name)
+                    yield decode_result(response.read())
+                except Exception:
+                    continue
+        except Exception as e:
+            print(f"Error fetching debate history: {e}")
+
+    def load_index(self, refresh: bool = False) -> List[dict]:
+        if refresh or self._index is None or time.monotonic() - self._index_loaded_at >= ARCHIVE_INDEX_TTL:
+            try:
+                response = self.minio_client.get_object(self.bucket_name, ARCHIVE_INDEX_OBJECT)
+                self._index = json.loads(response.read().decode('utf-8'))
+            except Exception:
+                self._index = self._index or []
+            self._index_loaded_at = time.monotonic()
+        return self._index
+
+    def _read_segment(self, key: str) -> List[dict]:
+        with self._lock:
+            if key in self._segments:
+                self._segments.move_to_end(key)
+                return self._segments[key]
+
+        response = self.minio_client.get_object(self.bucket_name, key)
+        lines = gzip.decompress(response.read()).splitlines()
+        debates = [json.loads(line) for line in lines if line]
+
+        with self._lock:
+            self._segments[key] = debates
+            if len(self._segments) > SEGMENT_CACHE_SIZE:
+                self._segments.popitem(last=False)
+        return debates
+
+    def _archived(self, username: str, limit: Optional[int]) -> List[dict]:
+        found = []
+        # Newest segments first, so a limited query can stop early
+        for segment in sorted(self.load_index(), key=lambda s: s["last_ts"], reverse=True):
+            if username not in segment["players"]:
+                continue
+            found.extend(d for d in self._read_segment(segment["key"]) if username in debate_players(d))
+            if limit is not None and len(found) >= limit:
+                break
+        return found
+
+    def player_history(self, username: str, limit: Optional[int] = None) -> List[dict]:
+        """A player's debates, newest first"""
+        with self._lock:
+            hot = list(self.recent.get(username, ()))[::-1]
+            if username in self.recent:
+                self.recent.move_to_end(username)
+
+        if self.metadata is not None:
+            return self._indexed_history(username, limit, hot)
+        if limit is not None and len(hot) >= limit:
+            return hot[:limit]
+
+        # The hot tier only keeps the last hot_games games, so look further
+        games = {debate["game_id"]: debate for debate in hot}
+        if len(hot) >= self.hot_games:
+            for debate in self._live_debates():
+                if username in debate_players(debate):
+                    games.setdefault(debate["game_id"], debate)
+        remaining = None if limit is None else limit - len(games)
+        for debate in self._archived(username, remaining):
+            games.setdefault(debate["game_id"], debate)
+
+        history = sorted(games.values(), key=lambda d: d.get("timestamp", ""), reverse=True)
+        return history if limit is None else history[:limit]
+
+    def _fetch_game(self, game_id: str, segment: Optional[str]) -> Optional[dict]:
+        """A game from its archive segment or debate_* object; None when it isn't there"""
+        try:
+            if segment:
+                return next((d for d in self._read_segment(segment) if str(d["game_id"]) == game_id), None)
+            response = self.minio_client.get_object(self.bucket_name, f"debate_{game_id}.json")
+            return decode_result(response.read())
+        except Exception:
+            return None
+
+    def _indexed_history(self, username: str, limit: Optional[int], hot: List[dict]) -> List[dict]:
+        hot_games = {str(debate["game_id"]): debate for debate in hot}
+        games = self.metadata.player_games(username, limit)
+        missing = [(game_id, segment) for game_id, segment in games if game_id not in hot_games]
+        fetched = {}
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.fetch_workers, len(missing)),
+                                    thread_name_prefix="history-fetch") as pool:
+                fetched = dict(zip((game_id for game_id, _ in missing),
+                                   pool.map(lambda game: self._fetch_game(*game), missing)))
+
+        history = []
+        refresh = True
+        for game_id, _ in games:
+            debate = hot_games.get(game_id) or fetched.get(game_id)
+            if debate is None:
+                # Read the archive index again at most once per call; the game may have just been compacted
+                debate = self._find_archived(username, game_id, refresh)
+                refresh = False
+            if debate is not None:
+                history.append(debate)
+            else:
+                print(f"[WARN] Debate {game_id} not found")
+
+        # Lazy warm-up: the newest games fetched for this player stay in memory
+        with self._lock:
+            for debate in history[:self.hot_games][::-1]:
+                if str(debate["game_id"]) not in hot_games:
+                    self._add_hot(username, debate)
+        return history
+
+    def _find_archived(self, username: str, game_id: str, refresh: bool = False) -> Optional[dict]:
+        """
+        Look for a game in the player's archive segments, for games compacted
+        without the metadata index being told; the index is repaired on a hit
+        """
+        for segment in self.load_index(refresh):
+            if username not in segment["players"]:
+                continue
+            for debate in self._read_segment(segment["key"]):
+                if str(debate["game_id"]) == game_id:
+                    self.metadata.set_segment([debate["game_id"]], segment["key"])
+                    return debate
+        return None
+
+    def debate_locations(self):
+        """
+        (debate, archive segment key or None) for every stored debate, each
+        once even if a compaction was interrupted
+        """
+        seen = set()
+        for segment in self.load_index():
+            for debate in self._read_segment(segment["key"]):
+                if debate["game_id"] not in seen:
+                    seen.add(debate["game_id"])
+                    yield debate, segment["key"]
+        for debate in self._live_debates():
+            if debate["game_id"] not in seen:
+                yield debate, None
+
+    def all_debates(self):
+        """Every stored debate, archived or not"""
+        for debate, _ in self.debate_locations():
+            yield debate
+
+    # Compaction
+
+    def compact(self, older_than: timedelta, segment_size: int = 1000) -> int:
+        """
+        Move debate_* objects last modified before now - older_than into
+        archive segments, update the range index and delete the originals.
+        Returns the number of debates archived.
+        """
+        cutoff = datetime.now(timezone.utc) - older_than
+        old_objects = [
+            obj.object_name
+            for obj in self.minio_client.list_objects(self.bucket_name, prefix="debate_", recursive=True)
+            if obj.last_modified and obj.last_modified < cutoff
+        ]
+
+        index = list(self.load_index())
+        archived = 0
+        for start in range(0, len(old_objects), segment_size):
+            names = old_objects[start:start + segment_size]
+            debates = []
+            for name in names:
+                try:
+                    response = self.minio_client.get_object(self.bucket_name, name)
+                    debates.append(decode_result(response.read()))
+                except Exception as e:
+                    print(f"[WARN] Skipping {name}: {e}")
+            if not debates:
+                continue
+
+            debates.sort(key=lambda d: d.get("timestamp", ""))
+            data = gzip.compress(b"\n".join(json.dumps(d, separators=(',', ':')).encode('utf-8') for d in debates))
+            key = f"{ARCHIVE_PREFIX}segment_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')}.jsonl.gz"
+            self.minio_client.put_object(self.bucket_name, key, BytesIO(data), length=len(data))
+
+            index.append({
+                "key": key,
+                "first_ts": debates[0].get("timestamp", ""),
+                "last_ts": debates[-1].get("timestamp", ""),
+                "count": len(debates),
+                "players": sorted({p for d in debates for p in debate_players(d)})
+            })
+            # Publish the index before deleting, so a crash can only leave duplicates, never gaps
+            self._save_index(index)
+            if self.metadata is not None:
+                self.metadata.set_segment([d["game_id"] for d in debates], key)
+            for name in names:
+                self.minio_client.remove_object(self.bucket_name, name)
+            archived += len(debates)
+
+        return archived
+
+    def _save_index(self, index: List[dict]):
+        data = json.dumps(index).encode('utf-8')
+        self.minio_client.put_object(self.bucket_name, ARCHIVE_INDEX_OBJECT, BytesIO(data), length=len(data))
+        self._index = index
+        self._index_loaded_at = time.monotonic()
+
+
+if __name__ == "__main__":
+    # python history_store.py compact --days 30
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Debate history maintenance")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--days", type=float, default=30, help="archive debates older than this")
+    parser.add_argument("--segment-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    client = Minio(
+        os.getenv("MINIO_ENDPOINT", "localhost:9000"),
+        access_key=os.getenv("MINIO_ACCESS_KEY"),
+        secret_key=os.getenv("MINIO_SECRET_KEY"),
+        secure=False
+    )
+    # The index must learn where each game went, or indexed history would look for the deleted objects
+    store = HistoryStore(client, "debate-history", metadata=MetadataIndex())
+    count = store.compact(timedelta(days=args.days), args.segment_size)
+    print(f"[INFO] Archived {count} debates")
+    sys.exit(0)
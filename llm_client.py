@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from dotenv import load_dotenv
+
+from llm_scheduler import LLM_CONCURRENCY
+
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+STREAM_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:streamGenerateContent"
+
+# Per-endpoint timeouts in seconds: (connect, read)
+ENDPOINT_TIMEOUTS = {
+    "topics": (3.0, float(os.getenv("GEMINI_TOPICS_TIMEOUT", "10"))),
+    "score": (3.0, float(os.getenv("GEMINI_SCORE_TIMEOUT", "8"))),
+    "default": (3.0, float(os.getenv("GEMINI_DEFAULT_TIMEOUT", "15"))),
+}
+
+# Circuit breaker settings
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("GEMINI_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("GEMINI_BREAKER_RESET", "30"))
+
+# Hedged requests: only endpoints listed here are hedged
+HEDGED_ENDPOINTS = {e.strip() for e in os.getenv("GEMINI_HEDGED_ENDPOINTS", "").split(",") if e.strip()}
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.2
+# Each scheduler slot can hold the original and the duplicate, and the losing request keeps its
+# thread until it answers or times out while the slot is reused; a queued original would defeat hedging
+HEDGE_THREADS = int(os.getenv("GEMINI_HEDGE_THREADS", str(3 * LLM_CONCURRENCY)))
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker rejects a call without trying it"""
+
+
+class CircuitBreaker:
+    """Fail fast after repeated errors, then let a single probe through once the reset period expires"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half_open" and self.probing):
+                raise CircuitOpenError("Gemini circuit is open")
+            if state == "half_open":
+                self.probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                # A failed probe re-opens the circuit for another full period
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies, used to pick the hedge delay"""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float):
+        with self._lock:
+            if len(self.samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct))
+        return ordered[index]
+
+
+breakers = {}
+latencies = {}
+_registry_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_THREADS, thread_name_prefix="gemini-hedge")
+
+
+def _breaker_for(endpoint: str) -> CircuitBreaker:
+    with _registry_lock:
+        if endpoint not in breakers:
+            breakers[endpoint] = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+            latencies[endpoint] = LatencyTracker()
+        return breakers[endpoint]
+
+
+def _post(payload: dict, timeout) -> requests.Response:
+    response = requests.post(
+        f"{API_URL}?key={GEMINI_API_KEY}",
+        headers={"Content-Type": "application/json"},
+        json=payload,
+        timeout=timeout
+    )
+    # Treat throttling and server errors as failures so they count against the breaker
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+    return response
+
+
+def _hedged_post(payload: dict, timeout, delay: float) -> requests.Response:
+    """Send the request, and if it hasn't answered after `delay` send a duplicate; first answer wins"""
+    first = _hedge_pool.submit(_post, payload, timeout)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    second = _hedge_pool.submit(_post, payload, timeout)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+    raise error
+
+
+def call_gemini(payload: dict, endpoint: str = "default") -> requests.Response:
+    """
+    POST a generateContent payload to Gemini with the endpoint's timeout,
+    guarded by its circuit breaker and optionally hedged.
+    Raises CircuitOpenError without calling out when the circuit is open.
+    """
+    breaker = _breaker_for(endpoint)
+    breaker.before_call()
+
+    timeout = ENDPOINT_TIMEOUTS.get(endpoint, ENDPOINT_TIMEOUTS["default"])
+    started = time.monotonic()
+    try:
+        hedge_delay = None
+        if endpoint in HEDGED_ENDPOINTS:
+            hedge_delay = latencies[endpoint].percentile(0.95)
+        if hedge_delay is not None:
+            response = _hedged_post(payload, timeout, max(hedge_delay, HEDGE_MIN_DELAY))
+        else:
+            response = _post(payload, timeout)
+    except Exception:
+        breaker.record_failure()
+        raise
+
+    breaker.record_success()
+    latencies[endpoint].add(time.monotonic() - started)
+    return response
+
+
+def stream_gemini(payload: dict, endpoint: str = "default"):
+    """
+    Call Gemini's streaming endpoint (server-sent events) and yield text
+    fragments as they arrive. Uses the same breaker and timeouts as call_gemini;
+    the read timeout applies between chunks rather than to the whole body.
+    """
+    breaker = _breaker_for(endpoint)
+    breaker.before_call()
+
+    timeout = ENDPOINT_TIMEOUTS.get(endpoint, ENDPOINT_TIMEOUTS["default"])
+    try:
+        response = requests.post(
+            f"{STREAM_API_URL}?alt=sse&key={GEMINI_API_KEY}",
+            headers={"Content-Type": "application/json"},
+            json=payload,
+            timeout=timeout,
+            stream=True
+        )
+        response.raise_for_status()
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                chunk = json.loads(line[len("data:"):])
+                for candidate in chunk.get("candidates", []):
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+    except GeneratorExit:
+        # Consumer stopped reading (e.g. client disconnected); Gemini was answering fine
+        breaker.record_success()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+
+    # Full-stream durations are not comparable with call_gemini latencies, so they
+    # are kept out of the hedging window
+    breaker.record_success()
+
+
+def circuit_status() -> dict:
+    """Current breaker state and p95 latency per endpoint"""
+    return {
+        endpoint: {
+            "state": breaker.state,
+            "failures": breaker.failures,
+            "p95_seconds": latencies[endpoint].percentile(0.95)
+        }
+        for endpoint, breaker in breakers.items()
+    }
@@ -0,0 +1,122 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+
+# Priority classes, most urgent first: live round/final scoring, /topics refills, batch jobs (rescore.py)
+WORK_CLASSES = ("live", "topics", "batch")
+# Gemini calls in flight at once, over all classes
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+# Per-class caps, so background work can never take every slot from live rounds
+LLM_CLASS_LIMITS = {
+    "live": int(os.getenv("LLM_LIVE_CONCURRENCY", str(LLM_CONCURRENCY))),
+    "topics": int(os.getenv("LLM_TOPICS_CONCURRENCY", "4")),
+    "batch": int(os.getenv("LLM_BATCH_CONCURRENCY", "4")),
+}
+# Seconds of waiting that raise a queued call by one priority class
+LLM_AGING_SECONDS = float(os.getenv("LLM_AGING_SECONDS", "10"))
+
+# Class of the LLM work done in the current context (thread or task)
+current_work_class: ContextVar[str] = ContextVar("llm_work_class", default="live")
+
+
+@contextmanager
+def llm_priority(work_class: str):
+    """Run the enclosed LLM calls under another priority class"""
+    if work_class not in WORK_CLASSES:
+        raise ValueError(f"Unknown LLM work class: {work_class}")
+    token = current_work_class.set(work_class)
+    try:
+        yield
+    finally:
+        current_work_class.reset(token)
+
+
+class LLMScheduler:
+    """
+    Priority gate in front of the LLM for blocking (thread pool) callers.
+    A free slot goes to the waiting call of the most urgent class that is
+    under its own limit; a call's priority rises by one class for every
+    LLM_AGING_SECONDS it has waited, so batch work is delayed but not starved.
+    Within a class calls run in arrival order.
+
+    The scheduler only sees the calls of its own process: every API worker and
+    every rescore.py run has its own limits and queues, and their calls reach
+    Gemini side by side without priorities between them.
+    """
+
+    def __init__(self, limit: int = LLM_CONCURRENCY, class_limits: Dict[str, int] = None,
+                 aging_seconds: float = LLM_AGING_SECONDS):
+        self.limit = limit
+        self.class_limits = dict(class_limits or LLM_CLASS_LIMITS)
+        self.aging_seconds = aging_seconds
+        self.running = {work_class: 0 for work_class in WORK_CLASSES}
+        self.completed = {work_class: 0 for work_class in WORK_CLASSES}
+        self.waited = {work_class: 0.0 for work_class in WORK_CLASSES}
+        self._waiting = {work_class: deque() for work_class in WORK_CLASSES}
+        self._cond = threading.Condition()
+
+    def _next_class(self, now: float):
+        """Class whose oldest waiter gets the next slot, or None if nothing may start"""
+        if sum(self.running.values()) >= self.limit:
+            return None
+        best = None
+        best_priority = None
+        for rank, work_class in enumerate(WORK_CLASSES):
+            waiters = self._waiting[work_class]
+            if not waiters or self.running[work_class] >= self.class_limits[work_class]:
+                continue
+            priority = rank - (now - waiters[0][0]) / self.aging_seconds
+            if best is None or priority < best_priority:
+                best, best_priority = work_class, priority
+        return best
+
+    def acquire(self, work_class: str):
+        ticket = (time.monotonic(), object())
+        with self._cond:
+            waiters = self._waiting[work_class]
+            waiters.append(ticket)
+            try:
+                while not (waiters[0] is ticket and self._next_class(time.monotonic()) == work_class):
+                    self._cond.wait()
+            except BaseException:
+                waiters.remove(ticket)
+                self._cond.notify_all()
+                raise
+            waiters.popleft()
+            self.running[work_class] += 1
+            self.waited[work_class] += time.monotonic() - ticket[0]
+            # Another class may still fit in the remaining slots
+            self._cond.notify_all()
+
+    def release(self, work_class: str):
+        with self._cond:
+            self.running[work_class] -= 1
+            self.completed[work_class] += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, work_class: str = None):
+        """Hold one LLM slot for the enclosed call (class defaults to the current context's)"""
+        work_class = work_class or current_work_class.get()
+        self.acquire(work_class)
+        try:
+            yield
+        finally:
+            self.release(work_class)
+
+    def status(self) -> dict:
+        """Running/queued calls and mean queueing delay per class"""
+        with self._cond:
+            return {
+                work_class: {
+                    "running": self.running[work_class],
+                    "queued": len(self._waiting[work_class]),
+                    "limit": self.class_limits[work_class],
+                    "mean_wait_seconds": self.waited[work_class] / max(self.completed[work_class] + self.running[work_class], 1)
+                }
+                for work_class in WORK_CLASSES
+            }
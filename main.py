@@ -1,23 +1,86 @@
-from fastapi import FastAPI, HTTPException, Query
-from models import Player, Room, JoinRoom, Argument, TopicResponse
+from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse, Response
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from models import Player, JoinRoom, Argument, TopicResponse, TournamentCreate
+from room_state import RoomState, MAX_ROUNDS
+from event_log import EventLog, apply_event
+from dedup_index import argument_index
+from topic_catalog import TopicCatalog, TOPIC_REFILL_BACKOFF, TOPIC_REFILL_BACKOFF_MAX
 from player_service import PlayerService
+from history_store import HistoryStore, COMPACT_INTERVAL as HISTORY_COMPACT_INTERVAL, COMPACT_DAYS as HISTORY_COMPACT_DAYS
+from metadata_index import MetadataIndex, rebuild as rebuild_metadata_index
+from write_buffer import WriteBehindBuffer
+from result_codec import encode_result
+from spectators import Broadcaster
+from fair_scheduler import FairScheduler
+from tournament import Tournament, FORMATS as TOURNAMENT_FORMATS
+from hash_ring import WORKER_INDEX, owns
+from argument_text import prepare_argument, ArgumentTooLong
+from profiling import ProfilingMiddleware, PROFILE_SAMPLE_RATE, profiler, span
+from stats_service import StatsService
+from rating_engine import abort_record
 import os
 from dotenv import load_dotenv
 from minio import Minio
-from ai_engine import run_debate, generate_debate_topics_by_genre
+from ai_engine import run_debate, generate_debate_topics_by_genre, score_round, stream_round, FALLBACK_TOPICS
 import random
+import asyncio
+import time
+import functools
 import string
 import json
-from io import BytesIO
+import orjson
 import uvicorn
+from datetime import datetime, timedelta
 from fastapi.middleware.cors import CORSMiddleware
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Tuple
 
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Old debates are moved into archive segments by the first worker; the others pick up the new index
+    compaction = None
+    if HISTORY_COMPACT_INTERVAL > 0 and WORKER_INDEX == 0:
+        compaction = asyncio.create_task(compact_history())
+    # Without statistics yet, compute them from the debate archive once; the tables are shared by all workers
+    stats_rebuild = None
+    if stats_service.is_empty() and WORKER_INDEX == 0:
+        stats_rebuild = asyncio.create_task(asyncio.to_thread(stats_service.rebuild, history_store.all_debates()))
+    # Rooms whose final verdict was interrupted by a restart are finished now
+    for room in debate_rooms.values():
+        if room.status == "scoring":
+            print(f"[INFO] Resuming final scoring of room {room.room_key}")
+            start_final_scoring(room)
+    yield
+    if final_scoring:
+        await asyncio.gather(*final_scoring.values(), return_exceptions=True)
+    if compaction is not None:
+        compaction.cancel()
+    if stats_rebuild is not None:
+        await stats_rebuild
+    stats_service.close()
+    await asyncio.to_thread(write_buffer.close)
+    event_log.close()
+    metadata_index.close()
+    profiler.close()
+
+async def compact_history():
+    """Archive debates older than HISTORY_COMPACT_DAYS every HISTORY_COMPACT_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(HISTORY_COMPACT_INTERVAL)
+        try:
+            count = await asyncio.to_thread(history_store.compact, timedelta(days=HISTORY_COMPACT_DAYS))
+            print(f"[INFO] Archived {count} debates")
+        except Exception as e:
+            print(f"[ERROR] History compaction failed: {e!r}")
+
 # Initialize FastAPI app
-app = FastAPI(title="Debate API", description="API for managing debate players and rooms")
+app = FastAPI(title="Debate API", description="API for managing debate players and rooms", lifespan=lifespan)
 
 # Middleware
 app.add_middleware(
@@ -29,6 +92,8 @@ app.add_middleware(
     expose_headers=["*"],
     max_age=36000
 )
+if PROFILE_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilingMiddleware, sample_rate=PROFILE_SAMPLE_RATE)
 # MinIO Configuration
 MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "localhost:9000")
 MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
@@ -59,13 +124,146 @@ minio_client = Minio(
 if not minio_client.bucket_exists(MINIO_BUCKET):
     minio_client.make_bucket(MINIO_BUCKET)
     
-player_service = PlayerService(minio_client, MINIO_BUCKET)
+# Player, result and tournament writes are batched off the request path
+write_buffer = WriteBehindBuffer(minio_client, MINIO_BUCKET)
+
+# Player and debate metadata for indexed lookups; built from the bucket on first start
+metadata_index = MetadataIndex()
+# The index file is shared by all workers on the host, so only the first one builds it
+if metadata_index.is_empty() and WORKER_INDEX == 0:
+    rebuild_metadata_index(metadata_index, minio_client, MINIO_BUCKET)
+
+player_service = PlayerService(
+    minio_client,
+    MINIO_BUCKET,
+    max_workers=int(os.getenv("PLAYER_LOAD_WORKERS", "16")),
+    use_snapshot=os.getenv("PLAYER_SNAPSHOT", "true").lower() == "true",
+    index=metadata_index,
+    writer=write_buffer
+)
 
-debate_rooms: dict[str, dict] = {}
+# Recent games per player in memory, older ones in compacted archive segments
+history_store = HistoryStore(minio_client, MINIO_BUCKET, metadata=metadata_index)
+
+# Every room transition is logged before it is applied, so rooms survive a worker restart
+event_log = EventLog()
+debate_rooms: dict[str, RoomState] = event_log.replay()
+if debate_rooms:
+    print(f"[INFO] Recovered {len(debate_rooms)} rooms from the event log")
+# The argument index is in memory only: give it back the arguments of the recovered rooms
+for recovered in debate_rooms.values():
+    if not recovered.finished:
+        for recovered_player, recovered_arguments in recovered.arguments.items():
+            for round_number, text in enumerate(recovered_arguments, 1):
+                argument_index.add_submission(text, recovered.room_key, recovered_player, round_number, recovered.topic)
+
+# Seconds a completed or aborted room can still be read (status, spectators) before it is dropped
+FINISHED_ROOM_SECONDS = float(os.getenv("FINISHED_ROOM_SECONDS", "300"))
+# (time finished, room key), oldest first
+finished_rooms: deque = deque((time.monotonic(), key) for key, room in debate_rooms.items() if room.finished)
+
+# Topics are served from the catalog; the LLM only refills it in the background
+topic_catalog = TopicCatalog()
+for genre in VALID_GENRES:
+    topic_catalog.add(genre, FALLBACK_TOPICS[genre], save=False)
+refilling_genres: set[str] = set()
+# Genre -> (time before which no refill starts, last backoff in seconds), after refills that added nothing
+refill_backoff: Dict[str, Tuple[float, float]] = {}
+
+# Per-topic, per-genre and per-player statistics, updated as debates finish
+stats_service = StatsService(topic_catalog.genre_of)
+
+# Room events fanned out to spectators
+spectators = Broadcaster()
+
+# LLM scoring slots, shared round-robin between rooms
+scoring_scheduler = FairScheduler()
+
+# Tournaments, persisted as tournament_<id>.json; rooms map back to their match.
+# In multi-worker mode each worker loads the tournaments routed to it.
+tournaments: dict[str, Tournament] = {}
+tournament_matches: dict[str, tuple[str, str]] = {}
+for obj in minio_client.list_objects(MINIO_BUCKET, prefix="tournament_", recursive=True):
+    if not owns(obj.object_name[len("tournament_"):-len(".json")]):
+        continue
+    tournament = Tournament.from_dict(orjson.loads(minio_client.get_object(MINIO_BUCKET, obj.object_name).read()))
+    tournaments[tournament.tournament_id] = tournament
+    for matches in tournament.rounds:
+        for match in matches:
+            if match.status == "in_progress":
+                tournament_matches[match.room_key] = (tournament.tournament_id, match.match_id)
+
+def refill_due(genre: str) -> bool:
+    return (topic_catalog.needs_refill(genre) and genre not in refilling_genres
+            and time.monotonic() >= refill_backoff.get(genre, (0.0, 0.0))[0])
+
+def refill_topics(genre: str):
+    """Ask the LLM for new topics and add the ones that aren't rewordings of known topics"""
+    if genre in refilling_genres:
+        return
+    refilling_genres.add(genre)
+    try:
+        added = topic_catalog.add(genre, generate_debate_topics_by_genre(genre)["topics"])
+        if added:
+            refill_backoff.pop(genre, None)
+            print(f"[INFO] Added {len(added)} new {genre} topics to the catalog")
+        else:
+            # Nothing new, e.g. the LLM is down and only fallback topics came back; don't ask on every request
+            delay = min(max(refill_backoff.get(genre, (0.0, 0.0))[1] * 2, TOPIC_REFILL_BACKOFF),
+                        TOPIC_REFILL_BACKOFF_MAX)
+            refill_backoff[genre] = (time.monotonic() + delay, delay)
+            print(f"[WARN] Refill added no new {genre} topics, next attempt in {delay:.0f}s")
+    finally:
+        refilling_genres.discard(genre)
 
 def generate_room_key(length: int = 6) -> str:
-    """Generate a random room key"""
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
+    """
+    Generate a random room key that isn't in use. In multi-worker mode only
+    keys that the router sends back to this worker are handed out.
+    """
+    while True:
+        room_key = ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
+        # Finished rooms are dropped from memory, but their stored results still use the key
+        if room_key not in debate_rooms and owns(room_key) and not metadata_index.has_debate(room_key):
+            return room_key
+
+def drop_finished_rooms():
+    """Forget rooms that finished more than FINISHED_ROOM_SECONDS ago"""
+    cutoff = time.monotonic() - FINISHED_ROOM_SECONDS
+    while finished_rooms and finished_rooms[0][0] <= cutoff:
+        _, room_key = finished_rooms.popleft()
+        debate_rooms.pop(room_key, None)
+        room_status_cache.pop(room_key, None)
+
+def _snapshot_written(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"[ERROR] Event log snapshot failed: {future.exception()!r}")
+
+def record_event(room_key: str, event_type: str, **data):
+    """Append a room transition to the event log, apply it to the in-memory room and tell spectators"""
+    seq = event_log.append(room_key, event_type, data)
+    apply_event(debate_rooms, room_key, event_type, data)
+    if event_type in ("completed", "aborted"):
+        finished_rooms.append((time.monotonic(), room_key))
+    if event_log.snapshot_due:
+        # The rooms are serialized here, between two events; the file write and pruning run off the loop
+        seq, data = event_log.capture(debate_rooms)
+        written = asyncio.get_running_loop().run_in_executor(None, event_log.write_snapshot, seq, data)
+        written.add_done_callback(_snapshot_written)
+
+    if spectators.count(room_key):
+        room = debate_rooms[room_key]
+        spectators.publish(room_key, event_type, {
+            **data,
+            "status": room.status,
+            "current_round": room.current_round,
+            "current_turn": room.current_turn
+        }, seq)
+    drop_finished_rooms()
+
+def sse_event(event: str, data) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 #0. Health check
 @app.get("/")
@@ -97,41 +295,43 @@ async def get_player(username: str):
 
 #past match history and rankings
 @app.get("/player/history/{username}")
-async def get_player_history(username: str):
-    """Get player match history and ranking information"""
+async def get_player_history(username: str, limit: int = Query(None, ge=1)):
+    """Get player match history (newest first) and ranking information"""
     player = await player_service.get_player(username)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
     
    
-    all_players = await player_service.get_all_players()
+    player_rank, total_players = await player_service.rank(username)
     
-    ranked_players = sorted(all_players, key=lambda x: x.total_score, reverse=True)
-    player_rank = next((i + 1 for i, p in enumerate(ranked_players) if p.username == username), None)
-    
-    debate_history = []
-    try:
-        objects = minio_client.list_objects(MINIO_BUCKET, prefix="debate_", recursive=True)
-        for obj in objects:
-            try:
-                response = minio_client.get_object(MINIO_BUCKET, obj.object_name)
-                data = json.loads(response.read().decode('utf-8'))
-                
-                if data.get("players", {}).get("player1", {}).get("name") == username or \
-                   data.get("players", {}).get("player2", {}).get("name") == username:
-                    debate_history.append(data)
-            except:
-                continue
-    except Exception as e:
-        print(f"Error fetching debate history: {e}")
+    debate_history = await run_in_threadpool(history_store.player_history, username, limit)
     
     return {
         "player": player,
         "rank": player_rank,
-        "total_players": len(ranked_players),
+        "total_players": total_players,
         "debate_history": debate_history
     }
 
+@app.get("/stats/topics")
+async def get_topic_stats(sort: str = Query("debates", pattern="^(debates|balanced)$"),
+                          min_debates: int = Query(1, ge=1), limit: int = Query(20, ge=1, le=500)):
+    """Per-topic win splits between first and second speaker, most played or most balanced first"""
+    return {"topics": stats_service.topic_stats(sort, min_debates, limit)}
+
+@app.get("/stats/genres")
+async def get_genre_stats():
+    """Mean and variance of each scoring criterion per genre"""
+    return {"genres": stats_service.genre_stats()}
+
+@app.get("/stats/players/{username}")
+async def get_player_stats(username: str):
+    """Debates played and average criterion scores per argument"""
+    stats = stats_service.player_stats(username)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No finished debates for this player")
+    return {"username": username, **stats}
+
 # 4. Send list of genres
 @app.get("/genres")
 async def get_genres():
@@ -139,16 +339,29 @@ async def get_genres():
     return {"genres": VALID_GENRES}
 
 @app.get("/topics/{genre}", response_model=TopicResponse)
-async def get_debate_topics(genre: str):
+async def get_debate_topics(genre: str, background_tasks: BackgroundTasks,
+                            stream: bool = Query(False, description="Stream topics as server-sent events")):
     """Get three debate topics for a specific genre"""
-    if genre.lower() not in VALID_GENRES:
+    genre = genre.lower()
+    if genre not in VALID_GENRES:
         raise HTTPException(
             status_code=400,
             detail={"error": "Invalid genre", "valid_genres": VALID_GENRES}
         )
 
-    topics = generate_debate_topics_by_genre(genre)
-    return topics
+    topics = topic_catalog.sample(genre, 3)
+    if refill_due(genre):
+        background_tasks.add_task(refill_topics, genre)
+
+    if stream:
+        def topic_events():
+            for topic in topics:
+                yield sse_event("topic", {"topic": topic})
+            yield sse_event("done", {})
+
+        return StreamingResponse(topic_events(), media_type="text/event-stream", background=background_tasks)
+
+    return {"topics": topics}
 
 @app.post("/create-room/{player_name}")
 async def create_room(player_name: str, topic: str = Query(..., description="Selected debate topic")):
@@ -161,14 +374,7 @@ async def create_room(player_name: str, topic: str = Query(..., description="Sel
     room_key = generate_room_key()
 
     # Create room
-    room = Room(
-        room_key=room_key,
-        topic=topic.strip(),
-        player1_name=player_name,
-        arguments={player_name: []}
-    )
-
-    debate_rooms[room_key] = room.dict()
+    record_event(room_key, "created", topic=topic.strip(), player=player_name, created_at=datetime.now().isoformat())
     return {"room_key": room_key, "topic": topic}
 
 
@@ -184,107 +390,232 @@ async def join_room(room_key: str, join_request: JoinRoom):
         raise HTTPException(status_code=404, detail="Room not found")
 
     room = debate_rooms[room_key]
-    if room["player2_name"]:
+    if room.player2_name:
         raise HTTPException(status_code=400, detail="Room is full")
 
-    room["player2_name"] = join_request.player_name
-    room["status"] = "in_progress"
-    room["current_turn"] = room["player1_name"]
-    room["arguments"][join_request.player_name] = []
+    record_event(room_key, "joined", player=join_request.player_name)
+
+    return {"message": "Joined successfully", "room": room.to_dict()}
 
-    return {"message": "Joined successfully", "room": room}
+def build_round_result(room: RoomState, round_number: int, scores: dict) -> dict:
+    """Round result as returned to the players"""
+    player1_argument, player2_argument = room.round_arguments(round_number)
+    return {
+        "round": round_number,
+        "player1": {
+            "name": room.player1_name,
+            "argument": player1_argument
+        },
+        "player2": {
+            "name": room.player2_name,
+            "argument": player2_argument
+        },
+        "scores": scores
+    }
+
+async def complete_debate(room: RoomState) -> dict:
+    """Score the full debate, update both players and store the result"""
+    async with scoring_scheduler.slot(room.room_key):
+        result = await run_in_threadpool(
+            run_debate,
+            topic=room.topic,
+            player1_name=room.player1_name,
+            player1_arguments=room.arguments[room.player1_name],
+            player2_name=room.player2_name,
+            player2_arguments=room.arguments[room.player2_name],
+            game_id=room.room_key,
+            scored_rounds=room.round_scores,
+            store=False
+        )
+
+    winner = result["winner"]
+    # Logged before the profiles change: a crash in between loses this update
+    # rather than applying it a second time when the scoring is resumed
+    if not room.players_updated:
+        record_event(room.room_key, "players_updated", winner=winner)
+        if winner == "Tie":
+            await player_service.record_draw(room.player1_name, room.player2_name)
+        else:
+            loser = room.opponent_of(winner)
+            winner_score = result["players"]["player1" if winner == room.player1_name else "player2"]["rounds_won"]
+            loser_score = result["players"]["player1" if loser == room.player1_name else "player2"]["rounds_won"]
+
+            await player_service.update_scores(winner, loser, winner_score, loser_score)
+
+    with span("store_debate_result"):
+        write_buffer.put(f"debate_{room.room_key}.json", encode_result(result))
+        history_store.record(result)
+        metadata_index.add_debate(result)
+        # BEGIN IMMEDIATE can wait on another worker's transaction: keep it off the event loop
+        await run_in_threadpool(stats_service.record, result)
+
+    spectators.publish(room.room_key, "final_result", result)
+    record_event(room.room_key, "completed")
+
+    if room.room_key in tournament_matches:
+        await finish_tournament_match(
+            room.room_key,
+            None if winner == "Tie" else winner,
+            [result["players"]["player1"]["rounds_won"], result["players"]["player2"]["rounds_won"]]
+        )
+    return result
+
+async def score_live_round(room: RoomState, round_number: int) -> dict:
+    """Score a finished round and record it"""
+    async with scoring_scheduler.slot(room.room_key):
+        scores = await run_in_threadpool(score_round, room.topic, round_number, *room.round_arguments(round_number))
+    record_event(room.room_key, "round_scored", scores=scores)
+    return scores
+
+async def round_events(room: RoomState, round_number: int):
+    """(event, data) pairs while a finished round is scored: per-criterion scores, then the round result"""
+    round_stream = stream_round(room.topic, round_number, *room.round_arguments(round_number))
+    async with scoring_scheduler.slot(room.room_key):
+        async for event, data in iterate_in_threadpool(round_stream):
+            if event == "round_result":
+                record_event(room.room_key, "round_scored", scores=data)
+                data = build_round_result(room, round_number, data)
+            yield event, data
+
+# Final verdicts being computed, by room. They run as tasks of their own, so a
+# client that disconnects (or a cancelled request) can't leave a room in "scoring".
+final_scoring: Dict[str, asyncio.Task] = {}
+# Seconds before a failed final scoring is retried, doubling with every failure up to the maximum
+FINAL_SCORING_RETRY = float(os.getenv("FINAL_SCORING_RETRY", "5"))
+FINAL_SCORING_RETRY_MAX = float(os.getenv("FINAL_SCORING_RETRY_MAX", "300"))
+# Consecutive failures, by room
+final_scoring_failures: Dict[str, int] = {}
+
+async def finish_debate(room: RoomState, events: Optional[asyncio.Queue] = None) -> dict:
+    """
+    Score the last round if that hasn't happened yet (streaming its events into
+    `events` when given, closed with None), then complete the debate
+    """
+    try:
+        if MAX_ROUNDS not in room.round_scores:
+            if events is None:
+                await score_live_round(room, MAX_ROUNDS)
+            else:
+                async for event, data in round_events(room, MAX_ROUNDS):
+                    events.put_nowait((event, data))
+    finally:
+        if events is not None:
+            events.put_nowait(None)
+    return await complete_debate(room)
+
+def _final_scoring_done(room_key: str, task: asyncio.Task):
+    final_scoring.pop(room_key, None)
+    if task.cancelled() or task.exception() is None:
+        final_scoring_failures.pop(room_key, None)
+        return
+    # The room stays in "scoring": tell its spectators and try again later
+    failures = final_scoring_failures[room_key] = final_scoring_failures.get(room_key, 0) + 1
+    delay = min(FINAL_SCORING_RETRY * 2 ** (failures - 1), FINAL_SCORING_RETRY_MAX)
+    print(f"[ERROR] Final scoring of room {room_key} failed ({failures}x), retrying in {delay:g}s: {task.exception()!r}")
+    spectators.publish(room_key, "scoring_failed", {"error": str(task.exception()), "retry_in": delay})
+    asyncio.get_running_loop().call_later(delay, retry_final_scoring, room_key)
+
+def retry_final_scoring(room_key: str):
+    room = debate_rooms.get(room_key)
+    if room is not None and room.status == "scoring":
+        start_final_scoring(room)
+
+def start_final_scoring(room: RoomState, events: Optional[asyncio.Queue] = None) -> asyncio.Task:
+    """The room's final-scoring task, started unless one is already running"""
+    task = final_scoring.get(room.room_key)
+    if task is None:
+        task = final_scoring[room.room_key] = asyncio.create_task(finish_debate(room, events))
+        task.add_done_callback(functools.partial(_final_scoring_done, room.room_key))
+    return task
+
+async def stream_round_events(room: RoomState, round_number: int):
+    """Server-sent events for a finished round: per-criterion scores, the round result, then the next turn"""
+    async for event, data in round_events(room, round_number):
+        yield sse_event(event, data)
+    yield sse_event("next_turn", {
+        "status": "in_progress",
+        "current_round": round_number,
+        "next_turn": room.current_turn
+    })
+
+async def stream_final_events(room: RoomState, events: asyncio.Queue, task: asyncio.Task):
+    """Server-sent events of the last round and the verdict; closing the stream leaves the task running"""
+    while True:
+        item = await events.get()
+        if item is None:
+            break
+        yield sse_event(*item)
+    result = await asyncio.shield(task)
+    yield sse_event("final_result", {
+        "status": "completed",
+        "current_round": MAX_ROUNDS,
+        "final_result": result
+    })
 
 #Submit arguments for each round
 @app.post("/submit-argument/{room_key}/{player_name}")
-async def submit_argument(room_key: str, player_name: str, argument: Argument):
+async def submit_argument(room_key: str, player_name: str, argument: Argument,
+                          stream: bool = Query(False, description="Stream round scores as server-sent events")):
     """Submit an argument for the current round"""
     if room_key not in debate_rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
     room = debate_rooms[room_key]
 
-    if room["status"] != "in_progress":
+    if room.status != "in_progress":
         raise HTTPException(status_code=400, detail="Debate not in progress")
 
-    if player_name != room["current_turn"]:
+    if player_name != room.current_turn:
         raise HTTPException(status_code=400, detail="Not your turn")
 
-    room["arguments"][player_name].append(argument.argument)
-  
-    # Determine current round
-    player1_arguments = room["arguments"][room["player1_name"]]
-    player2_arguments = room["arguments"].get(room["player2_name"], [])
-    current_round = min(len(player1_arguments), len(player2_arguments)) + (1 if player_name == room["player1_name"] else 0)
-    
-    round_result = None
-    if len(player1_arguments) == len(player2_arguments):
-        # Both players have submitted arguments for this round
-        if len(player1_arguments) <= 5:  # Process rounds 1-5
-            # Score the current round
-            p1_arg = player1_arguments[-1]
-            p2_arg = player2_arguments[-1]
-            round_result = {
-                "round": len(player1_arguments),
-                "player1": {
-                    "name": room["player1_name"],
-                    "argument": p1_arg
-                },
-                "player2": {
-                    "name": room["player2_name"],
-                    "argument": p2_arg
-                },
-                "scores": run_debate(
-                    topic=room["topic"],
-                    player1_name=room["player1_name"],
-                    player1_arguments=[p1_arg],
-                    player2_name=room["player2_name"],
-                    player2_arguments=[p2_arg],
-                    game_id=f"{room_key}_round_{len(player1_arguments)}"
-                )["rounds"][0]
-            }
-    
-    # Switch turns
-    room["current_turn"] = room["player2_name"] if player_name == room["player1_name"] else room["player1_name"]
-
-    #Check if debate is complete (5 rounds)
-    if len(player1_arguments) == 5 and len(player2_arguments) == 5:
-        result = run_debate(
-            topic=room["topic"],
-            player1_name=room["player1_name"],
-            player1_arguments=player1_arguments,
-            player2_name=room["player2_name"],
-            player2_arguments=player2_arguments,
-            game_id=room_key
-        )
-
-        winner = result["winner"]
-        loser = room["player2_name"] if winner == room["player1_name"] else room["player1_name"]
-        winner_score = result["players"]["player1" if winner == room["player1_name"] else "player2"]["rounds_won"]
-        loser_score = result["players"]["player1" if loser == room["player1_name"] else "player2"]["rounds_won"]
-
-        await player_service.update_scores(winner, loser, winner_score, loser_score)
-
-        debate_data = json.dumps(result).encode('utf-8')
-        minio_client.put_object(
-            MINIO_BUCKET,
-            f"debate_{room_key}.json",
-            BytesIO(debate_data),
-            length=len(debate_data)
-        )
-
-        room["status"] = "completed"
+    # Normalize and bound the text before it is stored, indexed or sent to the LLM
+    try:
+        text, argument_info = prepare_argument(argument.argument)
+    except ArgumentTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Record the argument and switch turns; current_round is the round this argument belongs to
+    current_round = len(room.arguments[player_name]) + 1
+    repeat_of = argument_index.add_submission(text, room_key, player_name, current_round, room.topic)
+    record_event(room_key, "argument", player=player_name, argument=text, repeat_of=repeat_of)
+    round_complete = room.round_complete(current_round)
+
+    #Check if debate is complete (5 rounds): the verdict is computed by a task of its own
+    if room.debate_complete:
+        if stream:
+            events = asyncio.Queue()
+            task = start_final_scoring(room, events)
+            return StreamingResponse(stream_final_events(room, events, task), media_type="text/event-stream")
+        result = await asyncio.shield(start_final_scoring(room))
+        round_result = build_round_result(room, current_round, room.round_scores[current_round])
         return {
             "status": "completed", 
             "current_round": current_round,
+            "repeat_of": repeat_of,
+            "argument": argument_info,
             "round_result": round_result,
             "final_result": result
         }
 
+    if stream and round_complete:
+        return StreamingResponse(
+            stream_round_events(room, current_round),
+            media_type="text/event-stream"
+        )
+
+    round_result = None
+    if round_complete:
+        round_result = build_round_result(room, current_round, await score_live_round(room, current_round))
+
     return {
         "status": "in_progress",
         "current_round": current_round,
+        "repeat_of": repeat_of,
+        "argument": argument_info,
         "round_result": round_result,
-        "next_turn": room["current_turn"]
+        "next_turn": room.current_turn
     }
 
 @app.post("/abort-debate/{room_key}/{player_name}")
@@ -296,19 +627,30 @@ async def abort_debate(room_key: str, player_name: str):
     room = debate_rooms[room_key]
     
     # Check if player is part of this debate
-    if player_name != room["player1_name"] and player_name != room["player2_name"]:
+    if not room.has_player(player_name):
         raise HTTPException(status_code=403, detail="Player not in this debate")
     
     # Check if debate is in progress
-    if room["status"] != "in_progress":
+    if room.status != "in_progress":
         raise HTTPException(status_code=400, detail="Debate is not in progress")
     
-    # Apply penalty to the player who aborted
-    await player_service.apply_abort_penalty(player_name)
+    # Apply penalty to the player who aborted; the match record lets rating recomputes replay the abort
+    opponent = room.opponent_of(player_name)
+    await player_service.apply_abort_penalty(player_name, opponent)
+    write_buffer.put(f"abort_{room_key}.json", orjson.dumps(abort_record(room_key, player_name, opponent)))
     
     # Update room status
-    room["status"] = "aborted"
-    room["aborted_by"] = player_name
+    record_event(room_key, "aborted", player=player_name)
+
+    # In a tournament, aborting forfeits the match
+    if room_key in tournament_matches:
+        round_winners = [entry["round_winner"] for entry in room.round_scores.values()]
+        await finish_tournament_match(
+            room_key,
+            room.opponent_of(player_name),
+            [round_winners.count("Player 1"), round_winners.count("Player 2")],
+            forfeit=True
+        )
     
     return {
         "status": "aborted",
@@ -317,26 +659,160 @@ async def abort_debate(room_key: str, player_name: str):
     }
 
 
+# Encoded full room-status body per room, reused until the room's version changes
+room_status_cache: Dict[str, Tuple[int, bytes]] = {}
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
 # Get current room status
 @app.get("/room-status/{room_key}")
-async def get_room_status(room_key: str):
-    """Get the current status of a debate room"""
+async def get_room_status(room_key: str, request: Request,
+                          since: Optional[int] = Query(None, description="Only return events after this room version")):
+    """
+    Get the current status of a debate room. The response carries the room
+    version as its ETag; If-None-Match with the current one gets a 304, and
+    ?since=<version> returns just the events after that version.
+    """
     if room_key not in debate_rooms:
         raise HTTPException(status_code=404, detail="Room not found")
-    
-    
+
     room = debate_rooms[room_key]
-    # @souze - i dont know if this is logic is ok or not
-    # get all arguments in One Array in entry sequence {one by one , p1,p2}
-# [ {player:p1, arg:" "}, {player:p2, arg:""} ,{player:p1, arg:" "}, {player:p2, arg:""}]
-    all_arguments = []
-    for i in range(max(len(room["arguments"][room["player1_name"]]), len(room["arguments"].get(room["player2_name"], [])))):
-        if i < len(room["arguments"][room["player1_name"]]):
-            all_arguments.append({"player": room["player1_name"], "argument": room["arguments"][room["player1_name"]][i]})
-        if i < len(room["arguments"].get(room["player2_name"], [])):
-            all_arguments.append({"player": room["player2_name"], "argument": room["arguments"][room["player2_name"]][i]})
-    
-    return {"room": room, "all_arguments": all_arguments}
+    # Everything below runs without awaiting, so the body is one consistent snapshot of the room
+    headers = {"ETag": f'"{room.version}"', "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    events = room.events_since(since) if since is not None else None
+    if events is not None:
+        body = orjson.dumps({
+            "room_key": room_key,
+            "version": room.version,
+            "status": room.status,
+            "current_round": room.current_round,
+            "current_turn": room.current_turn,
+            "events": events
+        })
+        return Response(body, media_type="application/json", headers=headers)
+
+    cached = room_status_cache.get(room_key)
+    if cached is None or cached[0] != room.version:
+        # all arguments in entry sequence {one by one , p1,p2}, kept up to date by RoomState.submit
+        # [ {player:p1, arg:" "}, {player:p2, arg:""} ,{player:p1, arg:" "}, {player:p2, arg:""}]
+        cached = room_status_cache[room_key] = (room.version, orjson.dumps({
+            "room": room.to_dict(),
+            "all_arguments": room.turn_log,
+            "version": room.version
+        }))
+    return Response(cached[1], media_type="application/json", headers=headers)
+
+@app.get("/spectate/{room_key}")
+async def spectate_room(room_key: str):
+    """
+    Watch a room as server-sent events: a snapshot of the room, then every
+    transition (joined, argument, round_scored, final_result, completed/aborted)
+    """
+    if room_key not in debate_rooms:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    room = debate_rooms[room_key]
+    subscriber = spectators.subscribe(
+        room_key,
+        lambda: {"room": room.to_dict(), "all_arguments": room.turn_log},
+        finished=room.status in ("completed", "aborted")
+    )
+    return StreamingResponse(spectators.stream(room_key, subscriber), media_type="text/event-stream")
+
+def save_tournament(tournament: Tournament):
+    write_buffer.put(f"tournament_{tournament.tournament_id}.json", orjson.dumps(tournament.to_dict()))
+
+def start_tournament_round(tournament: Tournament):
+    """Open a room for every match of the next round, skipping rounds made up only of byes"""
+    while True:
+        matches = tournament.start_next_round()
+        if tournament.status == "completed":
+            return
+        if tournament.topic:
+            topic = tournament.topic
+        else:
+            topic = (topic_catalog.sample(tournament.genre, 1) or [random.choice(FALLBACK_TOPICS[tournament.genre])])[0]
+        tournament.round_topics.append(topic)
+
+        for match in matches:
+            room_key = generate_room_key()
+            record_event(room_key, "created", topic=topic, player=match.player1, created_at=datetime.now().isoformat())
+            record_event(room_key, "joined", player=match.player2)
+            match.room_key = room_key
+            match.status = "in_progress"
+            tournament_matches[room_key] = (tournament.tournament_id, match.match_id)
+
+        if not tournament.round_finished():
+            return
+
+async def finish_tournament_match(room_key: str, winner: Optional[str], rounds_won: list[int], forfeit: bool = False):
+    """Record a finished tournament room and start the next round once the current one is done"""
+    tournament_id, match_id = tournament_matches.pop(room_key)
+    tournament = tournaments[tournament_id]
+    tournament.record_result(tournament.match(match_id), winner, rounds_won, forfeit)
+    if tournament.round_finished():
+        start_tournament_round(tournament)
+    save_tournament(tournament)
+
+@app.post("/tournaments/create")
+async def create_tournament(request: TournamentCreate):
+    """Create a round-robin or single-elimination tournament and open the rooms of its first round"""
+    if request.format not in TOURNAMENT_FORMATS:
+        raise HTTPException(status_code=400, detail={"error": "Invalid format", "valid_formats": list(TOURNAMENT_FORMATS)})
+    genre = (request.genre or "").lower() or None
+    if not request.topic and genre not in VALID_GENRES:
+        raise HTTPException(status_code=400, detail={"error": "A topic or a valid genre is required", "valid_genres": VALID_GENRES})
+
+    players = await asyncio.gather(*(player_service.get_player(name) for name in request.players))
+    missing = [name for name, player in zip(request.players, players) if player is None]
+    if missing:
+        raise HTTPException(status_code=404, detail={"error": "Players not found", "players": missing})
+
+    try:
+        tournament = Tournament(generate_room_key(8), request.name, request.format, request.players,
+                                topic=request.topic and request.topic.strip(), genre=genre)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    tournaments[tournament.tournament_id] = tournament
+    start_tournament_round(tournament)
+    save_tournament(tournament)
+    return tournament.to_dict()
+
+@app.get("/tournaments/{tournament_id}")
+async def get_tournament(tournament_id: str):
+    """Schedule, room keys and results of a tournament"""
+    if tournament_id not in tournaments:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    tournament = tournaments[tournament_id]
+    return {**tournament.to_dict(), "champion": tournament.champion}
+
+@app.get("/tournaments/{tournament_id}/standings")
+async def get_tournament_standings(tournament_id: str):
+    """Tournament standings with each player's overall profile"""
+    if tournament_id not in tournaments:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    tournament = tournaments[tournament_id]
+
+    standings = tournament.ranked_standings()
+    players = await asyncio.gather(*(player_service.get_player(entry["player"]) for entry in standings))
+    for entry, player in zip(standings, players):
+        entry["total_score"] = player.total_score if player else None
+        entry["rating"] = player.rating if player else None
+    return {
+        "tournament_id": tournament_id,
+        "status": tournament.status,
+        "current_round": tournament.current_round,
+        "champion": tournament.champion,
+        "standings": standings
+    }
 
 if __name__ == "__main__":
     print("Starting FastAPI server...")
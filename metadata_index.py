@@ -0,0 +1,219 @@
+"""
+SQLite index of player profiles and debate summaries.
+
+MinIO stays the store of record for the full blobs (player_*.json,
+debate_*.json, archive segments); this database mirrors the fields that
+lookups need, so fetching a player, ranking players and listing a player's
+games are indexed queries instead of bucket listings.
+
+    players       one row per profile
+    debates       one row per finished debate, with the archive segment once compacted
+    player_games  (username, game_id) pairs, newest first per player
+
+The database runs in WAL mode, so readers never block the writer.
+
+    python metadata_index.py rebuild    # recreate it from the bucket
+"""
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from models import Player
+
+METADATA_DB_PATH = os.getenv("METADATA_DB_PATH", "tmp/metadata.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    username TEXT PRIMARY KEY,
+    total_score INTEGER NOT NULL,
+    games_played INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    rating REAL NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_rating ON players (rating DESC);
+
+CREATE TABLE IF NOT EXISTS debates (
+    game_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    player1 TEXT NOT NULL,
+    player2 TEXT NOT NULL,
+    winner TEXT NOT NULL,
+    player1_rounds INTEGER NOT NULL,
+    player2_rounds INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    segment TEXT
+);
+
+CREATE TABLE IF NOT EXISTS player_games (
+    username TEXT NOT NULL,
+    game_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (username, game_id)
+);
+CREATE INDEX IF NOT EXISTS player_games_recent ON player_games (username, timestamp DESC);
+"""
+
+PLAYER_COLUMNS = "username, total_score, games_played, wins, losses, rating, created_at"
+
+
+def _player_row(player: Player) -> tuple:
+    return (player.username, player.total_score, player.games_played, player.wins, player.losses,
+            player.rating, player.created_at.isoformat())
+
+
+def _row_player(row) -> Player:
+    username, total_score, games_played, wins, losses, rating, created_at = row
+    return Player(username=username, total_score=total_score, games_played=games_played, wins=wins,
+                  losses=losses, rating=rating, created_at=datetime.fromisoformat(created_at))
+
+
+class MetadataIndex:
+    def __init__(self, path: str = METADATA_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # Players
+
+    def upsert_players(self, players: Iterable[Player]):
+        rows = [_player_row(player) for player in players]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO players ({PLAYER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+
+    def upsert_player(self, player: Player):
+        self.upsert_players([player])
+
+    def get_player(self, username: str) -> Optional[Player]:
+        rows = self._execute(f"SELECT {PLAYER_COLUMNS} FROM players WHERE username = ?", (username,))
+        return _row_player(rows[0]) if rows else None
+
+    def all_players(self) -> List[Player]:
+        return [_row_player(row) for row in self._execute(f"SELECT {PLAYER_COLUMNS} FROM players")]
+
+    def ranked_players(self, limit: int = 100, offset: int = 0) -> List[Player]:
+        rows = self._execute(
+            f"SELECT {PLAYER_COLUMNS} FROM players ORDER BY rating DESC, username LIMIT ? OFFSET ?", (limit, offset))
+        return [_row_player(row) for row in rows]
+
+    def rank_of(self, username: str) -> Tuple[Optional[int], int]:
+        """(1-based rank by rating, number of players); rank is None for unknown players"""
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+            row = self._conn.execute("SELECT rating FROM players WHERE username = ?", (username,)).fetchone()
+            if row is None:
+                return None, total
+            # Same order as ranked_players: rating, then username
+            ahead = self._conn.execute(
+                "SELECT COUNT(*) FROM players WHERE rating > ? OR (rating = ? AND username < ?)",
+                (row[0], row[0], username)).fetchone()[0]
+        return ahead + 1, total
+
+    # Debates
+
+    def add_debates(self, debates: Iterable[Tuple[dict, Optional[str]]]):
+        """Index finished debates, each with the archive segment holding it (None while stored individually)"""
+        debate_rows, game_rows = [], []
+        for debate, segment in debates:
+            player1 = debate["players"]["player1"]
+            player2 = debate["players"]["player2"]
+            game_id = str(debate["game_id"])
+            timestamp = debate.get("timestamp", "")
+            debate_rows.append((game_id, debate["topic"], player1["name"], player2["name"], debate["winner"],
+                                player1["rounds_won"], player2["rounds_won"], timestamp, segment))
+            game_rows.append((player1["name"], game_id, timestamp))
+            game_rows.append((player2["name"], game_id, timestamp))
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO debates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", debate_rows)
+            self._conn.executemany("INSERT OR REPLACE INTO player_games VALUES (?, ?, ?)", game_rows)
+            self._conn.execute("COMMIT")
+
+    def add_debate(self, debate: dict, segment: Optional[str] = None):
+        self.add_debates([(debate, segment)])
+
+    def set_segment(self, game_ids: List[str], segment: str):
+        """Record that these debates were compacted into an archive segment"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("UPDATE debates SET segment = ? WHERE game_id = ?",
+                                   [(segment, str(game_id)) for game_id in game_ids])
+            self._conn.execute("COMMIT")
+
+    def has_debate(self, game_id: str) -> bool:
+        return bool(self._execute("SELECT 1 FROM debates WHERE game_id = ?", (game_id,)))
+
+    def player_games(self, username: str, limit: Optional[int] = None) -> List[Tuple[str, Optional[str]]]:
+        """(game_id, segment) of a player's debates, newest first"""
+        return self._execute(
+            "SELECT g.game_id, d.segment FROM player_games g JOIN debates d ON d.game_id = g.game_id "
+            "WHERE g.username = ? ORDER BY g.timestamp DESC LIMIT ?",
+            (username, -1 if limit is None else limit))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for table in ("players", "debates", "player_games"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute("COMMIT")
+
+    def is_empty(self) -> bool:
+        return not self._execute("SELECT 1 FROM players LIMIT 1")
+
+
+def rebuild(index: MetadataIndex, minio_client, bucket_name: str):
+    """Recreate the index from the player profiles and debates in the bucket"""
+    from history_store import HistoryStore
+    from player_service import PlayerService
+
+    started = time.perf_counter()
+    players = PlayerService(minio_client, bucket_name).load_all_players()
+    debates = list(HistoryStore(minio_client, bucket_name).debate_locations())
+
+    index.clear()
+    index.upsert_players(players)
+    index.add_debates(debates)
+    print(f"[INFO] Indexed {len(players)} players and {len(debates)} debates in "
+          f"{time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+    from minio import Minio
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Player/debate metadata index maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--path", default=METADATA_DB_PATH)
+    args = parser.parse_args()
+
+    client = Minio(
+        os.getenv("MINIO_ENDPOINT", "localhost:9000"),
+        access_key=os.getenv("MINIO_ACCESS_KEY"),
+        secret_key=os.getenv("MINIO_SECRET_KEY"),
+        secure=False
+    )
+    rebuild(MetadataIndex(args.path), client, "debate-history")
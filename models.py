@@ -1,7 +1,8 @@
 # models.py
-from pydantic import BaseModel
-from typing import Optional, List, Dict
+from pydantic import BaseModel, Field
+from typing import Optional, List
 from datetime import datetime
+from argument_text import ARGUMENT_MAX_RAW_CHARS
 
 
 class Player(BaseModel):
@@ -10,7 +11,8 @@ class Player(BaseModel):
     games_played: int = 0
     wins: int = 0
     losses: int = 0
-    created_at: datetime = datetime.now()
+    created_at: datetime = Field(default_factory=datetime.now)
+    rating: float = 1500.0
 
     class Config:
         json_encoders = {
@@ -18,19 +20,6 @@ class Player(BaseModel):
         }
 
 
-class Room(BaseModel):
-    room_key: str
-    topic: str
-    player1_name: str
-    player2_name: Optional[str] = None
-    current_round: int = 1
-    status: str = "waiting"  # waiting, pending_acceptance, in_progress, completed
-    arguments: Dict[str, List[str]] = {}
-    current_turn: Optional[str] = None
-    created_at: datetime = datetime.now()
-    invitation_accepted: bool = False
-
-
 class JoinRoom(BaseModel):
     player_name: str
 
@@ -39,4 +28,13 @@ class TopicResponse(BaseModel):
     topics: List[str]
 
 class Argument(BaseModel):
-    argument: str
+    # Normalized and held to the real limits by argument_text.prepare_argument
+    argument: str = Field(..., max_length=ARGUMENT_MAX_RAW_CHARS)
+
+
+class TournamentCreate(BaseModel):
+    name: str
+    format: str = "round_robin"  # round_robin, bracket
+    players: List[str]
+    topic: Optional[str] = None
+    genre: Optional[str] = None
@@ -1,29 +1,56 @@
-import json
-from typing import Optional, List
+import asyncio
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple
 from models import Player
+from player_codec import encode_player, decode_player, player_to_record, record_to_player
+from rating_engine import elo_update
+from metadata_index import MetadataIndex
+from write_buffer import WriteBehindBuffer
+from profiling import timed
 from minio import Minio
 from fastapi import HTTPException
 from io import BytesIO
 
+# Consolidated copy of every player profile, refreshed incrementally by get_all_players
+PLAYER_SNAPSHOT_OBJECT = "snapshot_players.json"
+
 
 class PlayerService:
-    def __init__(self, minio_client: Minio, bucket_name: str):
+    def __init__(self, minio_client: Minio, bucket_name: str, max_workers: int = 16, use_snapshot: bool = True,
+                 index: Optional[MetadataIndex] = None, writer: Optional[WriteBehindBuffer] = None):
         self.minio_client = minio_client
         self.bucket_name = bucket_name
-
+        self.max_workers = max_workers
+        self.use_snapshot = use_snapshot
+        # With a metadata index, lookups and rankings are served from it; every save updates it
+        self.index = index
+        # With a write-behind buffer, saves are batched and coalesced instead of written immediately
+        self.writer = writer
+
+    @timed("PlayerService.get_player")
     async def get_player(self, username: str) -> Optional[Player]:
         """Get a player by username"""
+        if self.index is not None:
+            player = self.index.get_player(username)
+            if player is not None:
+                return player
         try:
-            response = self.minio_client.get_object(
-                self.bucket_name,
-                f"player_{username}.json"
-            )
-            data = response.read()  # Properly read the MinIO response
-            player_data = json.loads(data.decode('utf-8'))
-            return Player(**player_data)
-        except Exception as e:
+            data = self.writer.get(f"player_{username}.json") if self.writer is not None else None
+            if data is None:
+                response = self.minio_client.get_object(
+                    self.bucket_name,
+                    f"player_{username}.json"
+                )
+                data = response.read()  # Properly read the MinIO response
+            player = decode_player(data)
+        except Exception:
             return None
+        if self.index is not None:
+            self.index.upsert_player(player)
+        return player
 
+    @timed("PlayerService.create_player")
     async def create_player(self, username: str) -> Player:
         """Create a new player"""
         if await self.get_player(username):
@@ -34,18 +61,28 @@ class PlayerService:
         await self.save_player(player)
         return player
 
+    @timed("PlayerService.save_player")
     async def save_player(self, player: Player):
         """Save player data to MinIO"""
-        player_data = player.model_dump_json().encode('utf-8')
-        self.minio_client.put_object(
-            self.bucket_name,
-            f"player_{player.username}.json",
-            BytesIO(player_data),  # Wrap in BytesIO
-            length=len(player_data)
-        )
-
-    async def apply_abort_penalty(self, username: str) -> Player:
-        """Apply a -30 penalty to a player's score for aborting a debate"""
+        player_data = encode_player(player)
+        if self.writer is not None:
+            self.writer.put(f"player_{player.username}.json", player_data)
+        else:
+            self.minio_client.put_object(
+                self.bucket_name,
+                f"player_{player.username}.json",
+                BytesIO(player_data),  # Wrap in BytesIO
+                length=len(player_data)
+            )
+        if self.index is not None:
+            self.index.upsert_player(player)
+
+    @timed("PlayerService.apply_abort_penalty")
+    async def apply_abort_penalty(self, username: str, opponent: Optional[str] = None) -> Player:
+        """
+        Apply a -30 penalty to a player's score for aborting a debate. With an
+        opponent, the abort also counts as a rating loss to them.
+        """
         player = await self.get_player(username)
         if not player:
             raise HTTPException(status_code=404, detail="Player not found")
@@ -54,11 +91,17 @@ class PlayerService:
         player.total_score = max(0, player.total_score - 30)  # Prevent negative scores
         player.games_played += 1
 
+        opponent_profile = await self.get_player(opponent) if opponent else None
+        if opponent_profile:
+            opponent_profile.rating, player.rating = elo_update(opponent_profile.rating, player.rating, 1.0)
+            await self.save_player(opponent_profile)
+
         # Save the updated player data
         await self.save_player(player)
 
         return player
 
+    @timed("PlayerService.update_scores")
     async def update_scores(self, winner: str, loser: str, winner_score: int, loser_score: int):
         """Update player scores after a debate"""
         winner_profile = await self.get_player(winner)
@@ -77,12 +120,52 @@ class PlayerService:
         loser_profile.losses += 1
         loser_profile.games_played += 1
 
+        winner_profile.rating, loser_profile.rating = elo_update(winner_profile.rating, loser_profile.rating, 1.0)
+
         await self.save_player(winner_profile)
         await self.save_player(loser_profile)
 
+    @timed("PlayerService.record_draw")
+    async def record_draw(self, player1: str, player2: str):
+        """Update both players after a tied debate (no score change, ratings move towards each other)"""
+        profiles = [await self.get_player(username) for username in (player1, player2)]
+        if not all(profiles):
+            raise HTTPException(status_code=404, detail="Player not found")
+
+        profiles[0].rating, profiles[1].rating = elo_update(profiles[0].rating, profiles[1].rating, 0.5)
+        for profile in profiles:
+            profile.games_played += 1
+            await self.save_player(profile)
+
+    @timed("PlayerService.get_all_players")
     async def get_all_players(self) -> List[Player]:
         """Get all players for ranking"""
-        players = []
+        if self.index is not None and not self.index.is_empty():
+            return await asyncio.to_thread(self.index.all_players)
+        return await asyncio.to_thread(self.load_all_players)
+
+    @timed("PlayerService.rank")
+    async def rank(self, username: str) -> Tuple[Optional[int], int]:
+        """(1-based rank by rating, number of players)"""
+        if self.index is not None and not self.index.is_empty():
+            return self.index.rank_of(username)
+        ranked = sorted(await self.get_all_players(), key=lambda p: (-p.rating, p.username))
+        rank = next((i + 1 for i, p in enumerate(ranked) if p.username == username), None)
+        return rank, len(ranked)
+
+    def load_all_players(self) -> List[Player]:
+        """
+        Bulk-load every player. Profiles are fetched concurrently with a bounded
+        worker pool; with the snapshot enabled only profiles modified since the
+        last snapshot are fetched, and the snapshot is rewritten if anything changed.
+        """
+        snapshot = self._read_snapshot() if self.use_snapshot else None
+        known: Dict[str, list] = snapshot["players"] if snapshot else {}
+        watermark = snapshot["watermark"] if snapshot else None
+
+        listed = []
+        stale = []
+        newest = watermark
         try:
             # List all objects in the bucket with player_ prefix
             objects = self.minio_client.list_objects(
@@ -90,20 +173,62 @@ class PlayerService:
                 prefix="player_", 
                 recursive=True
             )
-            
             for obj in objects:
-                try:
-                    response = self.minio_client.get_object(
-                        self.bucket_name, 
-                        obj.object_name
-                    )
-                    data = response.read()
-                    player_data = json.loads(data.decode('utf-8'))
-                    players.append(Player(**player_data))
-                except Exception as e:
-                    print(f"Error loading player data: {e}")
-                    continue
+                listed.append(obj.object_name)
+                modified = obj.last_modified.isoformat() if obj.last_modified else None
+                # >= so that writes landing in the same instant as the watermark are re-read
+                if modified is None or watermark is None or modified >= watermark or obj.object_name not in known:
+                    stale.append(obj.object_name)
+                if modified and (newest is None or modified > newest):
+                    newest = modified
         except Exception as e:
             print(f"Error listing players: {e}")
-        
-        return players
\ No newline at end of file
+            return [record_to_player(record) for record in known.values()]
+
+        fetched = self._fetch_players(stale)
+        players = {name: known[name] for name in listed if name in known}
+        players.update(fetched)
+
+        if self.use_snapshot and (fetched or len(players) != len(known)):
+            self._write_snapshot({"watermark": newest, "players": players})
+
+        return [record_to_player(record) for record in players.values()]
+
+    def _fetch_player_record(self, object_name: str) -> Optional[list]:
+        try:
+            response = self.minio_client.get_object(
+                self.bucket_name, 
+                object_name
+            )
+            return player_to_record(decode_player(response.read()))
+        except Exception as e:
+            print(f"Error loading player data: {e}")
+            return None
+
+    def _fetch_players(self, object_names: List[str]) -> Dict[str, list]:
+        """Fetch player objects concurrently, keyed by object name"""
+        if not object_names:
+            return {}
+        workers = min(self.max_workers, len(object_names))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="player-load") as pool:
+            results = pool.map(self._fetch_player_record, object_names)
+            return {name: data for name, data in zip(object_names, results) if data is not None}
+
+    def _read_snapshot(self) -> Optional[dict]:
+        try:
+            response = self.minio_client.get_object(self.bucket_name, PLAYER_SNAPSHOT_OBJECT)
+            return orjson.loads(response.read())
+        except Exception:
+            return None
+
+    def _write_snapshot(self, snapshot: dict):
+        try:
+            data = orjson.dumps(snapshot)
+            self.minio_client.put_object(
+                self.bucket_name,
+                PLAYER_SNAPSHOT_OBJECT,
+                BytesIO(data),
+                length=len(data)
+            )
+        except Exception as e:
+            print(f"Error writing player snapshot: {e}")
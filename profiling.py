@@ -0,0 +1,210 @@
+"""
+Opt-in profiling for production traffic, written as folded stacks
+("frame;frame;frame value" per line) that flamegraph.pl, speedscope or
+inferno read directly.
+
+* PROFILE_SAMPLE_RATE > 0 profiles that fraction of requests: while a sampled
+  request runs, a background thread samples the Python stacks of every thread
+  that is inside this project's code (event loop and thread pool alike).
+* PROFILE_SPANS=1 times the spans marked with span()/timed() (scoring, result
+  storage, player reads/writes), nested under the sampled request if any.
+  Values are self-time in microseconds.
+
+Dumps go to PROFILE_DIR every PROFILE_DUMP_SECONDS and on shutdown:
+stacks-<pid>-<time>.folded and spans-<pid>-<time>.folded.
+"""
+import os
+import sys
+import atexit
+import time
+import random
+import asyncio
+import threading
+import functools
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SPANS = os.getenv("PROFILE_SPANS", "0") == "1"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "tmp/profiles")
+PROFILE_DUMP_SECONDS = float(os.getenv("PROFILE_DUMP_SECONDS", "60"))
+
+# Only stacks passing through files in this directory are kept; idle pool threads and the bare event loop are not
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Open spans of the current task/thread: (name, [child microseconds]) pairs, outermost first
+_span_stack: ContextVar[Tuple] = ContextVar("profile_spans", default=())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """Collects sampled stacks and span timings, and dumps them as folded stacks"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, directory: str = PROFILE_DIR,
+                 dump_seconds: float = PROFILE_DUMP_SECONDS):
+        self.interval = interval
+        self.directory = directory
+        self.dump_seconds = dump_seconds
+        self.stacks = Counter()
+        self.spans = Counter()
+        self.sampled_requests = 0
+        self._active = Counter()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        next_dump = time.monotonic() + self.dump_seconds
+        while not self._closed:
+            if self._active:
+                self._sample()
+                time.sleep(self.interval)
+            else:
+                self._wake.wait(1.0)
+                self._wake.clear()
+            if time.monotonic() >= next_dump:
+                self.dump()
+                next_dump = time.monotonic() + self.dump_seconds
+
+    def _sample(self):
+        with self._lock:
+            labels = list(self._active)
+        # Stacks can't be told apart between concurrent sampled requests; label them jointly
+        root = labels[0] if len(labels) == 1 else f"{len(labels)} concurrent requests"
+        own = threading.get_ident()
+        samples = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            in_project = False
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                filename = frame.f_code.co_filename
+                in_project = in_project or (filename.startswith(PROJECT_DIR) and "site-packages" not in filename)
+                frame = frame.f_back
+            if in_project:
+                samples.append(";".join([root, *reversed(stack)]))
+        with self._lock:
+            self.stacks.update(samples)
+
+    @contextmanager
+    def request(self, label: str):
+        """Sample stacks while the enclosed request runs"""
+        with self._lock:
+            self._active[label] += 1
+            self.sampled_requests += 1
+        self._start()
+        self._wake.set()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active[label] -= 1
+                if not self._active[label]:
+                    del self._active[label]
+
+    def add_span(self, path: str, microseconds: int):
+        with self._lock:
+            self.spans[path] += microseconds
+        # The sampler thread also does the periodic dumps
+        self._start()
+
+    def dump(self) -> Optional[str]:
+        """Write and reset what was collected; returns the file name stem, None if there was nothing"""
+        with self._lock:
+            stacks, self.stacks = self.stacks, Counter()
+            spans, self.spans = self.spans, Counter()
+        if not stacks and not spans:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        stem = f"{os.getpid()}-{int(time.time())}"
+        for kind, counts in (("stacks", stacks), ("spans", spans)):
+            if counts:
+                path = os.path.join(self.directory, f"{kind}-{stem}.folded")
+                with open(path, "a") as file:
+                    file.writelines(f"{stack} {value}\n" for stack, value in counts.most_common())
+        print(f"[INFO] Profile written to {self.directory}: {sum(stacks.values())} stack samples, "
+              f"{len(spans)} span paths")
+        return stem
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.dump()
+
+
+profiler = Profiler()
+# Command-line jobs (rescore.py, ...) never call close(); keep their spans too
+atexit.register(profiler.dump)
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block (no-op unless PROFILE_SPANS=1)"""
+    if not PROFILE_SPANS:
+        yield
+        return
+    children = [0]
+    parents = _span_stack.get()
+    token = _span_stack.set(parents + ((name, children),))
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = int((time.perf_counter() - started) * 1_000_000)
+        _span_stack.reset(token)
+        if parents:
+            parents[-1][1][0] += elapsed
+        path = ";".join([parent_name for parent_name, _ in parents] + [name])
+        profiler.add_span(path, max(elapsed - children[0], 0))
+
+
+def timed(name: str):
+    """Decorator form of span(), for plain and async functions"""
+    def decorate(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles a random PROFILE_SAMPLE_RATE share of HTTP requests"""
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+        # Route by its first path segment; room keys and player names would make every label unique
+        label = f"{scope['method']} /{scope['path'].strip('/').split('/')[0]}"
+        with profiler.request(label), span(label):
+            await self.app(scope, receive, send)
@@ -0,0 +1,186 @@
+"""
+Elo ratings for players.
+
+A debate counts as a win (1), loss (0) or draw (0.5) for each side; rounds
+won only decide the winner, not the size of the change. Ratings move by
+ELO_K * (actual - expected) after every completed debate (see
+PlayerService), and an abort counts as a loss to the opponent. Each abort is
+stored as an abort_{room_key}.json match record, so a recompute replays
+aborts along with the debates.
+
+batch_ratings recomputes every rating from a match list. Matches are grouped
+into waves in which no player appears twice, while each player's matches stay
+in chronological order, and each wave is applied as one set of NumPy
+operations, which gives the same result as replaying the matches one by one.
+
+    python rating_engine.py recompute [--apply]   # from the debate archive
+    python rating_engine.py bench --matches 1000000 --players 50000
+"""
+import os
+import time
+import argparse
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+INITIAL_RATING = float(os.getenv("ELO_INITIAL_RATING", "1500"))
+ELO_K = float(os.getenv("ELO_K", "32"))
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def elo_update(rating_a: float, rating_b: float, score_a: float) -> Tuple[float, float]:
+    """New ratings of A and B after a match; score_a is 1 for a win of A, 0.5 for a draw, 0 for a loss"""
+    change = ELO_K * (score_a - expected_score(rating_a, rating_b))
+    return rating_a + change, rating_b - change
+
+
+def match_waves(player_a: np.ndarray, player_b: np.ndarray, n_players: int) -> np.ndarray:
+    """
+    Wave number of each match (matches in chronological order): one after the
+    latest wave either player already appears in
+    """
+    last_wave = [-1] * n_players
+    waves = np.empty(len(player_a), dtype=np.int64)
+    for i, (a, b) in enumerate(zip(player_a.tolist(), player_b.tolist())):
+        wave = max(last_wave[a], last_wave[b]) + 1
+        last_wave[a] = last_wave[b] = wave
+        waves[i] = wave
+    return waves
+
+
+def batch_ratings(player_a: np.ndarray, player_b: np.ndarray, score_a: np.ndarray, n_players: int) -> np.ndarray:
+    """Ratings after replaying every match, as a float64 array indexed by player id"""
+    ratings = np.full(n_players, INITIAL_RATING, dtype=np.float64)
+    if len(player_a) == 0:
+        return ratings
+
+    waves = match_waves(player_a, player_b, n_players)
+    order = np.argsort(waves, kind="stable")
+    boundaries = np.flatnonzero(np.diff(waves[order])) + 1
+    for index in np.split(order, boundaries):
+        a, b = player_a[index], player_b[index]
+        change = ELO_K * (score_a[index] - 1.0 / (1.0 + 10.0 ** ((ratings[b] - ratings[a]) / 400.0)))
+        # No player appears twice within a wave, so plain fancy-index updates are safe
+        ratings[a] += change
+        ratings[b] -= change
+    return ratings
+
+
+def abort_record(room_key: str, aborted_by: str, opponent: str) -> dict:
+    """Match record of an abort: read by matches_from_debates as a debate the opponent won"""
+    return {
+        "game_id": room_key,
+        "players": {"player1": {"name": aborted_by}, "player2": {"name": opponent}},
+        "winner": opponent,
+        "aborted_by": aborted_by,
+        "timestamp": str(datetime.utcnow()),
+    }
+
+
+def stored_aborts(minio_client, bucket_name: str):
+    """Every abort match record in the bucket"""
+    import orjson
+
+    for obj in minio_client.list_objects(bucket_name, prefix="abort_", recursive=True):
+        try:
+            yield orjson.loads(minio_client.get_object(bucket_name, obj.object_name).read())
+        except Exception as e:
+            print(f"[WARN] Skipping abort record {obj.object_name}: {e}")
+
+
+def matches_from_debates(debates: Sequence[dict]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Player names and (player_a, player_b, score_a) arrays of stored debates and abort records, oldest first"""
+    debates = sorted(debates, key=lambda d: d.get("timestamp", ""))
+    ids: Dict[str, int] = {}
+    player_a = np.empty(len(debates), dtype=np.int64)
+    player_b = np.empty(len(debates), dtype=np.int64)
+    score_a = np.empty(len(debates), dtype=np.float64)
+    for i, debate in enumerate(debates):
+        name_a = debate["players"]["player1"]["name"]
+        name_b = debate["players"]["player2"]["name"]
+        player_a[i] = ids.setdefault(name_a, len(ids))
+        player_b[i] = ids.setdefault(name_b, len(ids))
+        score_a[i] = 0.5 if debate["winner"] == "Tie" else 1.0 if debate["winner"] == name_a else 0.0
+    return list(ids), player_a, player_b, score_a
+
+
+def recompute(apply: bool = False):
+    import asyncio
+    from dotenv import load_dotenv
+    from minio import Minio
+    from history_store import HistoryStore
+    from player_service import PlayerService
+    from metadata_index import MetadataIndex
+
+    load_dotenv()
+    client = Minio(
+        os.getenv("MINIO_ENDPOINT", "localhost:9000"),
+        access_key=os.getenv("MINIO_ACCESS_KEY"),
+        secret_key=os.getenv("MINIO_SECRET_KEY"),
+        secure=False
+    )
+    bucket = "debate-history"
+
+    debates = list(HistoryStore(client, bucket).all_debates())
+    aborts = list(stored_aborts(client, bucket))
+    started = time.perf_counter()
+    names, player_a, player_b, score_a = matches_from_debates(debates + aborts)
+    ratings = batch_ratings(player_a, player_b, score_a, len(names))
+    print(f"[INFO] Rated {len(debates)} debates and {len(aborts)} aborts between {len(names)} players "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    for name, rating in sorted(zip(names, ratings.tolist()), key=lambda item: -item[1])[:10]:
+        print(f"{rating:9.1f}  {name}")
+
+    if apply:
+        async def save_ratings():
+            player_service = PlayerService(client, bucket, index=MetadataIndex())
+            new_ratings = dict(zip(names, ratings.tolist()))
+            for player in await player_service.get_all_players():
+                player.rating = new_ratings.get(player.username, INITIAL_RATING)
+                await player_service.save_player(player)
+
+        asyncio.run(save_ratings())
+        print("[INFO] Player ratings updated")
+
+
+def bench(n_matches: int, n_players: int):
+    rng = np.random.default_rng(0)
+    player_a = rng.integers(0, n_players, n_matches)
+    player_b = (player_a + rng.integers(1, n_players, n_matches)) % n_players
+    score_a = rng.choice([0.0, 0.5, 1.0], n_matches)
+
+    started = time.perf_counter()
+    ratings = batch_ratings(player_a, player_b, score_a, n_players)
+    batch_seconds = time.perf_counter() - started
+
+    # Sequential replay of a prefix, to check and compare against
+    prefix = min(n_matches, 200000)
+    check = np.full(n_players, INITIAL_RATING)
+    started = time.perf_counter()
+    for a, b, s in zip(player_a[:prefix].tolist(), player_b[:prefix].tolist(), score_a[:prefix].tolist()):
+        check[a], check[b] = elo_update(check[a], check[b], s)
+    loop_seconds = (time.perf_counter() - started) * n_matches / prefix
+    if prefix == n_matches:
+        assert np.allclose(ratings, check)
+
+    print(f"{n_matches} matches, {n_players} players: batch {batch_seconds:.2f}s, "
+          f"sequential loop ~{loop_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Player rating maintenance")
+    parser.add_argument("command", choices=["recompute", "bench"])
+    parser.add_argument("--apply", action="store_true", help="write recomputed ratings to player profiles")
+    parser.add_argument("--matches", type=int, default=1000000)
+    parser.add_argument("--players", type=int, default=50000)
+    args = parser.parse_args()
+
+    if args.command == "recompute":
+        recompute(args.apply)
+    else:
+        bench(args.matches, args.players)
@@ -0,0 +1,267 @@
+import os
+import json
+import asyncio
+import argparse
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import orjson
+from dotenv import load_dotenv
+from minio import Minio
+
+from ai_engine import (score_argument_turn, score_cache_key, score_debate, round_outcome, build_debate_data,
+                       ScoringError)
+from player_service import PlayerService
+from metadata_index import MetadataIndex
+from result_codec import encode_result
+from llm_scheduler import llm_priority
+from history_store import HistoryStore
+
+# Load environment variables
+load_dotenv()
+
+MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "localhost:9000")
+MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
+MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY")
+MINIO_BUCKET = "debate-history"
+
+
+class ScoreCache:
+    """Argument scores keyed by score_cache_key, persisted as an append-only JSON-lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.scores = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                for line in file:
+                    try:
+                        key, scores = orjson.loads(line)
+                        self.scores[key] = scores
+                    except orjson.JSONDecodeError:
+                        continue
+        self._file = open(path, "ab")
+
+    def llm_scores(self, argument, topic, turn_number) -> dict:
+        """Scores of one argument, from the cache or else from Gemini"""
+        key = score_cache_key(argument, topic, turn_number)
+        cached = self.scores.get(key)
+        if cached is not None:
+            return cached
+
+        # Re-scoring is batch work: it yields LLM slots to anything more urgent in this process only;
+        # the API's live scoring runs elsewhere, so --workers is what keeps this job from crowding it out.
+        # Failures raise, so fallback scores are never cached or checkpointed as real ones.
+        with llm_priority("batch"):
+            scores = score_argument_turn(argument, topic, turn_number, raise_on_error=True)
+        with self._lock:
+            self.scores[key] = scores
+            self._file.write(orjson.dumps([key, scores]) + b"\n")
+            self._file.flush()
+        return scores
+
+    def close(self):
+        self._file.close()
+
+
+class Checkpoint:
+    """
+    Finished objects and their old/new outcomes, one JSON line each. Lets a run
+    resume where it stopped and recompute player totals without re-reading results.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                for line in file:
+                    try:
+                        entry = orjson.loads(line)
+                        self.done[checkpoint_key(entry)] = entry
+                    except orjson.JSONDecodeError:
+                        continue
+        self._file = open(path, "ab")
+
+    def record(self, entry: dict):
+        with self._lock:
+            self.done[checkpoint_key(entry)] = entry
+            self._file.write(orjson.dumps(entry) + b"\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def checkpoint_key(entry: dict) -> str:
+    """Game id of a checkpoint entry; older checkpoints recorded the debate_<id>.json object name"""
+    if "game_id" in entry:
+        return str(entry["game_id"])
+    return entry["object"][len("debate_"):-len(".json")]
+
+
+def outcome(debate: dict) -> dict:
+    """Winner and per-player rounds won of a stored debate"""
+    players = debate["players"]
+    return {
+        "winner": debate["winner"],
+        "player1": players["player1"]["name"],
+        "player2": players["player2"]["name"],
+        "rounds": [players["player1"]["rounds_won"], players["player2"]["rounds_won"]]
+    }
+
+
+def rescore_debate(debate: dict, cache: ScoreCache) -> dict:
+    """Score a stored debate again with the current prompt/model"""
+    topic = debate["topic"]
+    player1 = debate["players"]["player1"]
+    player2 = debate["players"]["player2"]
+
+    scored_rounds = {}
+    for index, (p1_arg, p2_arg) in enumerate(zip(player1["arguments"], player2["arguments"])):
+        round_number = index + 1
+        scored_rounds[round_number] = round_outcome(
+            round_number,
+            dict(cache.llm_scores(p1_arg, topic, round_number)),
+            dict(cache.llm_scores(p2_arg, topic, round_number))
+        )
+
+    scoring_results = score_debate(player1["arguments"], player2["arguments"], topic, scored_rounds)
+    result = build_debate_data(topic, player1["name"], player1["arguments"],
+                               player2["name"], player2["arguments"], debate["game_id"], scoring_results)
+    result["original_timestamp"] = debate.get("timestamp")
+    return result
+
+
+def player_deltas(entries) -> dict:
+    """
+    Change in total_score/wins/losses per player implied by the re-scored outcomes,
+    using the same rules as PlayerService.update_scores
+    """
+    deltas = {}
+
+    def contribution(result: dict) -> dict:
+        if result["winner"] == "Tie":
+            return {}
+        diff = abs(result["rounds"][0] - result["rounds"][1])
+        loser = result["player2"] if result["winner"] == result["player1"] else result["player1"]
+        return {
+            result["winner"]: {"total_score": diff, "wins": 1, "losses": 0},
+            loser: {"total_score": -diff, "wins": 0, "losses": 1},
+        }
+
+    for entry in entries:
+        for sign, result in ((-1, entry["old"]), (1, entry["new"])):
+            for username, change in contribution(result).items():
+                delta = deltas.setdefault(username, {"total_score": 0, "wins": 0, "losses": 0})
+                for field, value in change.items():
+                    delta[field] += sign * value
+
+    return {username: delta for username, delta in deltas.items() if any(delta.values())}
+
+
+async def apply_player_deltas(player_service: PlayerService, deltas: dict):
+    for username, delta in deltas.items():
+        player = await player_service.get_player(username)
+        if not player:
+            print(f"[WARN] Player {username} not found, skipping")
+            continue
+        player.total_score += delta["total_score"]
+        player.wins += delta["wins"]
+        player.losses += delta["losses"]
+        await player_service.save_player(player)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score archived debates with the current scoring prompt/model")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="debates scored concurrently (each adds Gemini load next to the live API)")
+    parser.add_argument("--output-prefix", default="rescored/", help="object prefix for re-scored results")
+    parser.add_argument("--checkpoint", default="tmp/rescore_checkpoint.jsonl")
+    parser.add_argument("--cache", default="tmp/rescore_cache.jsonl")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many debates")
+    parser.add_argument("--apply-players", action="store_true",
+                        help="apply the score changes to player profiles once every debate is re-scored")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.checkpoint) or ".", exist_ok=True)
+    os.makedirs(os.path.dirname(args.cache) or ".", exist_ok=True)
+
+    minio_client = Minio(
+        MINIO_ENDPOINT,
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET_KEY,
+        secure=False
+    )
+    cache = ScoreCache(args.cache)
+    checkpoint = Checkpoint(args.checkpoint)
+
+    def process(debate: dict):
+        game_id = str(debate["game_id"])
+        try:
+            result = rescore_debate(debate, cache)
+        except ScoringError as e:
+            raise ScoringError(f"Debate {game_id}: {e}") from e
+
+        data = encode_result(result)
+        minio_client.put_object(
+            MINIO_BUCKET,
+            f"{args.output_prefix}debate_{game_id}.json",
+            BytesIO(data),
+            length=len(data)
+        )
+        checkpoint.record({"game_id": game_id, "old": outcome(debate), "new": outcome(result)})
+
+    submitted = 0
+    failed = 0
+    already_done = len(checkpoint.done)
+
+    def collect(finished) -> int:
+        if finished.exception() is not None:
+            print(f"[ERROR] {finished.exception()}")
+            return 1
+        return 0
+
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="rescore") as pool:
+        pending = set()
+        # Stream every stored debate, debate_* objects and archive segments alike;
+        # keep only a bounded number of debates in flight
+        for debate in HistoryStore(minio_client, MINIO_BUCKET).all_debates():
+            if str(debate["game_id"]) in checkpoint.done:
+                continue
+            if args.limit is not None and submitted >= args.limit:
+                break
+            pending.add(pool.submit(process, debate))
+            submitted += 1
+            if len(pending) >= args.workers * 4:
+                finished = next(as_completed(pending))
+                pending.remove(finished)
+                failed += collect(finished)
+        for finished in as_completed(pending):
+            failed += collect(finished)
+
+    cache.close()
+    checkpoint.close()
+    print(f"[INFO] Re-scored {submitted - failed} debates ({failed} failed, {already_done} already done)")
+
+    deltas = player_deltas(checkpoint.done.values())
+    print(f"[INFO] {len(deltas)} players have changed totals")
+    if args.apply_players:
+        applied_marker = f"{args.checkpoint}.applied"
+        if failed or args.limit is not None:
+            print("[WARN] Run incomplete, not applying player totals")
+        elif os.path.exists(applied_marker):
+            print(f"[WARN] Player totals from this checkpoint were already applied ({applied_marker})")
+        else:
+            asyncio.run(apply_player_deltas(PlayerService(minio_client, MINIO_BUCKET, index=MetadataIndex()), deltas))
+            open(applied_marker, "w").close()
+            print("[INFO] Player totals updated")
+    else:
+        print(json.dumps(deltas, indent=2))
+
+
+if __name__ == "__main__":
+    main()
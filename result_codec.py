@@ -0,0 +1,63 @@
+"""
+Storage formats for debate results.
+
+New results are written as compact JSON (no indentation); RESULT_COMPRESSION
+wraps it in gzip or zstd (none by default). zstd needs the optional
+`zstandard` package; without it results fall back to gzip.
+
+Reads never depend on the settings: compression is detected from the leading
+bytes, so objects written with any setting (and the original indented JSON)
+stay readable after the configuration changes.
+"""
+import os
+import gzip
+from typing import Optional
+
+import orjson
+
+RESULT_COMPRESSION = os.getenv("RESULT_COMPRESSION", "none").lower()
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_zstd = None
+
+
+def _zstd_module():
+    """The zstandard module, imported on first use; None when it isn't installed"""
+    global _zstd
+    if _zstd is None:
+        try:
+            import zstandard
+            _zstd = zstandard
+        except ImportError:
+            _zstd = False
+    return _zstd or None
+
+
+def encode_result(result: dict, compression: Optional[str] = None) -> bytes:
+    """Serialize a debate result as compact JSON with the configured (or given) compression"""
+    compression = compression or RESULT_COMPRESSION
+    data = orjson.dumps(result)
+
+    if compression == "zstd":
+        zstd = _zstd_module()
+        if zstd is not None:
+            return zstd.ZstdCompressor(level=3).compress(data)
+        compression = "gzip"
+    if compression == "gzip":
+        # mtime=0 keeps the output deterministic
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    return data
+
+
+def decode_result(data: bytes) -> dict:
+    """Deserialize a stored debate result, whichever compression it was written with"""
+    if data.startswith(GZIP_MAGIC):
+        data = gzip.decompress(data)
+    elif data.startswith(ZSTD_MAGIC):
+        zstd = _zstd_module()
+        if zstd is None:
+            raise ValueError("Debate result is zstd-compressed but zstandard is not installed")
+        data = zstd.ZstdDecompressor().decompress(data)
+    return orjson.loads(data)
@@ -0,0 +1,188 @@
+from datetime import datetime
+from typing import Optional, List, Dict
+
+MAX_ROUNDS = 5
+FINISHED_STATUSES = ("completed", "aborted")
+
+
+class RoomState:
+    """
+    In-memory state of one debate room.
+
+    Arguments are kept in an ordered turn log (the interleaved p1/p2 list the
+    room-status endpoint returns) plus per-player lists, both appended to in
+    place, and each scored round is cached so the final verdict doesn't have to
+    score it again. Every handler works on this object instead of a loose dict.
+
+    version starts at 1 when the room is created and goes up by one with every
+    applied event; events keeps those transitions so pollers can fetch only
+    what changed since the version they last saw. Snapshots leave events out,
+    so a restored room only has the ones applied since.
+    """
+
+    __slots__ = (
+        "room_key",
+        "topic",
+        "player1_name",
+        "player2_name",
+        "status",
+        "current_turn",
+        "current_round",
+        "created_at",
+        "invitation_accepted",
+        "aborted_by",
+        "turn_log",
+        "arguments",
+        "round_scores",
+        "players_updated",
+        "version",
+        "events",
+    )
+
+    def __init__(self, room_key: str, topic: str, player1_name: str, created_at: Optional[datetime] = None):
+        self.room_key = room_key
+        self.topic = topic
+        self.player1_name = player1_name
+        self.player2_name: Optional[str] = None
+        self.status = "waiting"  # waiting, in_progress, scoring, completed, aborted
+        self.current_turn: Optional[str] = None
+        self.current_round = 1
+        self.created_at = created_at or datetime.now()
+        self.invitation_accepted = False
+        self.aborted_by: Optional[str] = None
+        self.turn_log: List[dict] = []
+        self.arguments: Dict[str, List[str]] = {player1_name: []}
+        self.round_scores: Dict[int, dict] = {}
+        # Set once the final result has been applied to both players' profiles
+        self.players_updated = False
+        self.version = 1
+        self.events: List[dict] = []
+
+    def has_player(self, player_name: str) -> bool:
+        return player_name == self.player1_name or player_name == self.player2_name
+
+    def opponent_of(self, player_name: str) -> Optional[str]:
+        return self.player2_name if player_name == self.player1_name else self.player1_name
+
+    def join(self, player_name: str):
+        self.player2_name = player_name
+        self.arguments[player_name] = []
+        self.status = "in_progress"
+        self.current_turn = self.player1_name
+
+    def submit(self, player_name: str, argument: str, repeat_of: Optional[List[int]] = None) -> int:
+        """
+        Record an argument and pass the turn. Returns the round the argument
+        belongs to; the round is complete when player 2 has submitted.
+        repeat_of lists earlier rounds in which the player made nearly the same argument.
+        """
+        arguments = self.arguments[player_name]
+        arguments.append(argument)
+        entry = {"player": player_name, "argument": argument}
+        if repeat_of:
+            entry["repeat_of"] = repeat_of
+        self.turn_log.append(entry)
+        self.current_turn = self.opponent_of(player_name)
+
+        round_number = len(arguments)
+        if player_name == self.player2_name:
+            self.current_round = min(round_number + 1, MAX_ROUNDS)
+            if round_number == MAX_ROUNDS:
+                # No further submissions or aborts while the final verdict is computed
+                self.status = "scoring"
+        return round_number
+
+    def round_complete(self, round_number: int) -> bool:
+        return len(self.arguments.get(self.player2_name, ())) >= round_number
+
+    @property
+    def debate_complete(self) -> bool:
+        return self.round_complete(MAX_ROUNDS)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def round_arguments(self, round_number: int):
+        """(player1 argument, player2 argument) for a round"""
+        return (
+            self.arguments[self.player1_name][round_number - 1],
+            self.arguments[self.player2_name][round_number - 1]
+        )
+
+    def record_round(self, scores: dict):
+        # Keyed by round: with streamed verdicts two rounds can finish scoring out of order
+        self.round_scores[scores["round"]] = scores
+
+    def abort(self, player_name: str):
+        self.status = "aborted"
+        self.aborted_by = player_name
+
+    def complete(self):
+        self.status = "completed"
+
+    def apply(self, event_type: str, data: dict):
+        """Re-apply a logged transition (see event_log)"""
+        if event_type == "joined":
+            self.join(data["player"])
+        elif event_type == "argument":
+            self.submit(data["player"], data["argument"], data.get("repeat_of"))
+        elif event_type == "round_scored":
+            self.record_round(data["scores"])
+        elif event_type == "aborted":
+            self.abort(data["player"])
+        elif event_type == "players_updated":
+            self.players_updated = True
+        elif event_type == "completed":
+            self.complete()
+        else:
+            raise ValueError(f"Unknown room event: {event_type}")
+        self.version += 1
+        self.events.append({"version": self.version, "type": event_type, "data": data})
+
+    def events_since(self, version: int) -> Optional[List[dict]]:
+        """Events after the given version, or None when the version is not one this room has had"""
+        # Version the oldest kept event was applied to: 1, or the version the room was restored at
+        first = self.version - len(self.events)
+        if version < first or version > self.version:
+            return None
+        return self.events[version - first:]
+
+    def to_state(self) -> dict:
+        """Full state for snapshots"""
+        state = {name: getattr(self, name) for name in self.__slots__ if name != "events"}
+        state["created_at"] = self.created_at.isoformat()
+        # JSON object keys are strings; from_state turns them back into round numbers
+        state["round_scores"] = list(self.round_scores.values())
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict) -> "RoomState":
+        room = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(room, name, state.get(name))
+        if room.version is None:
+            # Snapshot written before rooms were versioned: restart the count here
+            room.version = 1
+        room.events = []
+        room.created_at = datetime.fromisoformat(state["created_at"])
+        room.round_scores = {scores["round"]: scores for scores in state["round_scores"]}
+        return room
+
+    def to_dict(self) -> dict:
+        """Room as returned by the API"""
+        room = {
+            "room_key": self.room_key,
+            "topic": self.topic,
+            "player1_name": self.player1_name,
+            "player2_name": self.player2_name,
+            "current_round": self.current_round,
+            "status": self.status,
+            "arguments": self.arguments,
+            "current_turn": self.current_turn,
+            "created_at": self.created_at,
+            "invitation_accepted": self.invitation_accepted,
+        }
+        if self.aborted_by:
+            room["aborted_by"] = self.aborted_by
+        return room
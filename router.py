@@ -0,0 +1,82 @@
+"""
+Front door for multi-worker mode: forwards every request to an API worker.
+
+Requests about a room (join, submit, abort, status, spectate) or a
+tournament go to the worker that owns the key on the hash ring, so room
+state only ever lives in that worker's memory. Everything else (players,
+topics, room and tournament creation) is spread round-robin; workers only
+hand out room keys and tournament ids that hash to themselves.
+
+    WORKERS=http://127.0.0.1:8001,http://127.0.0.1:8002 uvicorn router:app --port 8000
+
+run_workers.py starts the workers and this router together.
+"""
+import itertools
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from hash_ring import WORKER_URLS, ring
+
+# First path segment -> position of the routing key in the path
+KEYED_ROUTES = {
+    "join-room": 1,
+    "submit-argument": 1,
+    "abort-debate": 1,
+    "room-status": 1,
+    "spectate": 1,
+    "tournaments": 1,
+}
+HOP_BY_HOP = {"connection", "keep-alive", "transfer-encoding", "te", "trailer", "upgrade",
+              "proxy-authorization", "proxy-authenticate", "host", "content-length"}
+
+if not WORKER_URLS:
+    raise ValueError("WORKERS must list the API worker URLs")
+
+client: httpx.AsyncClient = None
+next_worker = itertools.cycle(range(len(WORKER_URLS)))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client
+    # No read timeout: spectator and streamed-score responses stay open
+    client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None),
+                               limits=httpx.Limits(max_connections=1000, max_keepalive_connections=200))
+    yield
+    await client.aclose()
+
+
+app = FastAPI(title="Debate API router", lifespan=lifespan)
+
+
+def worker_for_path(path: str) -> int:
+    segments = path.strip("/").split("/")
+    position = KEYED_ROUTES.get(segments[0])
+    if position is not None and len(segments) > position and segments[position] != "create":
+        return ring.worker_for(segments[position])
+    return next(next_worker)
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+async def forward(path: str, request: Request):
+    worker = worker_for_path(path)
+    upstream = client.build_request(
+        request.method,
+        f"{WORKER_URLS[worker]}/{path}",
+        params=request.query_params,
+        headers=[(k, v) for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP],
+        content=await request.body()
+    )
+    response = await client.send(upstream, stream=True)
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in HOP_BY_HOP}
+    headers["x-debate-worker"] = str(worker)
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=headers,
+        background=BackgroundTask(response.aclose)
+    )
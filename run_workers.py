@@ -0,0 +1,128 @@
+"""
+Run the API as several worker processes behind the room-affinity router.
+
+    python run_workers.py --workers 4 --port 8000
+
+Worker i listens on port + 1 + i and keeps its own event log in
+tmp/events/worker-<i>; the router on --port forwards each room's requests to
+the worker that owns the room. With --workers 1 a single API process serves
+--port directly.
+
+    python run_workers.py --workers 4 --smoke
+
+also plays a batch of debates through the router (needs MinIO; scoring
+falls back to default scores without a Gemini key), checks that every room
+was served by its owning worker and finishes with the debates completed,
+then shuts everything down.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from hash_ring import HashRing
+
+
+def start(command, env) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", *command], env={**os.environ, **env})
+
+
+def wait_ready(url: str, processes, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if any(process.poll() is not None for process in processes):
+            raise RuntimeError("A worker process exited during startup")
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def smoke_test(base_url: str, workers: int, rooms: int = 8):
+    ring = HashRing(workers)
+    players = [f"smoke_{int(time.time())}_{i}" for i in range(rooms * 2)]
+    for name in players:
+        requests.post(f"{base_url}/players/create", json={"player_name": name}).raise_for_status()
+
+    def play(index: int) -> tuple:
+        player1, player2 = players[2 * index], players[2 * index + 1]
+        response = requests.post(f"{base_url}/create-room/{player1}", params={"topic": "Should homework be banned?"})
+        response.raise_for_status()
+        room_key = response.json()["room_key"]
+        requests.post(f"{base_url}/join-room/{room_key}", json={"player_name": player2}).raise_for_status()
+
+        served_by = set()
+        for round_number in range(1, 6):
+            for player in (player1, player2):
+                response = requests.post(f"{base_url}/submit-argument/{room_key}/{player}",
+                                         json={"argument": f"{player} argument {round_number} on homework"})
+                response.raise_for_status()
+                served_by.add(int(response.headers.get("x-debate-worker", 0)))
+        status = requests.get(f"{base_url}/room-status/{room_key}").json()["room"]["status"]
+        return room_key, served_by, status
+
+    with ThreadPoolExecutor(max_workers=rooms) as pool:
+        results = list(pool.map(play, range(rooms)))
+
+    failures = 0
+    for room_key, served_by, status in results:
+        owner = ring.worker_for(room_key)
+        ok = served_by == {owner} and status == "completed"
+        failures += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} room {room_key}: owner {owner}, served by {sorted(served_by)}, {status}")
+    owners = {ring.worker_for(room_key) for room_key, _, _ in results}
+    print(f"[INFO] {rooms - failures}/{rooms} rooms passed, spread over workers {sorted(owners)}")
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the debate API on several worker processes")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--smoke", action="store_true", help="play test debates through the router, then exit")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        processes = [start(["main:app", "--host", args.host, "--port", str(args.port)], {})]
+    else:
+        worker_urls = [f"http://127.0.0.1:{args.port + 1 + i}" for i in range(args.workers)]
+        shared = {
+            "WORKERS": ",".join(worker_urls),
+            # A player can be saved by any worker; buffered writes from two workers could land out of order
+            "WRITE_BEHIND_WINDOW": os.getenv("WRITE_BEHIND_WINDOW", "0"),
+        }
+        processes = [
+            start(["main:app", "--host", "127.0.0.1", "--port", str(args.port + 1 + i)],
+                  {**shared, "WORKER_INDEX": str(i), "EVENT_LOG_DIR": f"tmp/events/worker-{i}"})
+            for i in range(args.workers)
+        ]
+        processes.append(start(["router:app", "--host", args.host, "--port", str(args.port)], shared))
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        for port in range(args.port, args.port + 1 + (args.workers if args.workers > 1 else 0)):
+            wait_ready(f"http://127.0.0.1:{port}/", processes)
+        print(f"[INFO] Debate API running on {base_url} with {args.workers} worker(s)")
+        if args.smoke:
+            sys.exit(0 if smoke_test(base_url, max(args.workers, 1)) else 1)
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
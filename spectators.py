@@ -0,0 +1,118 @@
+import os
+import asyncio
+from typing import Callable, Dict, Optional, Set
+
+import orjson
+
+# Frames a spectator may fall behind by before it is disconnected
+SPECTATOR_QUEUE_SIZE = int(os.getenv("SPECTATOR_QUEUE_SIZE", "64"))
+SPECTATOR_KEEPALIVE = float(os.getenv("SPECTATOR_KEEPALIVE", "15"))
+
+FINAL_EVENTS = {"completed", "aborted"}
+KEEPALIVE_FRAME = b": keepalive\n\n"
+DROPPED_FRAME = b'event: dropped\ndata: {"reason":"too slow"}\n\n'
+
+
+def sse_frame(event: str, data, event_id: Optional[int] = None) -> bytes:
+    """One server-sent event, encoded"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode("utf-8") + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+class Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, size: int):
+        # Two spare slots so the closing frames always fit
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size + 2)
+        self.dropped = False
+
+
+class Broadcaster:
+    """
+    Fan-out of room events to spectators. Each event is serialized once and
+    the same bytes are queued for every subscriber of the room; a subscriber
+    whose queue is full is disconnected instead of slowing the others down.
+    The room snapshot sent to new subscribers is also built once per change.
+
+    Must only be used from the event loop thread.
+    """
+
+    def __init__(self, queue_size: int = SPECTATOR_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.rooms: Dict[str, Set[Subscriber]] = {}
+        self._snapshots: Dict[str, bytes] = {}
+        self.dropped = 0
+
+    def count(self, room_key: str) -> int:
+        return len(self.rooms.get(room_key, ()))
+
+    def subscribe(self, room_key: str, snapshot: Callable[[], dict], finished: bool = False) -> Subscriber:
+        """
+        Register a spectator; its queue starts with the current room snapshot.
+        Spectators of a finished room only get the snapshot.
+        """
+        subscriber = Subscriber(self.queue_size)
+        if finished:
+            subscriber.queue.put_nowait(sse_frame("snapshot", snapshot()))
+            subscriber.queue.put_nowait(None)
+            return subscriber
+
+        frame = self._snapshots.get(room_key)
+        if frame is None:
+            frame = self._snapshots[room_key] = sse_frame("snapshot", snapshot())
+        subscriber.queue.put_nowait(frame)
+        self.rooms.setdefault(room_key, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, room_key: str, subscriber: Subscriber):
+        subscribers = self.rooms.get(room_key)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self.rooms[room_key]
+            self._snapshots.pop(room_key, None)
+
+    def _drop(self, subscriber: Subscriber):
+        # Discard the backlog so the drop notice and end marker fit
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(DROPPED_FRAME)
+        subscriber.queue.put_nowait(None)
+        subscriber.dropped = True
+        self.dropped += 1
+
+    def publish(self, room_key: str, event: str, data, event_id: Optional[int] = None):
+        """Send one event to every spectator of the room"""
+        self._snapshots.pop(room_key, None)
+        subscribers = self.rooms.get(room_key)
+        if not subscribers:
+            return
+
+        frame = sse_frame(event, data, event_id)
+        final = event in FINAL_EVENTS
+        for subscriber in list(subscribers):
+            if subscriber.dropped:
+                continue
+            if subscriber.queue.qsize() >= self.queue_size:
+                self._drop(subscriber)
+                continue
+            subscriber.queue.put_nowait(frame)
+            if final:
+                subscriber.queue.put_nowait(None)
+
+    async def stream(self, room_key: str, subscriber: Subscriber):
+        """The frames of one spectator, with keepalive comments while the room is idle"""
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), SPECTATOR_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(room_key, subscriber)
@@ -0,0 +1,395 @@
+"""
+Running statistics over finished debates, kept in SQLite.
+
+    topics   debates, wins by first/second speaker (player1/player2) and ties,
+             rounds won by each side, and a balance score
+    genres   mean and variance of every criterion (and the per-argument total)
+             over all arguments made on the genre's topics
+    players  debates and average criterion scores per argument
+
+Each completed debate adds to the counters (record). Scores are kept as count,
+sum and sum of squares per field, which makes both the incremental update and
+the rebuild plain additions. The tables live next to the metadata index by
+default, so all workers on a host share one set of statistics; every game id is
+counted once, whichever worker records it. rebuild() recomputes everything
+from the whole debate archive with grouped NumPy sums.
+
+    stats_debates  game ids already counted, with their contribution if recorded live
+    stats_topics   per-topic debate, win and round counters
+    stats_scores   per-genre and per-player score moments
+
+    python stats_service.py rebuild    # recompute the statistics from the bucket
+"""
+import os
+import time
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import orjson
+
+from metadata_index import METADATA_DB_PATH
+
+CRITERIA = ("logic", "relevance", "persuasiveness")
+SCORE_FIELDS = CRITERIA + ("total",)
+STATS_DB_PATH = os.getenv("STATS_DB_PATH", METADATA_DB_PATH)
+UNKNOWN_GENRE = "other"
+
+TOPIC_COLUMNS = ("key", "topic", "genre", "debates", "player1_wins", "player2_wins", "ties",
+                 "player1_rounds", "player2_rounds")
+SCORE_COLUMNS = (("kind", "name", "debates", "n") + tuple(f"sum_{field}" for field in SCORE_FIELDS)
+                 + tuple(f"sumsq_{field}" for field in SCORE_FIELDS))
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS stats_debates (
+    game_id TEXT PRIMARY KEY,
+    contribution BLOB
+);
+
+CREATE TABLE IF NOT EXISTS stats_topics (
+    key TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    {", ".join(f"{column} INTEGER NOT NULL" for column in TOPIC_COLUMNS[3:])}
+);
+
+CREATE TABLE IF NOT EXISTS stats_scores (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    debates INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    {", ".join(f"{column} REAL NOT NULL" for column in SCORE_COLUMNS[4:])},
+    PRIMARY KEY (kind, name)
+);
+"""
+
+
+def _upsert(table: str, columns: tuple, key_length: int, added_from: int) -> str:
+    """INSERT that adds the counter columns (from added_from on) to an existing row"""
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in columns[added_from:])
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({', '.join(columns[:key_length])}) DO UPDATE SET {updates}")
+
+
+UPSERT_TOPIC = _upsert("stats_topics", TOPIC_COLUMNS, 1, 3)
+UPSERT_SCORES = _upsert("stats_scores", SCORE_COLUMNS, 2, 2)
+
+
+class ScoreMoments:
+    """Count, sum and sum of squares of each score field"""
+
+    __slots__ = ("n", "sum", "sumsq")
+
+    def __init__(self, n: int = 0, sums=None, sumsq=None):
+        self.n = n
+        self.sum = np.zeros(len(SCORE_FIELDS)) if sums is None else np.asarray(sums, dtype=np.float64)
+        self.sumsq = np.zeros(len(SCORE_FIELDS)) if sumsq is None else np.asarray(sumsq, dtype=np.float64)
+
+    def to_dict(self, variance: bool = True) -> dict:
+        if not self.n:
+            return {"arguments": 0}
+        mean = self.sum / self.n
+        stats = {"arguments": self.n, "mean": dict(zip(SCORE_FIELDS, np.round(mean, 3).tolist()))}
+        if variance:
+            # Scores are bounded (0-10 per criterion), so the sum-of-squares form loses no meaningful precision
+            var = np.maximum(self.sumsq / self.n - mean * mean, 0.0)
+            stats["variance"] = dict(zip(SCORE_FIELDS, np.round(var, 3).tolist()))
+        return stats
+
+    def to_row(self) -> list:
+        return [self.n, *self.sum.tolist(), *self.sumsq.tolist()]
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "ScoreMoments":
+        fields = len(SCORE_FIELDS)
+        return cls(row[0], row[1:1 + fields], row[1 + fields:1 + 2 * fields])
+
+
+class TopicStats:
+    __slots__ = ("topic", "genre", "debates", "player1_wins", "player2_wins", "ties", "player1_rounds", "player2_rounds")
+
+    def __init__(self, topic: str, genre: str, debates: int = 0, player1_wins: int = 0, player2_wins: int = 0,
+                 ties: int = 0, player1_rounds: int = 0, player2_rounds: int = 0):
+        self.topic = topic
+        self.genre = genre
+        self.debates = debates
+        self.player1_wins = player1_wins
+        self.player2_wins = player2_wins
+        self.ties = ties
+        self.player1_rounds = player1_rounds
+        self.player2_rounds = player2_rounds
+
+    @property
+    def balance(self) -> float:
+        """1 when both speaking positions win equally often, 0 when one side wins every debate"""
+        if not self.debates:
+            return 1.0
+        return 1.0 - abs(self.player1_wins - self.player2_wins) / self.debates
+
+    def to_dict(self) -> dict:
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        stats["balance"] = round(self.balance, 3)
+        return stats
+
+    def to_row(self) -> list:
+        return [getattr(self, name) for name in self.__slots__]
+
+
+class PlayerStats:
+    __slots__ = ("debates", "scores")
+
+    def __init__(self, debates: int = 0, scores: Optional[ScoreMoments] = None):
+        self.debates = debates
+        self.scores = scores or ScoreMoments()
+
+    def to_dict(self) -> dict:
+        return {"debates": self.debates, **self.scores.to_dict(variance=False)}
+
+
+def topic_key(topic: str) -> str:
+    return " ".join(topic.split()).lower()
+
+
+def score_rows(debate: dict) -> np.ndarray:
+    """(rounds, 2, fields) array of criterion scores plus total, player1 then player2"""
+    rows = np.array([
+        [[round_entry[side].get(name, 0.0) for name in CRITERIA] for side in ("player1_score", "player2_score")]
+        for round_entry in debate.get("rounds", [])
+    ], dtype=np.float64).reshape(-1, 2, len(CRITERIA))
+    return np.concatenate([rows, rows.sum(axis=2, keepdims=True)], axis=2)
+
+
+class StatsAggregate:
+    """Statistics of a set of debates computed in memory; genre_of maps a topic to its genre (or None)"""
+
+    def __init__(self, genre_of: Callable[[str], Optional[str]]):
+        self.genre_of = genre_of
+        self.debates = 0
+        self.topics: Dict[str, TopicStats] = {}
+        self.genres: Dict[str, ScoreMoments] = {}
+        self.players: Dict[str, PlayerStats] = {}
+
+    def _genre(self, topic: str) -> str:
+        return self.genre_of(topic) or UNKNOWN_GENRE
+
+    def rows(self) -> list:
+        """[topic rows, score rows] in the column order of stats_topics and stats_scores"""
+        topic_rows = [[key, *stats.to_row()] for key, stats in self.topics.items()]
+        moment_rows = [["genre", genre, 0, *moments.to_row()] for genre, moments in self.genres.items()]
+        moment_rows += [["player", name, stats.debates, *stats.scores.to_row()]
+                        for name, stats in self.players.items()]
+        return [topic_rows, moment_rows]
+
+    def aggregate(self, debates: Iterable[dict]) -> set:
+        """Fill an empty aggregate from debates with grouped array sums; returns the game ids seen"""
+        seen = set()
+        topic_ids: Dict[str, int] = {}
+        genre_ids: Dict[str, int] = {}
+        player_ids: Dict[str, int] = {}
+        topic_names: List[str] = []
+        topic_genres: List[int] = []
+        # Per debate: topic id, outcome (0 player1, 1 player2, 2 tie), rounds won by each side
+        debate_topic, outcome, rounds_won = [], [], []
+        # Per argument: score row, genre id, player id; per player appearance: player id
+        blocks, row_genre, row_player, appearances = [], [], [], []
+
+        for debate in debates:
+            game_id = str(debate["game_id"])
+            if game_id in seen:
+                continue
+            seen.add(game_id)
+            player1 = debate["players"]["player1"]
+            player2 = debate["players"]["player2"]
+            key = topic_key(debate["topic"])
+            if key not in topic_ids:
+                topic_ids[key] = len(topic_ids)
+                topic_names.append(debate["topic"])
+                topic_genres.append(genre_ids.setdefault(self._genre(debate["topic"]), len(genre_ids)))
+            topic_id = topic_ids[key]
+            genre_id = topic_genres[topic_id]
+
+            debate_topic.append(topic_id)
+            outcome.append(2 if debate["winner"] == "Tie" else 0 if debate["winner"] == player1["name"] else 1)
+            rounds_won.append((player1["rounds_won"], player2["rounds_won"]))
+
+            rows = score_rows(debate)
+            ids = [player_ids.setdefault(player["name"], len(player_ids)) for player in (player1, player2)]
+            appearances.extend(ids)
+            blocks.append(rows.reshape(-1, len(SCORE_FIELDS)))
+            row_genre.extend([genre_id] * (2 * len(rows)))
+            row_player.extend(ids * len(rows))
+
+        self.debates = len(seen)
+        if not seen:
+            return seen
+
+        debate_topic = np.array(debate_topic)
+        outcome = np.array(outcome)
+        rounds_won = np.array(rounds_won, dtype=np.int64).reshape(-1, 2)
+        n_topics = len(topic_ids)
+        wins = np.zeros((n_topics, 3), dtype=np.int64)
+        np.add.at(wins, (debate_topic, outcome), 1)
+        rounds = np.zeros((n_topics, 2), dtype=np.int64)
+        np.add.at(rounds, debate_topic, rounds_won)
+        genre_names = list(genre_ids)
+        for key, topic_id in topic_ids.items():
+            self.topics[key] = TopicStats(topic_names[topic_id], genre_names[topic_genres[topic_id]],
+                                          int(wins[topic_id].sum()), *wins[topic_id].tolist(), *rounds[topic_id].tolist())
+
+        scores = np.concatenate(blocks) if blocks else np.zeros((0, len(SCORE_FIELDS)))
+        for names, row_ids, target in ((genre_ids, np.array(row_genre, dtype=np.int64), "genres"),
+                                       (player_ids, np.array(row_player, dtype=np.int64), "players")):
+            counts = np.bincount(row_ids, minlength=len(names))
+            sums = np.zeros((len(names), len(SCORE_FIELDS)))
+            sumsq = np.zeros((len(names), len(SCORE_FIELDS)))
+            np.add.at(sums, row_ids, scores)
+            np.add.at(sumsq, row_ids, scores * scores)
+            for name, index in names.items():
+                moments = ScoreMoments(int(counts[index]), sums[index], sumsq[index])
+                if target == "genres":
+                    self.genres[name] = moments
+                else:
+                    self.players[name] = PlayerStats(0, moments)
+
+        debates_played = np.bincount(np.array(appearances, dtype=np.int64), minlength=len(player_ids))
+        for name, index in player_ids.items():
+            self.players[name].debates = int(debates_played[index])
+        return seen
+
+
+class StatsService:
+    """Statistics over all finished debates, shared through a SQLite database"""
+
+    def __init__(self, genre_of: Callable[[str], Optional[str]], path: str = STATS_DB_PATH):
+        self.genre_of = genre_of
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _apply(self, rows: list):
+        topic_rows, score_rows = rows
+        self._conn.executemany(UPSERT_TOPIC, topic_rows)
+        self._conn.executemany(UPSERT_SCORES, score_rows)
+
+    def record(self, debate: dict):
+        """Add one finished debate (a debate result document) to every aggregate, unless it was counted already"""
+        aggregate = StatsAggregate(self.genre_of)
+        aggregate.aggregate([debate])
+        rows = aggregate.rows()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so workers recording the same game can't both count it
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute("INSERT OR IGNORE INTO stats_debates VALUES (?, ?)",
+                                            (str(debate["game_id"]), orjson.dumps(rows)))
+                if cursor.rowcount:
+                    self._apply(rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @property
+    def debates(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM stats_debates")[0][0]
+
+    def topic_stats(self, sort: str = "debates", min_debates: int = 1, limit: int = 20) -> List[dict]:
+        """Topics with at least min_debates debates, most played or most balanced first"""
+        rows = self._execute(f"SELECT {', '.join(TOPIC_COLUMNS[1:])} FROM stats_topics WHERE debates >= ?",
+                             (min_debates,))
+        topics = [TopicStats(*row) for row in rows]
+        if sort == "balanced":
+            topics.sort(key=lambda stats: (-stats.balance, -stats.debates))
+        else:
+            topics.sort(key=lambda stats: -stats.debates)
+        return [stats.to_dict() for stats in topics[:limit]]
+
+    def genre_stats(self) -> Dict[str, dict]:
+        rows = self._execute(f"SELECT {', '.join(SCORE_COLUMNS[1:2] + SCORE_COLUMNS[3:])} FROM stats_scores "
+                             "WHERE kind = 'genre' ORDER BY name")
+        return {row[0]: ScoreMoments.from_row(row[1:]).to_dict() for row in rows}
+
+    def player_stats(self, username: str) -> Optional[dict]:
+        rows = self._execute(f"SELECT {', '.join(SCORE_COLUMNS[2:])} FROM stats_scores "
+                             "WHERE kind = 'player' AND name = ?", (username,))
+        if not rows:
+            return None
+        return PlayerStats(rows[0][0], ScoreMoments.from_row(rows[0][1:])).to_dict()
+
+    def is_empty(self) -> bool:
+        return not self._execute("SELECT 1 FROM stats_debates LIMIT 1")
+
+    def rebuild(self, debates: Iterable[dict]):
+        """
+        Recompute everything from the given debates. Debates recorded (by any
+        worker) while the rebuild runs and missing from its input are kept.
+        """
+        started = time.perf_counter()
+        aggregate = StatsAggregate(self.genre_of)
+        seen = aggregate.aggregate(debates)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                late = [(game_id, contribution) for game_id, contribution
+                        in self._conn.execute("SELECT game_id, contribution FROM stats_debates").fetchall()
+                        if game_id not in seen and contribution is not None]
+                for table in ("stats_debates", "stats_topics", "stats_scores"):
+                    self._conn.execute(f"DELETE FROM {table}")
+                self._conn.executemany("INSERT INTO stats_debates VALUES (?, NULL)", [(game_id,) for game_id in seen])
+                self._apply(aggregate.rows())
+                self._conn.executemany("INSERT INTO stats_debates VALUES (?, ?)", late)
+                for _, contribution in late:
+                    self._apply(orjson.loads(contribution))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        print(f"[INFO] Stats rebuilt from {len(seen) + len(late)} debates in {time.perf_counter() - started:.2f}s")
+
+
+def rebuild_stats():
+    from dotenv import load_dotenv
+    from minio import Minio
+    from history_store import HistoryStore
+    from topic_catalog import TopicCatalog
+    from ai_engine import FALLBACK_TOPICS
+
+    load_dotenv()
+    client = Minio(
+        os.getenv("MINIO_ENDPOINT", "localhost:9000"),
+        access_key=os.getenv("MINIO_ACCESS_KEY"),
+        secret_key=os.getenv("MINIO_SECRET_KEY"),
+        secure=False
+    )
+    catalog = TopicCatalog()
+    for genre, topics in FALLBACK_TOPICS.items():
+        catalog.add(genre, topics, save=False)
+
+    service = StatsService(catalog.genre_of)
+    service.rebuild(HistoryStore(client, "debate-history").all_debates())
+    for genre, stats in service.genre_stats().items():
+        print(f"{genre:16} {stats['arguments']:8} arguments  mean total {stats['mean']['total']:.2f}")
+    service.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Debate statistics maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    rebuild_stats()
@@ -0,0 +1,67 @@
+# test_argument_text.py
+import pytest
+
+import argument_text
+from argument_text import (prepare_argument, normalize_argument, estimate_tokens, truncate_tokens,
+                           ArgumentTooLong, ARGUMENT_MAX_CHARS, ARGUMENT_MAX_TOKENS)
+
+
+def test_normalize_removes_control_characters_and_collapses_space():
+    text = "  Ｆｕｌｌ​width \t text\r\n\r\n\r\n\r\nnext‮ line  "
+    assert normalize_argument(text) == "Fullwidth text\n\nnext line"
+
+
+@pytest.mark.parametrize("text", ["", "   ", "​​", "\n\t\n"])
+def test_empty_arguments_are_refused(text):
+    with pytest.raises(ValueError):
+        prepare_argument(text)
+
+
+def test_short_argument_is_kept_as_is():
+    text, info = prepare_argument("Homework teaches discipline.")
+    assert text == "Homework teaches discipline."
+    # Long words count one token per 4 characters: 2 + 2 + 3 + 1
+    assert info == {"tokens": 8, "truncated": False}
+
+
+def test_long_argument_is_cut_at_a_word_boundary():
+    text, info = prepare_argument("word " * 1000)
+    assert info["truncated"]
+    assert info["tokens"] <= ARGUMENT_MAX_TOKENS
+    assert len(text) <= ARGUMENT_MAX_CHARS
+    assert text.endswith("word")
+
+
+@pytest.mark.parametrize("length", [2900, ARGUMENT_MAX_CHARS + 1, 10000])
+def test_single_oversized_word_is_cut_inside_the_word(length):
+    # Used to truncate to "" and be stored as an empty argument
+    text, info = prepare_argument("a" * length)
+    assert text
+    assert info["truncated"]
+    assert info["tokens"] <= ARGUMENT_MAX_TOKENS
+    assert len(text) <= ARGUMENT_MAX_CHARS
+
+
+def test_oversized_first_word_followed_by_text():
+    text = truncate_tokens("x" * 50 + " tail", max_tokens=5, max_chars=100)
+    assert text == "x" * 20
+    assert estimate_tokens(text) == 5
+
+
+def test_character_limit_applies_inside_a_word():
+    assert truncate_tokens("y" * 50, max_tokens=100, max_chars=10) == "y" * 10
+
+
+def test_reject_policy_refuses_over_long_arguments(monkeypatch):
+    monkeypatch.setattr(argument_text, "ARGUMENT_OVERFLOW", "reject")
+    with pytest.raises(ArgumentTooLong):
+        prepare_argument("word " * 1000)
+    with pytest.raises(ArgumentTooLong):
+        prepare_argument("a" * 2900)
+    text, info = prepare_argument("A short argument.")
+    assert not info["truncated"]
+
+
+def test_too_long_is_a_value_error():
+    # main.py maps ArgumentTooLong to 413 before the generic ValueError to 400
+    assert issubclass(ArgumentTooLong, ValueError)
@@ -0,0 +1,74 @@
+# test_dedup_index.py
+from dedup_index import ArgumentIndex, shingles
+
+ARGUMENT = ("School uniforms remove visible differences in family income and let students "
+            "focus on learning instead of on what everyone is wearing every morning")
+# One word changed near the end
+NEAR_COPY = ARGUMENT.replace("every morning", "each morning")
+UNRELATED = "Space exploration funding should go to ocean research because we know less about the deep sea"
+
+
+def test_shingles_of_short_text():
+    assert shingles("Too short") == ["too short"]
+    assert shingles("one two three four") == ["one two three", "two three four"]
+
+
+def test_identical_text_has_identical_signature():
+    index = ArgumentIndex()
+    assert (index.signature(ARGUMENT) == index.signature(ARGUMENT.upper())).all()
+
+
+def test_near_copy_is_found_and_unrelated_text_is_not():
+    index = ArgumentIndex()
+    doc_id = index.add(ARGUMENT, {"room": "ROOM01"})
+    index.add(UNRELATED, {"room": "ROOM02"})
+
+    matches = index.query(NEAR_COPY, threshold=0.5)
+    assert [match[0] for match in matches] == [doc_id]
+    assert 0.5 <= matches[0][1] < 1.0
+    assert index.query(ARGUMENT, threshold=1.0)[0][2] == {"room": "ROOM01"}
+    assert index.query("Pineapple belongs on pizza, and nobody can convince me otherwise") == []
+
+
+def test_repeats_are_reported_per_room_and_player():
+    index = ArgumentIndex()
+    assert index.add_submission(ARGUMENT, "ROOM01", "Ana", 1, "Uniforms?") == []
+    assert index.add_submission(UNRELATED, "ROOM01", "Ana", 2, "Uniforms?") == []
+    assert index.add_submission(ARGUMENT, "ROOM01", "Ana", 3, "Uniforms?") == [1]
+    # Same words from the opponent, or in another room, are not a repeat
+    assert index.add_submission(ARGUMENT, "ROOM01", "Ben", 3, "Uniforms?") == []
+    assert index.add_submission(ARGUMENT, "ROOM02", "Ana", 1, "Uniforms?") == []
+    assert len(index) == 5
+
+
+def test_scores_are_reused_on_the_same_topic_only():
+    index = ArgumentIndex()
+    scores = {"logic": 7.0, "relevance": 8.0, "persuasiveness": 6.0}
+    assert index.find_scores(ARGUMENT, "Uniforms?") is None
+
+    index.add_submission(ARGUMENT, "ROOM01", "Ana", 1, "Uniforms?")
+    index.remember_scores(ARGUMENT, " UNIFORMS? ", scores)
+    # Attached to the indexed submission rather than added again
+    assert len(index) == 1
+    assert index.find_scores(ARGUMENT, "uniforms?") == scores
+    assert index.find_scores(ARGUMENT, "Homework?") is None
+    assert index.find_scores(UNRELATED, "Uniforms?") is None
+
+
+def test_index_keeps_only_the_newest_documents():
+    index = ArgumentIndex(max_documents=3)
+    first = index.add(ARGUMENT, {"room": "ROOM01"})
+    for room_number in range(2, 5):
+        index.add(f"{UNRELATED} number {room_number}", {"room": f"ROOM0{room_number}"})
+    assert len(index) == 3
+
+    # The first argument was overwritten, and nothing else points at its slot
+    assert index.query(ARGUMENT, threshold=0.5) == []
+    assert index.query(NEAR_COPY, threshold=0.5) == []
+    assert all(first not in bucket for bucket in index._buckets.values())
+    assert index.query(f"{UNRELATED} number 4", threshold=1.0)[0][2] == {"room": "ROOM04"}
+
+    # Re-adding it evicts the next oldest, and it is found again
+    doc_id = index.add(ARGUMENT, {"room": "ROOM05"})
+    assert [match[0] for match in index.query(NEAR_COPY, threshold=0.5)] == [doc_id]
+    assert sum(len(bucket) for bucket in index._buckets.values()) == 3 * 16
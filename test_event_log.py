@@ -0,0 +1,143 @@
+# test_event_log.py
+from datetime import datetime
+
+from event_log import EventLog, apply_event, finished_debates
+from room_state import RoomState, MAX_ROUNDS
+
+CREATED_AT = datetime(2026, 1, 2, 3, 4, 5).isoformat()
+
+
+def log_event(log, rooms, room_key, event_type, **data):
+    log.append(room_key, event_type, data)
+    apply_event(rooms, room_key, event_type, data)
+
+
+def play_debate(log, rooms, room_key, finish=True):
+    log_event(log, rooms, room_key, "created", topic="Is tea better than coffee?", player="Ana",
+              created_at=CREATED_AT)
+    log_event(log, rooms, room_key, "joined", player="Ben")
+    for round_number in range(1, MAX_ROUNDS + 1):
+        log_event(log, rooms, room_key, "argument", player="Ana", argument=f"Tea point {round_number}")
+        log_event(log, rooms, room_key, "argument", player="Ben", argument=f"Coffee point {round_number}")
+        log_event(log, rooms, room_key, "round_scored", scores={"round": round_number, "winner": "Ana"})
+    if finish:
+        log_event(log, rooms, room_key, "completed")
+
+
+def test_replay_rebuilds_rooms(tmp_path):
+    log = EventLog(str(tmp_path))
+    rooms = {}
+    play_debate(log, rooms, "ROOM01", finish=False)
+    log_event(log, rooms, "ROOM02", "created", topic="Cats or dogs?", player="Cy", created_at=CREATED_AT)
+    log.close()
+
+    replayed = EventLog(str(tmp_path)).replay()
+    assert set(replayed) == {"ROOM01", "ROOM02"}
+    for room_key, room in rooms.items():
+        assert replayed[room_key].to_state() == room.to_state()
+        assert replayed[room_key].version == room.version
+    assert replayed["ROOM01"].status == "scoring"
+    assert replayed["ROOM01"].round_scores[3] == {"round": 3, "winner": "Ana"}
+
+
+def test_replay_from_snapshot_plus_tail(tmp_path):
+    log = EventLog(str(tmp_path))
+    rooms = {}
+    play_debate(log, rooms, "DONE01")
+    log_event(log, rooms, "LIVE01", "created", topic="Cats or dogs?", player="Cy", created_at=CREATED_AT)
+    log.snapshot(rooms)
+    log_event(log, rooms, "LIVE01", "joined", player="Di")
+    log_event(log, rooms, "LIVE01", "argument", player="Cy", argument="Cats are quiet")
+    log.close()
+
+    reopened = EventLog(str(tmp_path))
+    assert reopened.seq == log.seq
+    replayed = reopened.replay()
+    # Finished rooms are left out of snapshots
+    assert set(replayed) == {"LIVE01"}
+    assert replayed["LIVE01"].to_state() == rooms["LIVE01"].to_state()
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    log = EventLog(str(tmp_path))
+    rooms = {}
+    log_event(log, rooms, "ROOM01", "created", topic="Cats or dogs?", player="Cy", created_at=CREATED_AT)
+    log_event(log, rooms, "ROOM01", "joined", player="Di")
+    log.close()
+    segment = next(tmp_path.glob("segment_*.log"))
+    with open(segment, "ab") as file:
+        file.write(b'[3, 1.0, "ROOM01", "argu')
+
+    replayed = EventLog(str(tmp_path)).replay()
+    assert replayed["ROOM01"].status == "in_progress"
+    assert replayed["ROOM01"].version == 2
+
+
+def test_finished_debates_lists_completed_rooms_only(tmp_path):
+    log = EventLog(str(tmp_path))
+    rooms = {}
+    play_debate(log, rooms, "DONE01")
+    play_debate(log, rooms, "OPEN01", finish=False)
+    log.close()
+
+    debates = list(finished_debates(EventLog(str(tmp_path))))
+    assert [debate["game_id"] for debate in debates] == ["DONE01"]
+    assert debates[0]["player2"]["arguments"][-1] == f"Coffee point {MAX_ROUNDS}"
+
+
+def test_restored_room_only_serves_events_after_the_restore():
+    room = RoomState("ROOM01", "Cats or dogs?", "Cy")
+    room.apply("joined", {"player": "Di"})
+    state = room.to_state()
+    assert "events" not in state
+
+    restored = RoomState.from_state(state)
+    assert restored.version == 2
+    assert restored.events_since(1) is None
+    restored.apply("argument", {"player": "Cy", "argument": "Cats are quiet"})
+    assert [event["version"] for event in restored.events_since(2)] == [3]
+    assert restored.events_since(1) is None
+
+
+def test_snapshot_captured_before_later_events(tmp_path):
+    log = EventLog(str(tmp_path))
+    rooms = {}
+    log_event(log, rooms, "LIVE01", "created", topic="Cats or dogs?", player="Cy", created_at=CREATED_AT)
+    seq, data = log.capture(rooms)
+    assert not log.snapshot_due
+    # Events applied while the snapshot is being written are not part of it
+    log_event(log, rooms, "LIVE01", "joined", player="Di")
+    log.write_snapshot(seq, data)
+    log.close()
+
+    replayed = EventLog(str(tmp_path)).replay()
+    assert replayed["LIVE01"].to_state() == rooms["LIVE01"].to_state()
+
+
+def test_old_segments_are_pruned_once_snapshots_cover_them(tmp_path):
+    log = EventLog(str(tmp_path), segment_max_bytes=1, retention_seconds=0)
+    rooms = {}
+    play_debate(log, rooms, "DONE01")
+    log_event(log, rooms, "LIVE01", "created", topic="Cats or dogs?", player="Cy", created_at=CREATED_AT)
+    segments = len(list(tmp_path.glob("segment_*.log")))
+    assert segments == log.seq
+
+    log.snapshot(rooms)
+    # The first snapshot covers every segment but the one being written to
+    assert len(list(tmp_path.glob("segment_*.log"))) == 1
+    log_event(log, rooms, "LIVE01", "joined", player="Di")
+    log.close()
+
+    replayed = EventLog(str(tmp_path)).replay()
+    assert set(replayed) == {"LIVE01"}
+    assert replayed["LIVE01"].to_state() == rooms["LIVE01"].to_state()
+
+
+def test_segments_within_retention_are_kept(tmp_path):
+    log = EventLog(str(tmp_path), segment_max_bytes=1)
+    rooms = {}
+    play_debate(log, rooms, "DONE01")
+    log.snapshot(rooms)
+    log.close()
+    assert len(list(tmp_path.glob("segment_*.log"))) == log.seq
+    assert [debate["game_id"] for debate in finished_debates(EventLog(str(tmp_path)))] == ["DONE01"]
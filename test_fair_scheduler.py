@@ -0,0 +1,60 @@
+# test_fair_scheduler.py
+import asyncio
+
+from fair_scheduler import FairScheduler
+
+
+def test_fair_scheduler_round_robins_between_rooms():
+    async def run():
+        scheduler = FairScheduler(limit=1)
+        order = []
+        release = asyncio.Event()
+
+        async def job(room, name):
+            async with scheduler.slot(room):
+                order.append(name)
+                await release.wait()
+
+        holder = asyncio.create_task(job("A", "A0"))
+        await asyncio.sleep(0)
+        # Room A queues a backlog before room B asks once
+        waiters = [asyncio.create_task(job("A", f"A{i}")) for i in range(1, 4)]
+        await asyncio.sleep(0)
+        waiters.append(asyncio.create_task(job("B", "B1")))
+        await asyncio.sleep(0)
+        assert scheduler.queued == 4
+
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        assert scheduler.running == 0
+        return order
+
+    assert asyncio.run(run()) == ["A0", "A1", "B1", "A2", "A3"]
+
+
+def test_fair_scheduler_cancelled_waiter_gives_up_its_place():
+    async def run():
+        scheduler = FairScheduler(limit=1)
+        order = []
+        release = asyncio.Event()
+
+        async def job(room):
+            async with scheduler.slot(room):
+                order.append(room)
+                await release.wait()
+
+        holder = asyncio.create_task(job("A"))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(job("B"))
+        waiting = asyncio.create_task(job("C"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.queued == 1
+
+        release.set()
+        await asyncio.gather(holder, waiting)
+        assert scheduler.running == 0
+        return order
+
+    assert asyncio.run(run()) == ["A", "C"]
@@ -0,0 +1,57 @@
+# test_hash_ring.py
+import importlib
+import sys
+from collections import Counter
+
+import pytest
+
+import hash_ring
+from hash_ring import HashRing
+
+KEYS = [f"ROOM{i:04d}" for i in range(4000)]
+
+
+def test_keys_spread_evenly():
+    ring = HashRing(4)
+    counts = Counter(ring.worker_for(key) for key in KEYS)
+    assert set(counts) == {0, 1, 2, 3}
+    assert max(counts.values()) < 1.5 * len(KEYS) / 4
+
+
+def test_adding_a_worker_only_moves_keys_to_it():
+    before, after = HashRing(3), HashRing(4)
+    moved = [key for key in KEYS if before.worker_for(key) != after.worker_for(key)]
+    assert all(after.worker_for(key) == 3 for key in moved)
+    assert len(moved) < 0.4 * len(KEYS)
+
+
+def test_single_worker_owns_everything():
+    ring = HashRing(1)
+    assert {ring.worker_for(key) for key in KEYS[:100]} == {0}
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setenv("WORKERS", "http://127.0.0.1:8001,http://127.0.0.1:8002,http://127.0.0.1:8003")
+    importlib.reload(hash_ring)
+    sys.modules.pop("router", None)
+    import router
+    yield router
+    sys.modules.pop("router", None)
+    monkeypatch.delenv("WORKERS")
+    importlib.reload(hash_ring)
+
+
+def test_room_requests_go_to_the_owner(router):
+    for room_key in KEYS[:50]:
+        owner = hash_ring.ring.worker_for(room_key)
+        for path in (f"/join-room/{room_key}", f"/submit-argument/{room_key}/Ana",
+                     f"/room-status/{room_key}", f"/spectate/{room_key}", f"/abort-debate/{room_key}/Ana"):
+            assert router.worker_for_path(path) == owner
+
+
+def test_other_requests_are_spread_round_robin(router):
+    workers = [router.worker_for_path(path) for path in
+               ("/players/create", "/topics/science", "/tournaments/create", "/leaderboard", "/")]
+    assert sorted(workers[:3]) == [0, 1, 2]
+    assert workers[3] == workers[0]
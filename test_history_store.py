@@ -0,0 +1,106 @@
+# test_history_store.py
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+
+from history_store import HistoryStore
+from metadata_index import MetadataIndex
+
+
+class FakeObject:
+    def __init__(self, name, last_modified):
+        self.object_name = name
+        self.last_modified = last_modified
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class FakeMinio:
+    """The few bucket calls HistoryStore makes, kept in a dict; counts GETs"""
+
+    def __init__(self):
+        self.objects = {}
+        self.gets = 0
+
+    def put_object(self, bucket, name, data, length):
+        self.objects[name] = (data.read(), datetime.now(timezone.utc))
+
+    def get_object(self, bucket, name):
+        self.gets += 1
+        if name not in self.objects:
+            raise KeyError(name)
+        return FakeResponse(self.objects[name][0])
+
+    def list_objects(self, bucket, prefix="", recursive=False):
+        return [FakeObject(name, modified) for name, (_, modified) in sorted(self.objects.items())
+                if name.startswith(prefix)]
+
+    def remove_object(self, bucket, name):
+        del self.objects[name]
+
+
+def debate(game_id, player1, player2, day):
+    return {"game_id": game_id, "topic": "Cats or dogs?", "winner": player1, "reason": "",
+            "timestamp": f"2026-01-{day:02d} 00:00:00",
+            "players": {"player1": {"name": player1, "arguments": [], "rounds_won": 3},
+                        "player2": {"name": player2, "arguments": [], "rounds_won": 2}},
+            "rounds": []}
+
+
+@pytest.fixture
+def stored(tmp_path):
+    """A bucket and metadata index holding 10 debates of Ana, as if finished by another worker"""
+    minio = FakeMinio()
+    metadata = MetadataIndex(str(tmp_path / "metadata.db"))
+    for day in range(1, 11):
+        result = debate(f"G{day:02d}", "Ana", f"Opp{day}", day)
+        minio.objects[f"debate_G{day:02d}.json"] = (orjson.dumps(result), datetime.now(timezone.utc))
+        metadata.add_debate(result)
+    yield minio, metadata
+    metadata.close()
+
+
+def test_history_fills_the_hot_tier_lazily(stored):
+    minio, metadata = stored
+    store = HistoryStore(minio, "bucket", metadata=metadata, fetch_workers=4)
+    assert minio.gets == 0
+
+    history = store.player_history("Ana", limit=3)
+    assert [d["game_id"] for d in history] == ["G10", "G09", "G08"]
+    assert minio.gets == 3
+
+    # Served from memory the second time; a longer history only fetches the rest
+    assert store.player_history("Ana", limit=3) == history
+    assert minio.gets == 3
+    assert len(store.player_history("Ana")) == 10
+    assert minio.gets == 10
+
+
+def test_hot_tier_is_bounded_by_players(stored):
+    minio, metadata = stored
+    store = HistoryStore(minio, "bucket", metadata=metadata, hot_players=3)
+    for day in range(1, 6):
+        store.record(debate(f"N{day}", f"P{day}", f"Q{day}", day))
+    assert list(store.recent) == ["Q4", "P5", "Q5"]
+
+    # Reading a history counts as a use
+    store.player_history("Q4", limit=1)
+    store.record(debate("N6", "P6", "Q6", 6))
+    assert "Q4" in store.recent and "P5" not in store.recent
+
+
+def test_compacted_games_are_read_from_their_segment(stored):
+    minio, metadata = stored
+    store = HistoryStore(minio, "bucket", metadata=metadata)
+    assert store.compact(timedelta(seconds=-1), segment_size=4) == 10
+    assert not [name for name in minio.objects if name.startswith("debate_")]
+
+    history = HistoryStore(minio, "bucket", metadata=metadata).player_history("Ana", limit=5)
+    assert [d["game_id"] for d in history] == ["G10", "G09", "G08", "G07", "G06"]
@@ -0,0 +1,136 @@
+# test_llm_client.py
+import threading
+import time
+
+import pytest
+
+import llm_client
+from llm_client import CircuitBreaker, CircuitOpenError, LatencyTracker, HEDGE_MIN_SAMPLES
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_client.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def fresh_endpoints(monkeypatch):
+    monkeypatch.setattr(llm_client, "breakers", {})
+    monkeypatch.setattr(llm_client, "latencies", {})
+
+
+def test_breaker_opens_after_threshold_and_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 30
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # A failed probe re-opens the circuit for a full period
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_call_gemini_fails_fast_while_open(monkeypatch, clock, fresh_endpoints):
+    calls = []
+
+    def failing_post(payload, timeout):
+        calls.append(timeout)
+        raise ConnectionError("Gemini unavailable")
+
+    monkeypatch.setattr(llm_client, "_post", failing_post)
+    for _ in range(llm_client.BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(ConnectionError):
+            llm_client.call_gemini({}, "score")
+    with pytest.raises(CircuitOpenError):
+        llm_client.call_gemini({}, "score")
+    assert len(calls) == llm_client.BREAKER_FAILURE_THRESHOLD
+    assert calls[0] == llm_client.ENDPOINT_TIMEOUTS["score"]
+    assert llm_client.circuit_status()["score"]["state"] == "open"
+
+
+def test_latency_percentile_needs_enough_samples():
+    tracker = LatencyTracker()
+    for i in range(HEDGE_MIN_SAMPLES - 1):
+        tracker.add(i / 100)
+    assert tracker.percentile(0.95) is None
+    tracker.add(1.0)
+    assert tracker.percentile(0.95) == 1.0
+    assert tracker.percentile(0.5) == 0.1
+
+
+def test_slow_request_is_hedged_and_first_answer_wins(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def post(payload, timeout):
+        calls.append(payload)
+        if len(calls) == 1:
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    monkeypatch.setattr(llm_client, "_post", post)
+    try:
+        assert llm_client._hedged_post({"n": 1}, (3.0, 8.0), delay=0.05) == "fast"
+        assert calls == [{"n": 1}, {"n": 1}]
+    finally:
+        release.set()
+
+
+def test_fast_request_is_not_duplicated(monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm_client, "_post", lambda payload, timeout: calls.append(payload) or "ok")
+    assert llm_client._hedged_post({}, (3.0, 8.0), delay=1.0) == "ok"
+    assert len(calls) == 1
+
+
+def test_hedge_failures_raise_when_both_requests_fail(monkeypatch):
+    def post(payload, timeout):
+        time.sleep(0.1)
+        raise ConnectionError("Gemini unavailable")
+
+    monkeypatch.setattr(llm_client, "_post", post)
+    with pytest.raises(ConnectionError):
+        llm_client._hedged_post({}, (3.0, 8.0), delay=0.01)
+
+
+def test_only_listed_endpoints_are_hedged_once_latencies_are_known(monkeypatch, fresh_endpoints):
+    hedged = []
+    monkeypatch.setattr(llm_client, "HEDGED_ENDPOINTS", {"score"})
+    monkeypatch.setattr(llm_client, "_post", lambda payload, timeout: "direct")
+    monkeypatch.setattr(llm_client, "_hedged_post",
+                        lambda payload, timeout, delay: hedged.append(delay) or "hedged")
+
+    for _ in range(HEDGE_MIN_SAMPLES):
+        assert llm_client.call_gemini({}, "score") == "direct"
+        assert llm_client.call_gemini({}, "topics") == "direct"
+    assert llm_client.call_gemini({}, "score") == "hedged"
+    assert llm_client.call_gemini({}, "topics") == "direct"
+    # Delays below the floor are raised to it
+    assert hedged == [llm_client.HEDGE_MIN_DELAY]
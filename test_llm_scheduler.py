@@ -0,0 +1,79 @@
+# test_llm_scheduler.py
+import time
+import threading
+
+from llm_scheduler import LLMScheduler, WORK_CLASSES, llm_priority, current_work_class
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "scheduler did not reach the expected state"
+        time.sleep(0.001)
+
+
+def queue_calls(scheduler, work_classes, order):
+    """Start one waiting call per class, in the given order, each queued before the next starts"""
+    threads = []
+    for work_class in work_classes:
+        def call(work_class=work_class):
+            with scheduler.slot(work_class):
+                order.append(work_class)
+
+        queued = sum(status["queued"] for status in scheduler.status().values())
+        thread = threading.Thread(target=call)
+        thread.start()
+        wait_for(lambda: sum(status["queued"] for status in scheduler.status().values()) == queued + 1)
+        threads.append(thread)
+    return threads
+
+
+def test_llm_scheduler_serves_the_most_urgent_class_first():
+    scheduler = LLMScheduler(limit=1, class_limits={c: 1 for c in WORK_CLASSES}, aging_seconds=3600)
+    order = []
+    scheduler.acquire("live")
+    threads = queue_calls(scheduler, ["batch", "topics", "live", "batch"], order)
+
+    scheduler.release("live")
+    for thread in threads:
+        thread.join()
+    assert order == ["live", "topics", "batch", "batch"]
+    assert all(status["running"] == 0 and status["queued"] == 0 for status in scheduler.status().values())
+
+
+def test_llm_scheduler_ages_waiting_batch_calls():
+    scheduler = LLMScheduler(limit=1, class_limits={c: 1 for c in WORK_CLASSES}, aging_seconds=0.01)
+    order = []
+    scheduler.acquire("live")
+    threads = queue_calls(scheduler, ["batch"], order)
+    # Long enough for the batch call to outrank a fresh live call
+    time.sleep(0.1)
+    threads += queue_calls(scheduler, ["live"], order)
+
+    scheduler.release("live")
+    for thread in threads:
+        thread.join()
+    assert order == ["batch", "live"]
+
+
+def test_llm_scheduler_class_limit_leaves_room_for_live_calls():
+    scheduler = LLMScheduler(limit=2, class_limits={"live": 2, "topics": 1, "batch": 1}, aging_seconds=3600)
+    order = []
+    scheduler.acquire("batch")
+    threads = queue_calls(scheduler, ["batch"], order)
+    # The second batch call waits for its class, not for the free slot
+    with scheduler.slot("live"):
+        order.append("live")
+    assert order == ["live"]
+
+    scheduler.release("batch")
+    for thread in threads:
+        thread.join()
+    assert order == ["live", "batch"]
+
+
+def test_llm_priority_sets_the_class_for_the_enclosed_calls():
+    assert current_work_class.get() == "live"
+    with llm_priority("batch"):
+        assert current_work_class.get() == "batch"
+    assert current_work_class.get() == "live"
@@ -0,0 +1,65 @@
+# test_metadata_index.py
+import pytest
+
+from metadata_index import MetadataIndex
+from models import Player
+
+
+def debate(game_id, player1, player2, day, winner=None):
+    return {"game_id": game_id, "topic": "Cats or dogs?", "winner": winner or player1,
+            "timestamp": f"2026-01-{day:02d} 00:00:00",
+            "players": {"player1": {"name": player1, "rounds_won": 3},
+                        "player2": {"name": player2, "rounds_won": 2}}}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MetadataIndex(str(tmp_path / "metadata.db"))
+    yield index
+    index.close()
+
+
+def test_players_round_trip_and_rank(index):
+    assert index.is_empty()
+    index.upsert_players([Player(username="Ana", rating=1520.0), Player(username="Ben", rating=1480.0),
+                          Player(username="Cy", rating=1520.0)])
+    assert not index.is_empty()
+    ana = index.get_player("Ana")
+    assert (ana.username, ana.rating, ana.games_played) == ("Ana", 1520.0, 0)
+    assert index.get_player("Nobody") is None
+
+    # Equal ratings are ordered by name
+    assert [player.username for player in index.ranked_players()] == ["Ana", "Cy", "Ben"]
+    assert index.rank_of("Cy") == (2, 3)
+    assert index.rank_of("Nobody") == (None, 3)
+
+    index.upsert_player(Player(username="Ben", rating=1600.0, wins=1))
+    assert index.rank_of("Ben") == (1, 3)
+    assert index.get_player("Ben").wins == 1
+
+
+def test_player_games_are_newest_first_with_their_segment(index):
+    index.add_debates([(debate("G1", "Ana", "Ben", 1), None), (debate("G3", "Ben", "Ana", 3), None)])
+    index.add_debate(debate("G2", "Ana", "Cy", 2))
+    assert index.has_debate("G2") and not index.has_debate("G9")
+
+    assert [game_id for game_id, _ in index.player_games("Ana")] == ["G3", "G2", "G1"]
+    assert index.player_games("Ben", limit=1) == [("G3", None)]
+
+    index.set_segment(["G1", "G2"], "archive/segment_1.jsonl.gz")
+    assert dict(index.player_games("Ana")) == {"G3": None, "G2": "archive/segment_1.jsonl.gz",
+                                               "G1": "archive/segment_1.jsonl.gz"}
+
+
+def test_workers_share_the_database(tmp_path):
+    path = str(tmp_path / "metadata.db")
+    first, second = MetadataIndex(path), MetadataIndex(path)
+    first.upsert_player(Player(username="Ana"))
+    first.add_debate(debate("G1", "Ana", "Ben", 1))
+    assert second.get_player("Ana").username == "Ana"
+    assert second.has_debate("G1")
+
+    second.clear()
+    assert first.is_empty() and not first.has_debate("G1")
+    first.close()
+    second.close()
@@ -0,0 +1,89 @@
+# test_profiling.py
+import asyncio
+import time
+
+import pytest
+
+import profiling
+from profiling import Profiler, ProfilingMiddleware, span, timed
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    profiler = Profiler(interval=0.001, directory=str(tmp_path), dump_seconds=3600)
+    monkeypatch.setattr(profiling, "profiler", profiler)
+    monkeypatch.setattr(profiling, "PROFILE_SPANS", True)
+    yield profiler
+    profiler.close()
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_spans_record_self_time_under_their_parents(profiler):
+    with span("outer"):
+        busy(0.02)
+        with span("inner"):
+            busy(0.03)
+    assert set(profiler.spans) == {"outer", "outer;inner"}
+    assert profiler.spans["outer;inner"] >= 30_000
+    # The outer span only counts the time outside the inner one
+    assert 20_000 <= profiler.spans["outer"] < profiler.spans["outer;inner"]
+
+
+def test_spans_are_free_when_disabled(profiler, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SPANS", False)
+    with span("outer"):
+        pass
+    assert not profiler.spans
+
+
+def test_timed_wraps_plain_and_async_functions(profiler):
+    @timed("plain")
+    def plain():
+        return 1
+
+    @timed("coroutine")
+    async def coroutine():
+        with span("child"):
+            await asyncio.sleep(0)
+        return 2
+
+    assert plain() == 1
+    assert asyncio.run(coroutine()) == 2
+    assert set(profiler.spans) == {"plain", "coroutine", "coroutine;child"}
+
+
+def test_sampled_request_collects_project_stacks(profiler):
+    with profiler.request("GET /players"):
+        busy(0.2)
+    assert profiler.sampled_requests == 1
+    assert profiler.stacks
+    assert all(stack.startswith("GET /players;") for stack in profiler.stacks)
+    assert any("busy (test_profiling.py:" in stack for stack in profiler.stacks)
+
+
+def test_dump_writes_folded_files_and_resets(profiler, tmp_path):
+    assert profiler.dump() is None
+    profiler.add_span("store_debate_result", 1500)
+    profiler.add_span("store_debate_result", 500)
+    stem = profiler.dump()
+    assert (tmp_path / f"spans-{stem}.folded").read_text() == "store_debate_result 2000\n"
+    assert not (tmp_path / f"stacks-{stem}.folded").exists()
+    assert not profiler.spans
+
+
+def test_middleware_labels_requests_by_route(profiler):
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(dict(profiler._active))
+
+    scope = {"type": "http", "method": "POST", "path": "/submit-argument/ROOM01/Ana"}
+    asyncio.run(ProfilingMiddleware(app, sample_rate=1.0)(scope, None, None))
+    asyncio.run(ProfilingMiddleware(app, sample_rate=0.0)(scope, None, None))
+    assert seen == [{"POST /submit-argument": 1}, {}]
+    assert set(profiler.spans) == {"POST /submit-argument"}
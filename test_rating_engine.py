@@ -0,0 +1,74 @@
+# test_rating_engine.py
+import numpy as np
+import pytest
+
+from rating_engine import (INITIAL_RATING, ELO_K, expected_score, elo_update, match_waves, batch_ratings,
+                           matches_from_debates, abort_record)
+
+
+def sequential_ratings(player_a, player_b, score_a, n_players):
+    ratings = [INITIAL_RATING] * n_players
+    for a, b, score in zip(player_a.tolist(), player_b.tolist(), score_a.tolist()):
+        ratings[a], ratings[b] = elo_update(ratings[a], ratings[b], score)
+    return np.array(ratings)
+
+
+def test_elo_update_is_zero_sum():
+    assert expected_score(1500, 1500) == 0.5
+    winner, loser = elo_update(1500, 1500, 1.0)
+    assert winner == INITIAL_RATING + ELO_K / 2
+    assert winner + loser == 3000
+    assert elo_update(1500, 1500, 0.5) == (1500, 1500)
+
+
+def test_waves_keep_each_players_matches_in_order():
+    player_a = np.array([0, 2, 0, 1, 3])
+    player_b = np.array([1, 3, 2, 3, 0])
+    waves = match_waves(player_a, player_b, 4)
+    assert waves.tolist() == [0, 0, 1, 1, 2]
+
+
+@pytest.mark.parametrize("n_players, n_matches", [(2, 10), (5, 40), (50, 2000)])
+def test_batch_matches_sequential(n_players, n_matches):
+    rng = np.random.default_rng(n_matches)
+    player_a = rng.integers(0, n_players, n_matches)
+    player_b = (player_a + rng.integers(1, n_players, n_matches)) % n_players
+    score_a = rng.choice([0.0, 0.5, 1.0], n_matches)
+
+    batch = batch_ratings(player_a, player_b, score_a, n_players)
+    np.testing.assert_allclose(batch, sequential_ratings(player_a, player_b, score_a, n_players), rtol=0, atol=1e-9)
+    assert batch.sum() == pytest.approx(n_players * INITIAL_RATING)
+
+
+def test_no_matches_keeps_initial_ratings():
+    empty = np.array([], dtype=np.int64)
+    assert batch_ratings(empty, empty, np.array([]), 3).tolist() == [INITIAL_RATING] * 3
+
+
+def test_matches_from_debates_orders_by_time():
+    def debate(timestamp, player1, player2, winner):
+        return {"timestamp": timestamp, "winner": winner,
+                "players": {"player1": {"name": player1}, "player2": {"name": player2}}}
+
+    names, player_a, player_b, score_a = matches_from_debates([
+        debate("2026-01-03", "Cy", "Ana", "Tie"),
+        debate("2026-01-01", "Ana", "Ben", "Ana"),
+        debate("2026-01-02", "Ben", "Cy", "Cy"),
+    ])
+    assert names == ["Ana", "Ben", "Cy"]
+    assert player_a.tolist() == [0, 1, 2]
+    assert player_b.tolist() == [1, 2, 0]
+    assert score_a.tolist() == [1.0, 0.0, 0.5]
+
+
+def test_aborts_replay_like_the_live_penalty():
+    debate = {"timestamp": "2000-01-01 00:00:00", "winner": "Ben",
+              "players": {"player1": {"name": "Ana"}, "player2": {"name": "Ben"}}}
+    abort = abort_record("ROOM01", "Ben", "Ana")
+    names, player_a, player_b, score_a = matches_from_debates([abort, debate])
+
+    # PlayerService: the debate, then apply_abort_penalty rating the abort as a win for the opponent
+    ben, ana = elo_update(INITIAL_RATING, INITIAL_RATING, 1.0)
+    ana, ben = elo_update(ana, ben, 1.0)
+    ratings = dict(zip(names, batch_ratings(player_a, player_b, score_a, len(names)).tolist()))
+    assert ratings == pytest.approx({"Ana": ana, "Ben": ben})
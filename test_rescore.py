@@ -0,0 +1,58 @@
+# test_rescore.py
+import pytest
+
+import ai_engine
+import rescore
+from ai_engine import ScoringError
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return {"candidates": [{"content": {"parts": [{"text": self.text}]}}]}
+
+
+def test_llm_failure_is_raised_and_not_cached(monkeypatch, tmp_path):
+    def failing_call(payload, endpoint="default"):
+        raise ConnectionError("Gemini unavailable")
+
+    monkeypatch.setattr(ai_engine, "call_gemini", failing_call)
+    cache = rescore.ScoreCache(str(tmp_path / "cache.jsonl"))
+    with pytest.raises(ScoringError):
+        cache.llm_scores("An argument nobody has made before about tides", "Is the moon overrated?", 1)
+    cache.close()
+
+    assert cache.scores == {}
+    assert (tmp_path / "cache.jsonl").read_bytes() == b""
+
+
+def test_error_status_is_raised(monkeypatch, tmp_path):
+    monkeypatch.setattr(ai_engine, "call_gemini", lambda payload, endpoint="default": FakeResponse(429))
+    cache = rescore.ScoreCache(str(tmp_path / "cache.jsonl"))
+    with pytest.raises(ScoringError):
+        cache.llm_scores("Another fresh argument about lunar tourism", "Is the moon overrated?", 2)
+    cache.close()
+    assert cache.scores == {}
+
+
+def test_real_scores_are_cached(monkeypatch, tmp_path):
+    response = FakeResponse(200, "Logic: 7\nRelevance: 6\nPersuasiveness: 8\n")
+    monkeypatch.setattr(ai_engine, "call_gemini", lambda payload, endpoint="default": response)
+    cache = rescore.ScoreCache(str(tmp_path / "cache.jsonl"))
+    scores = cache.llm_scores("The moon stabilises the tilt of the earth", "Is the moon overrated?", 3)
+    cache.close()
+
+    assert scores == {"logic": 7.0, "relevance": 6.0, "persuasiveness": 8.0}
+    assert rescore.ScoreCache(str(tmp_path / "cache.jsonl")).scores == cache.scores
+
+
+def test_live_scoring_still_falls_back(monkeypatch):
+    def failing_call(payload, endpoint="default"):
+        raise ConnectionError("Gemini unavailable")
+
+    monkeypatch.setattr(ai_engine, "call_gemini", failing_call)
+    scores = ai_engine.score_argument_turn("Yet another unseen argument on craters", "Is the moon overrated?", 4)
+    assert scores == {"logic": 5.0, "relevance": 5.0, "persuasiveness": 5.0}
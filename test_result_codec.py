@@ -0,0 +1,93 @@
+# test_result_codec.py
+import gzip
+
+import orjson
+import pytest
+
+import result_codec
+from result_codec import encode_result, decode_result, GZIP_MAGIC, ZSTD_MAGIC
+
+
+def make_result(**extra):
+    scores = [{"logic": 7.0, "relevance": 6.5, "persuasiveness": 8.0},
+              {"logic": 5.0, "relevance": 9.0, "persuasiveness": 4.5}]
+    result = {
+        "game_id": "AB12CD",
+        "topic": "Should homework be banned?",
+        "players": {
+            "player1": {"name": "Ana", "arguments": ["Kids need rest", "Play is learning ✓"], "rounds_won": 1},
+            "player2": {"name": "Ben", "arguments": ["Practice matters", "Habits form early"], "rounds_won": 1},
+        },
+        "rounds": [
+            {"round": 1, "player1_score": scores[0], "player2_score": scores[1], "round_winner": "Player 1"},
+            {"round": 2, "player1_score": scores[1], "player2_score": scores[0], "round_winner": "Player 2"},
+        ],
+        "winner": "Tie",
+        "reason": "Each side won a round",
+        "timestamp": "2026-01-02 03:04:05",
+    }
+    result.update(extra)
+    return result
+
+
+class FakeZstd:
+    """Stands in for zstandard: frames start with the zstd magic, the body is gzip"""
+
+    class ZstdCompressor:
+        def __init__(self, level=3):
+            pass
+
+        def compress(self, data):
+            return ZSTD_MAGIC + gzip.compress(data)
+
+    class ZstdDecompressor:
+        def decompress(self, data):
+            return gzip.decompress(data[len(ZSTD_MAGIC):])
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_round_trip(compression):
+    result = make_result(game_id=42, tournament_id="T1")
+    assert decode_result(encode_result(result, compression)) == result
+
+
+def test_json_is_compact():
+    data = encode_result(make_result(), "none")
+    assert data == orjson.dumps(make_result())
+    assert b"\n" not in data
+
+
+def test_gzip_is_detected_and_smaller():
+    data = encode_result(make_result(), "gzip")
+    assert data.startswith(GZIP_MAGIC)
+    assert orjson.loads(gzip.decompress(data)) == make_result()
+    assert len(data) < len(encode_result(make_result(), "none"))
+
+
+def test_indented_json_from_older_versions_is_readable():
+    result = make_result()
+    assert decode_result(orjson.dumps(result, option=orjson.OPT_INDENT_2)) == result
+
+
+def test_zstd_is_detected(monkeypatch):
+    monkeypatch.setattr(result_codec, "_zstd_module", lambda: FakeZstd)
+    data = encode_result(make_result(), "zstd")
+    assert data.startswith(ZSTD_MAGIC)
+    assert decode_result(data) == make_result()
+
+
+def test_zstd_falls_back_to_gzip_without_zstandard(monkeypatch):
+    monkeypatch.setattr(result_codec, "_zstd_module", lambda: None)
+    data = encode_result(make_result(), "zstd")
+    assert data.startswith(GZIP_MAGIC)
+    assert decode_result(data) == make_result()
+    with pytest.raises(ValueError):
+        decode_result(ZSTD_MAGIC + b"\x00\x00")
+
+
+def test_real_zstandard_round_trip():
+    pytest.importorskip("zstandard")
+    result_codec._zstd = None
+    data = encode_result(make_result(), "zstd")
+    assert data.startswith(ZSTD_MAGIC)
+    assert decode_result(data) == make_result()
@@ -0,0 +1,31 @@
+# test_room_state.py
+from room_state import RoomState
+
+
+def test_room_version_and_events_since():
+    room = RoomState("ROOM01", "Cats or dogs?", "Cy")
+    assert room.version == 1
+    assert room.events_since(1) == []
+
+    room.apply("joined", {"player": "Di"})
+    room.apply("argument", {"player": "Cy", "argument": "Cats are quiet"})
+    assert room.version == 3
+    assert [event["type"] for event in room.events_since(1)] == ["joined", "argument"]
+    assert room.events_since(2) == [{"version": 3, "type": "argument",
+                                     "data": {"player": "Cy", "argument": "Cats are quiet"}}]
+    assert room.events_since(3) == []
+    assert room.events_since(0) is None
+    assert room.events_since(4) is None
+
+
+def test_players_updated_survives_a_snapshot():
+    room = RoomState("ROOM01", "Cats or dogs?", "Cy")
+    assert not room.players_updated
+    room.apply("players_updated", {"winner": "Cy"})
+    assert room.players_updated
+    assert RoomState.from_state(room.to_state()).players_updated
+
+    # Snapshots written before the flag existed restore as not updated
+    state = room.to_state()
+    del state["players_updated"]
+    assert not RoomState.from_state(state).players_updated
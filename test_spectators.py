@@ -0,0 +1,100 @@
+# test_spectators.py
+import asyncio
+
+import orjson
+
+import spectators
+from spectators import Broadcaster, sse_frame, DROPPED_FRAME, KEEPALIVE_FRAME
+
+
+def drain(subscriber):
+    frames = []
+    while not subscriber.queue.empty():
+        frames.append(subscriber.queue.get_nowait())
+    return frames
+
+
+def test_frame_format():
+    assert sse_frame("joined", {"player": "Di"}, 7) == b'id: 7\nevent: joined\ndata: {"player":"Di"}\n\n'
+    assert sse_frame("snapshot", {}) == b"event: snapshot\ndata: {}\n\n"
+
+
+def test_snapshot_is_built_once_per_change():
+    async def run():
+        broadcaster = Broadcaster()
+        calls = []
+
+        def snapshot():
+            calls.append(1)
+            return {"version": len(calls)}
+
+        first = broadcaster.subscribe("ROOM01", snapshot)
+        second = broadcaster.subscribe("ROOM01", snapshot)
+        assert len(calls) == 1
+        broadcaster.publish("ROOM01", "joined", {"player": "Di"}, 2)
+        third = broadcaster.subscribe("ROOM01", snapshot)
+        assert len(calls) == 2
+        assert broadcaster.count("ROOM01") == 3
+
+        # Every spectator gets the very same bytes for an event
+        event_frames = [drain(subscriber)[-1] for subscriber in (first, second)]
+        assert event_frames[0] is event_frames[1]
+        assert orjson.loads(drain(third)[0].split(b"data: ")[1]) == {"version": 2}
+
+    asyncio.run(run())
+
+
+def test_final_event_closes_the_stream():
+    async def run():
+        broadcaster = Broadcaster()
+        subscriber = broadcaster.subscribe("ROOM01", lambda: {})
+        broadcaster.publish("ROOM01", "argument", {"player": "Cy"}, 3)
+        broadcaster.publish("ROOM01", "completed", {}, 4)
+        frames = [frame async for frame in broadcaster.stream("ROOM01", subscriber)]
+        events = [line for frame in frames for line in frame.split(b"\n") if line.startswith(b"event: ")]
+        assert events == [b"event: snapshot", b"event: argument", b"event: completed"]
+        assert broadcaster.count("ROOM01") == 0
+
+    asyncio.run(run())
+
+
+def test_finished_room_only_gets_the_snapshot():
+    async def run():
+        broadcaster = Broadcaster()
+        subscriber = broadcaster.subscribe("ROOM01", lambda: {"status": "completed"}, finished=True)
+        frames = [frame async for frame in broadcaster.stream("ROOM01", subscriber)]
+        assert frames == [sse_frame("snapshot", {"status": "completed"})]
+
+    asyncio.run(run())
+
+
+def test_slow_spectator_is_dropped_without_affecting_others():
+    async def run():
+        broadcaster = Broadcaster(queue_size=3)
+        slow = broadcaster.subscribe("ROOM01", lambda: {})
+        fast = broadcaster.subscribe("ROOM01", lambda: {})
+        for version in range(2, 8):
+            broadcaster.publish("ROOM01", "argument", {"version": version}, version)
+            drain(fast)
+
+        assert slow.dropped and not fast.dropped
+        assert broadcaster.dropped == 1
+        assert [frame async for frame in broadcaster.stream("ROOM01", slow)] == [DROPPED_FRAME]
+        assert broadcaster.count("ROOM01") == 1
+
+    asyncio.run(run())
+
+
+def test_idle_stream_sends_keepalives(monkeypatch):
+    monkeypatch.setattr(spectators, "SPECTATOR_KEEPALIVE", 0.01)
+
+    async def run():
+        broadcaster = Broadcaster()
+        subscriber = broadcaster.subscribe("ROOM01", lambda: {})
+        stream = broadcaster.stream("ROOM01", subscriber)
+        assert (await stream.__anext__()).startswith(b"event: snapshot")
+        assert await stream.__anext__() == KEEPALIVE_FRAME
+        await stream.aclose()
+        assert broadcaster.count("ROOM01") == 0
+
+    asyncio.run(run())
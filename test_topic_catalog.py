@@ -0,0 +1,46 @@
+# test_topic_catalog.py
+import os
+
+from topic_catalog import TopicCatalog, clean_topic
+
+
+def test_rewordings_are_dropped(tmp_path):
+    catalog = TopicCatalog(str(tmp_path / "catalog.json"))
+    added = catalog.add("science", ["1. Should we colonise Mars?", "- Should we colonise Mars ?",
+                                    "Is nuclear power safe?"], save=False)
+    assert added == ["Should we colonise Mars?", "Is nuclear power safe?"]
+    assert catalog.genre_of('"Is nuclear power safe?"') == "science"
+    assert clean_topic('2) "Cats or dogs?"') == "Cats or dogs?"
+
+
+def test_sample_picks_distinct_topics(tmp_path):
+    catalog = TopicCatalog(None)
+    catalog.add("food", ["Is pineapple on pizza acceptable?", "Should school lunches be free?",
+                         "Is breakfast the most important meal?", "Should sugar be taxed?"], save=False)
+    picked = catalog.sample("food", 3)
+    assert len(picked) == len(set(picked)) == 3
+    assert catalog.sample("unknown") == []
+
+
+def test_concurrent_workers_keep_each_others_topics(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    first, second = TopicCatalog(path), TopicCatalog(path)
+    first.add("sports", ["Should chess be an Olympic sport?"])
+    second.add("sports", ["Are esports real sports?"])
+    second.add("history", ["Was the printing press the greatest invention?"])
+
+    reloaded = TopicCatalog(path)
+    assert reloaded.count("sports") == 2
+    assert reloaded.count("history") == 1
+    # The second worker picked up the first one's topic while saving
+    assert second.count("sports") == 2
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_unreadable_catalog_is_ignored(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text('{"sports": ["Half a')
+    catalog = TopicCatalog(str(path))
+    assert catalog.count("sports") == 0
+    catalog.add("sports", ["Should chess be an Olympic sport?"])
+    assert TopicCatalog(str(path)).count("sports") == 1
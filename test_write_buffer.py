@@ -0,0 +1,91 @@
+# test_write_buffer.py
+import threading
+import time
+
+from write_buffer import WriteBehindBuffer
+
+
+class FakeMinio:
+    """Records PUTs; keys listed in fail_keys fail once each"""
+
+    def __init__(self, fail_keys=()):
+        self.objects = {}
+        self.puts = []
+        self.fail_keys = set(fail_keys)
+        self.lock = threading.Lock()
+
+    def put_object(self, bucket, key, data, length):
+        with self.lock:
+            if key in self.fail_keys:
+                self.fail_keys.discard(key)
+                raise ConnectionError("MinIO unavailable")
+            self.puts.append(key)
+            self.objects[key] = data.read()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_zero_window_writes_through():
+    minio = FakeMinio()
+    buffer = WriteBehindBuffer(minio, "bucket", window=0)
+    buffer.put("player_Ana.json", b"1")
+    assert minio.objects == {"player_Ana.json": b"1"}
+    assert buffer.get("player_Ana.json") is None
+    buffer.close()
+
+
+def test_writes_to_one_key_coalesce_and_are_readable_before_the_flush():
+    minio = FakeMinio()
+    buffer = WriteBehindBuffer(minio, "bucket", window=60)
+    buffer.put("player_Ana.json", b"1")
+    buffer.put("player_Ana.json", b"2")
+    buffer.put("player_Ben.json", b"3")
+    assert minio.puts == []
+    assert buffer.get("player_Ana.json") == b"2"
+
+    buffer.flush()
+    assert sorted(minio.puts) == ["player_Ana.json", "player_Ben.json"]
+    assert minio.objects["player_Ana.json"] == b"2"
+    assert (buffer.puts, buffer.coalesced, buffer.flushed) == (3, 1, 2)
+    buffer.close()
+
+
+def test_failed_upload_is_retried_unless_a_newer_value_is_queued():
+    minio = FakeMinio(fail_keys={"player_Ana.json", "player_Ben.json"})
+    buffer = WriteBehindBuffer(minio, "bucket", window=60)
+    buffer.put("player_Ana.json", b"old")
+    buffer.put("player_Ben.json", b"ben")
+    buffer.flush()
+    assert minio.puts == []
+    assert buffer.get("player_Ana.json") == b"old"
+
+    buffer.put("player_Ana.json", b"new")
+    buffer.flush()
+    assert minio.objects == {"player_Ana.json": b"new", "player_Ben.json": b"ben"}
+    buffer.close()
+
+
+def test_full_buffer_flushes_early():
+    minio = FakeMinio()
+    buffer = WriteBehindBuffer(minio, "bucket", window=60, max_pending=3)
+    for i in range(3):
+        buffer.put(f"debate_{i}.json", b"{}")
+    wait_for(lambda: len(minio.puts) == 3)
+    buffer.close()
+
+
+def test_close_writes_out_everything_pending():
+    minio = FakeMinio(fail_keys={"player_Ana.json"})
+    buffer = WriteBehindBuffer(minio, "bucket", window=60)
+    buffer.put("player_Ana.json", b"1")
+    buffer.put("player_Ben.json", b"2")
+    buffer.close()
+    assert minio.objects == {"player_Ana.json": b"1", "player_Ben.json": b"2"}
+    # Writes after close go straight through
+    buffer.put("player_Cy.json", b"3")
+    assert minio.objects["player_Cy.json"] == b"3"
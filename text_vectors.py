@@ -0,0 +1,59 @@
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a an the and or but if then than so of to in on at by for with from as into about over under
+is are was were be been being am do does did doing have has had having it its it's this that
+these those there their they them he she his her we our you your i me my not no yes can could
+should would will shall may might must just very more most less also all any some such what which
+who whom whose why how when where because while
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stopwords"""
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def features(text: str, char_ngram: int = 4) -> List[str]:
+    """
+    Word tokens plus character n-grams of each (padded) word, so that
+    "vote", "votes" and "voting" still share most of their features
+    """
+    result = []
+    for token in tokenize(text):
+        result.append(token)
+        padded = f" {token} "
+        if len(padded) > char_ngram:
+            result.extend(f"#{padded[i:i + char_ngram]}" for i in range(len(padded) - char_ngram + 1))
+    return result
+
+
+def hash_vectors(texts: List[str], n_features: int = 4096) -> np.ndarray:
+    """
+    Signed feature hashing with sublinear term frequency, L2-normalized rows.
+    crc32 keeps the hashing stable across processes, so vectors can be persisted.
+    Returns a float32 array of shape (len(texts), n_features).
+    """
+    rows, hashes = [], []
+    for row, text in enumerate(texts):
+        text_hashes = [zlib.crc32(feature.encode("utf-8")) for feature in features(text)]
+        rows.extend([row] * len(text_hashes))
+        hashes.extend(text_hashes)
+
+    matrix = np.zeros((len(texts), n_features), dtype=np.float32)
+    if hashes:
+        hashes = np.asarray(hashes, dtype=np.uint32)
+        signs = np.where(hashes >> 31, 1.0, -1.0).astype(np.float32)
+        np.add.at(matrix, (np.asarray(rows), hashes % n_features), signs)
+
+    # Sublinear tf keeps the sign of each bucket
+    np.copysign(np.log1p(np.abs(matrix)), matrix, out=matrix)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -0,0 +1,149 @@
+import os
+import re
+import json
+import random
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from text_vectors import hash_vectors
+
+TOPIC_CATALOG_PATH = os.getenv("TOPIC_CATALOG_PATH", "tmp/topic_catalog.json")
+# Cosine similarity at or above which a new topic counts as a rewording of an existing one
+TOPIC_DEDUP_THRESHOLD = float(os.getenv("TOPIC_DEDUP_THRESHOLD", "0.6"))
+# Below this many topics a genre is refilled from the LLM in the background
+TOPIC_REFILL_BELOW = int(os.getenv("TOPIC_REFILL_BELOW", "30"))
+# Seconds to wait after a refill that added nothing, doubling up to the maximum while refills stay empty
+TOPIC_REFILL_BACKOFF = float(os.getenv("TOPIC_REFILL_BACKOFF", "30"))
+TOPIC_REFILL_BACKOFF_MAX = float(os.getenv("TOPIC_REFILL_BACKOFF_MAX", "600"))
+TOPIC_VECTOR_FEATURES = 1024
+
+LIST_MARKER_RE = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s*")
+
+
+def clean_topic(topic: str) -> str:
+    """Strip list numbering/bullets and stray quotes the LLM sometimes adds"""
+    return LIST_MARKER_RE.sub("", topic).strip().strip('"').strip()
+
+
+class GenreTopics:
+    __slots__ = ("topics", "vectors")
+
+    def __init__(self):
+        self.topics: List[str] = []
+        self.vectors = np.zeros((0, TOPIC_VECTOR_FEATURES), dtype=np.float32)
+
+
+class TopicCatalog:
+    """
+    Per-genre store of every topic seen so far, with a hashed n-gram vector per
+    topic. New topics are dropped on insert when they are a rewording of one
+    already in the genre, and topics are served from here so requests never
+    wait on the LLM.
+    """
+
+    def __init__(self, path: Optional[str] = TOPIC_CATALOG_PATH):
+        self.path = path
+        self.genres: Dict[str, GenreTopics] = {}
+        self.topic_genres: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.merge_saved()
+
+    def merge_saved(self):
+        """Add the topics in the saved catalog (possibly written by another worker)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as file:
+                saved = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not read topic catalog {self.path}: {e}")
+            return
+        for genre, topics in saved.items():
+            self.add(genre, topics, save=False)
+
+    def add(self, genre: str, topics: List[str], save: bool = True) -> List[str]:
+        """Insert topics into a genre; returns the ones that were not duplicates"""
+        genre = genre.lower()
+        candidates = [topic for topic in (clean_topic(t) for t in topics) if topic]
+        if not candidates:
+            return []
+        vectors = hash_vectors(candidates, TOPIC_VECTOR_FEATURES)
+
+        with self._lock:
+            entry = self.genres.setdefault(genre, GenreTopics())
+            # Similarity of every candidate to the catalog and to the other candidates, in one go
+            existing = vectors @ entry.vectors.T
+            batch = vectors @ vectors.T
+
+            added = []
+            for i, topic in enumerate(candidates):
+                if existing.shape[1] and existing[i].max() >= TOPIC_DEDUP_THRESHOLD:
+                    continue
+                if any(batch[i, j] >= TOPIC_DEDUP_THRESHOLD for j in added):
+                    continue
+                added.append(i)
+
+            if added:
+                entry.topics.extend(candidates[i] for i in added)
+                entry.vectors = np.vstack([entry.vectors, vectors[added]])
+                for i in added:
+                    self.topic_genres[candidates[i].lower()] = genre
+
+        if added and save:
+            self.save()
+        return [candidates[i] for i in added]
+
+    def count(self, genre: str) -> int:
+        entry = self.genres.get(genre.lower())
+        return len(entry.topics) if entry else 0
+
+    def needs_refill(self, genre: str) -> bool:
+        return self.count(genre) < TOPIC_REFILL_BELOW
+
+    def genre_of(self, topic: str) -> Optional[str]:
+        return self.topic_genres.get(clean_topic(topic).lower())
+
+    def sample(self, genre: str, k: int = 3) -> List[str]:
+        """
+        k topics that are as different from each other as possible: start from a
+        random topic, then repeatedly add one of the topics least similar to
+        everything picked so far
+        """
+        with self._lock:
+            entry = self.genres.get(genre.lower())
+            if entry is None or not entry.topics:
+                return []
+            topics, vectors = entry.topics, entry.vectors
+
+        picked = [random.randrange(len(topics))]
+        closest = vectors @ vectors[picked[0]]
+        while len(picked) < min(k, len(topics)):
+            closest[picked] = np.inf
+            # Choose randomly among the few most distant topics so repeated calls vary
+            pool = np.argsort(closest)[:5]
+            pool = pool[np.isfinite(closest[pool])]
+            choice = int(random.choice(pool))
+            picked.append(choice)
+            closest = np.maximum(closest, vectors @ vectors[choice])
+        return [topics[i] for i in picked]
+
+    def save(self):
+        """
+        Write the catalog. Workers share the file: topics saved by the others are
+        merged in first, and each process writes its own temporary file, so a
+        save never clobbers another one half-way. Two saves racing can still
+        drop the other's newest topics from the file, but not from that worker's
+        memory, and its next save writes them back.
+        """
+        if not self.path:
+            return
+        self.merge_saved()
+        with self._lock:
+            data = {genre: list(entry.topics) for genre, entry in self.genres.items()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(tmp_path, self.path)
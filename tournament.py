@@ -0,0 +1,224 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+FORMATS = ("round_robin", "bracket")
+POINTS = {"win": 3, "draw": 1, "loss": 0}
+
+
+def round_robin_pairings(players: List[str]) -> List[List[tuple]]:
+    """Circle method: every player meets every other once; None marks a bye"""
+    seats = list(players) + ([None] if len(players) % 2 else [])
+    rounds = []
+    for _ in range(len(seats) - 1):
+        half = len(seats) // 2
+        rounds.append([(seats[i], seats[-1 - i]) for i in range(half)])
+        # Keep the first seat fixed, rotate the rest
+        seats = [seats[0], seats[-1]] + seats[1:-1]
+    return rounds
+
+
+def bracket_order(size: int) -> List[int]:
+    """Seed positions of a single-elimination bracket (0-based), e.g. 0,7,3,4,1,6,2,5 for 8"""
+    order = [0]
+    while len(order) < size:
+        total = len(order) * 2
+        order = [seed for s in order for seed in (s, total - 1 - s)]
+    return order
+
+
+class Match:
+    __slots__ = ("match_id", "round", "player1", "player2", "room_key", "status", "winner", "rounds_won")
+
+    def __init__(self, match_id: str, round_number: int, player1: Optional[str], player2: Optional[str]):
+        self.match_id = match_id
+        self.round = round_number
+        self.player1 = player1
+        self.player2 = player2
+        self.room_key: Optional[str] = None
+        # pending -> in_progress -> completed / forfeit; bye when a seat is empty
+        self.status = "pending"
+        self.winner: Optional[str] = None
+        self.rounds_won = [0, 0]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "forfeit", "bye")
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Match":
+        match = cls(data["match_id"], data["round"], data["player1"], data["player2"])
+        for slot in ("room_key", "status", "winner", "rounds_won"):
+            setattr(match, slot, data[slot])
+        return match
+
+
+class Tournament:
+    """
+    Schedule, results and standings of one tournament. Rooms are created one
+    tournament round at a time: all matches of a round are played in
+    parallel and the next round starts once every one of them has finished.
+
+    round_robin: every player meets every other player once.
+    bracket: single elimination, seeded in the given player order; a tied
+    debate advances the higher seed.
+    """
+
+    def __init__(self, tournament_id: str, name: str, fmt: str, players: List[str],
+                 topic: Optional[str] = None, genre: Optional[str] = None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown tournament format: {fmt}")
+        if len(set(players)) != len(players) or len(players) < 2:
+            raise ValueError("A tournament needs at least 2 distinct players")
+
+        self.tournament_id = tournament_id
+        self.name = name
+        self.format = fmt
+        self.players = list(players)
+        self.topic = topic
+        self.genre = genre
+        self.status = "in_progress"
+        self.current_round = 0
+        self.round_topics: List[str] = []
+        self.created_at = datetime.now().isoformat()
+        self.standings: Dict[str, dict] = {
+            player: {"played": 0, "wins": 0, "draws": 0, "losses": 0, "points": 0,
+                     "rounds_won": 0, "rounds_lost": 0}
+            for player in players
+        }
+        self.rounds: List[List[Match]] = []
+
+        if fmt == "round_robin":
+            for index, pairs in enumerate(round_robin_pairings(players)):
+                self.rounds.append(self._matches(index + 1, pairs))
+        else:
+            size = 1
+            while size < len(players):
+                size *= 2
+            seeds = players + [None] * (size - len(players))
+            order = bracket_order(size)
+            pairs = [(seeds[order[i]], seeds[order[i + 1]]) for i in range(0, size, 2)]
+            self.rounds.append(self._matches(1, pairs))
+
+    @staticmethod
+    def _matches(round_number: int, pairs) -> List[Match]:
+        matches = []
+        for index, (player1, player2) in enumerate(pairs):
+            if player1 is None:
+                player1, player2 = player2, player1
+            match = Match(f"r{round_number}m{index + 1}", round_number, player1, player2)
+            if player2 is None:
+                match.status = "bye"
+                match.winner = player1
+            matches.append(match)
+        return matches
+
+    @property
+    def total_rounds(self) -> int:
+        if self.format == "round_robin":
+            return len(self.rounds)
+        size = 1
+        rounds = 0
+        while size < len(self.players):
+            size *= 2
+            rounds += 1
+        return rounds
+
+    def match(self, match_id: str) -> Optional[Match]:
+        for matches in self.rounds:
+            for match in matches:
+                if match.match_id == match_id:
+                    return match
+        return None
+
+    def start_next_round(self) -> List[Match]:
+        """
+        Advance to the next round and return the matches that need a room.
+        Empty when the tournament is over.
+        """
+        if self.format == "bracket" and self.current_round:
+            winners = [match.winner for match in self.rounds[-1]]
+            if len(winners) == 1:
+                self.status = "completed"
+                return []
+            pairs = [(winners[i], winners[i + 1]) for i in range(0, len(winners), 2)]
+            self.rounds.append(self._matches(self.current_round + 1, pairs))
+        elif self.current_round >= len(self.rounds):
+            self.status = "completed"
+            return []
+
+        self.current_round += 1
+        return [match for match in self.rounds[self.current_round - 1] if match.status == "pending"]
+
+    def round_finished(self) -> bool:
+        return all(match.finished for match in self.rounds[self.current_round - 1])
+
+    def record_result(self, match: Match, winner: Optional[str], rounds_won: List[int], forfeit: bool = False):
+        """Store a match outcome and update the standings of both players; winner None is a draw"""
+        match.rounds_won = rounds_won
+        match.status = "forfeit" if forfeit else "completed"
+        if winner is None and self.format == "bracket":
+            # Elimination needs a winner: the higher seed goes through
+            winner = match.player1
+            outcome1 = outcome2 = "draw"
+        elif winner is None:
+            outcome1 = outcome2 = "draw"
+        else:
+            outcome1 = "win" if winner == match.player1 else "loss"
+            outcome2 = "win" if winner == match.player2 else "loss"
+        match.winner = winner
+
+        for player, outcome, won, lost in ((match.player1, outcome1, rounds_won[0], rounds_won[1]),
+                                           (match.player2, outcome2, rounds_won[1], rounds_won[0])):
+            entry = self.standings[player]
+            entry["played"] += 1
+            entry[{"win": "wins", "draw": "draws", "loss": "losses"}[outcome]] += 1
+            entry["points"] += POINTS[outcome]
+            entry["rounds_won"] += won
+            entry["rounds_lost"] += lost
+
+    def ranked_standings(self) -> List[dict]:
+        """Standings ordered by points, then round difference, then rounds won"""
+        ranked = sorted(
+            ({"player": player, **entry} for player, entry in self.standings.items()),
+            key=lambda e: (-e["points"], -(e["rounds_won"] - e["rounds_lost"]), -e["rounds_won"], e["player"])
+        )
+        for rank, entry in enumerate(ranked, start=1):
+            entry["rank"] = rank
+        return ranked
+
+    @property
+    def champion(self) -> Optional[str]:
+        if self.status != "completed":
+            return None
+        if self.format == "bracket":
+            return self.rounds[-1][0].winner
+        return self.ranked_standings()[0]["player"]
+
+    def to_dict(self) -> dict:
+        return {
+            "tournament_id": self.tournament_id,
+            "name": self.name,
+            "format": self.format,
+            "players": self.players,
+            "topic": self.topic,
+            "genre": self.genre,
+            "status": self.status,
+            "current_round": self.current_round,
+            "total_rounds": self.total_rounds,
+            "round_topics": self.round_topics,
+            "created_at": self.created_at,
+            "standings": self.standings,
+            "rounds": [[match.to_dict() for match in matches] for matches in self.rounds],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Tournament":
+        tournament = cls.__new__(cls)
+        for field in ("tournament_id", "name", "format", "players", "topic", "genre", "status",
+                      "current_round", "round_topics", "created_at", "standings"):
+            setattr(tournament, field, data[field])
+        tournament.rounds = [[Match.from_dict(match) for match in matches] for matches in data["rounds"]]
+        return tournament
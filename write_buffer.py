@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from minio import Minio
+
+# Seconds a write may sit in memory before it reaches MinIO (0 writes through)
+WRITE_BEHIND_WINDOW = float(os.getenv("WRITE_BEHIND_WINDOW", "1.0"))
+# Pending objects that trigger an early flush
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "1000"))
+WRITE_BEHIND_WORKERS = int(os.getenv("WRITE_BEHIND_WORKERS", "8"))
+
+
+class WriteBehindBuffer:
+    """
+    Object writes held in memory and flushed to MinIO in batches by a
+    background thread. Writes to the same key within a window collapse into
+    one PUT of the latest value, and get() returns pending data so callers
+    read their own writes. A write is lost only if the process dies within
+    the window; close() flushes everything on shutdown.
+    """
+
+    def __init__(self, minio_client: Minio, bucket_name: str, window: float = WRITE_BEHIND_WINDOW,
+                 max_pending: int = WRITE_BEHIND_MAX_PENDING, workers: int = WRITE_BEHIND_WORKERS):
+        self.minio_client = minio_client
+        self.bucket_name = bucket_name
+        self.window = window
+        self.max_pending = max_pending
+        self.puts = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self._pending: Dict[str, bytes] = {}
+        self._flushing: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="write-behind")
+        self._thread = None
+        if window > 0:
+            self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+            self._thread.start()
+
+    def _upload(self, key: str, data: bytes):
+        self.minio_client.put_object(self.bucket_name, key, BytesIO(data), length=len(data))
+
+    def put(self, key: str, data: bytes):
+        """Queue an object write (or write it now when write-behind is off)"""
+        if self._thread is None or self._closed:
+            self._upload(key, data)
+            return
+        with self._lock:
+            self.puts += 1
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = data
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Data written for key that may not have reached MinIO yet"""
+        with self._lock:
+            data = self._pending.get(key)
+            return data if data is not None else self._flushing.get(key)
+
+    def flush(self):
+        """Upload everything pending, in parallel"""
+        with self._lock:
+            if not self._pending:
+                return
+            batch = self._flushing = self._pending
+            self._pending = {}
+
+        results = {key: self._pool.submit(self._upload, key, data) for key, data in batch.items()}
+        failed = 0
+        for key, future in results.items():
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[ERROR] Write-behind upload of {key} failed: {e}")
+                with self._lock:
+                    # Retry on the next flush unless a newer value was queued meanwhile
+                    self._pending.setdefault(key, batch[key])
+
+        with self._lock:
+            self._flushing = {}
+            self.flushed += len(batch) - failed
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.window)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Write-behind flush failed: {e}")
+
+    def close(self):
+        """Stop the flusher and write out whatever is still pending"""
+        self._closed = True
+        if self._thread is not None:
+            self._wake.set()
+            self._thread.join()
+        # Failed uploads are retried a few times before giving up
+        for _ in range(3):
+            self.flush()
+            if not self._pending:
+                break
+            time.sleep(0.5)
+        self._pool.shutdown()
+        if self._pending:
+            print(f"[ERROR] {len(self._pending)} objects could not be written: {sorted(self._pending)}")
+        print(f"[INFO] Write-behind: {self.puts} writes, {self.coalesced} coalesced, {self.flushed} objects flushed")